@@ -1,5 +1,5 @@
 from django.db import models
-from apps.common.models import TimestampedModel
+from common.models import TimestampedModel
 
 
 class Category(TimestampedModel):
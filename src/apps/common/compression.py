@@ -0,0 +1,144 @@
+"""
+Storage format for ``CompressedTextField``.
+
+A stored value is ``MAGIC``, a one-byte method and a payload:
+
+- ``r``: the UTF-8 text itself, for values too short to be worth compressing;
+- ``z``: a zlib stream;
+- ``d``: a four-byte dictionary id followed by a zlib stream compressed with
+  that preset dictionary.
+
+Preset dictionaries are trained from existing rows (``train_dictionary``) and
+stored in the ``CompressionDictionary`` table, keyed by the first four bytes of
+the SHA-256 of their bytes, so they are backed up and restored with the rows
+that use them. ``ActiveCompressionDictionary`` names the dictionary new values
+of a field are compressed with.
+"""
+import hashlib
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+
+MAGIC = b'\x00cz'
+RAW, ZLIB, DICTIONARY = b'r', b'z', b'd'
+MIN_COMPRESS_LENGTH = 64  # bytes; shorter values are stored as they are
+LEVEL = 6
+DICTIONARY_SIZE = 32 * 1024  # zlib only looks back 32 KiB, so a larger dictionary is wasted
+
+
+def is_compressed(raw):
+    return isinstance(raw, (bytes, memoryview)) and bytes(raw[:len(MAGIC)]) == MAGIC
+
+
+def compress(text, dictionary=None):
+    """Encode ``text`` for storage, with the named field dictionary if one is active."""
+    data = text.encode('utf-8')
+    if len(data) < MIN_COMPRESS_LENGTH:
+        return MAGIC + RAW + data
+    active = get_dictionary_store().active(dictionary) if dictionary else None
+    if active is None:
+        return MAGIC + ZLIB + zlib.compress(data, LEVEL)
+    digest, zdict = active
+    compressor = zlib.compressobj(LEVEL, zdict=zdict)
+    return MAGIC + DICTIONARY + bytes.fromhex(digest[:8]) + compressor.compress(data) + compressor.flush()
+
+
+def decompress(raw):
+    """Decode a stored value; text written before compression was enabled passes through."""
+    if isinstance(raw, str):
+        return raw
+    raw = bytes(raw)
+    if not raw.startswith(MAGIC):
+        return raw.decode('utf-8')
+    method, payload = raw[len(MAGIC):len(MAGIC) + 1], raw[len(MAGIC) + 1:]
+    if method == RAW:
+        return payload.decode('utf-8')
+    if method == ZLIB:
+        return zlib.decompress(payload).decode('utf-8')
+    if method == DICTIONARY:
+        decompressor = zlib.decompressobj(zdict=get_dictionary_store().get(payload[:4].hex()))
+        return (decompressor.decompress(payload[4:]) + decompressor.flush()).decode('utf-8')
+    raise ValueError(f"Unknown compression method {method!r}")
+
+
+def dictionary_id(raw):
+    """The id of the dictionary a stored value was compressed with, or None."""
+    if not is_compressed(raw):
+        return None
+    header = bytes(raw[len(MAGIC):len(MAGIC) + 5])
+    return header[1:].hex() if header[:1] == DICTIONARY else None
+
+
+def train_dictionary(samples, size=DICTIONARY_SIZE):
+    """
+    Build a zlib preset dictionary from sample values.
+
+    The dictionary is the lines that recur across the most samples, with the
+    most common last, since zlib encodes nearby matches most cheaply.
+    """
+    frequency = Counter()
+    for sample in samples:
+        frequency.update({line for line in sample.splitlines(keepends=True) if 4 <= len(line) <= 256})
+    chosen, total = [], 0
+    for line, count in frequency.most_common():
+        if count < 2:
+            break
+        encoded = line.encode('utf-8')
+        if total + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        total += len(encoded)
+    return b''.join(reversed(chosen))
+
+
+class DictionaryStore:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._active = {}
+
+    def save(self, name, data):
+        """Store a dictionary, make it the active one for ``name`` and return its digest."""
+        from common.models import ActiveCompressionDictionary, CompressionDictionary
+
+        digest = hashlib.sha256(data).hexdigest()
+        dictionary, created = CompressionDictionary.objects.get_or_create(
+            id=digest[:8], defaults={'digest': digest, 'data': data},
+        )
+        if not created and dictionary.digest != digest:
+            raise ValueError(f"Compression dictionary id {digest[:8]} is already used by {dictionary.digest}")
+        ActiveCompressionDictionary.objects.update_or_create(name=name, defaults={'dictionary': dictionary})
+        self._active[name] = (time.monotonic(), digest, data)
+        return digest
+
+    def active(self, name):
+        """``(digest, data)`` of the active dictionary for ``name``, or None."""
+        from common.models import ActiveCompressionDictionary
+
+        cached = self._active.get(name)
+        if cached is None or time.monotonic() - cached[0] > self.ttl:
+            row = (
+                ActiveCompressionDictionary.objects.filter(name=name)
+                .values_list('dictionary__digest', 'dictionary_id').first()
+            )
+            cached = self._active[name] = (
+                (time.monotonic(), None, None) if row is None else (time.monotonic(), row[0], self.get(row[1]))
+            )
+        return None if cached[1] is None else (cached[1], cached[2])
+
+    @lru_cache(maxsize=None)
+    def get(self, short_id):
+        """The dictionary with id ``short_id``; ids are never reused, so it can be cached for good."""
+        from common.models import CompressionDictionary
+
+        data = CompressionDictionary.objects.filter(id=short_id).values_list('data', flat=True).first()
+        if data is None:
+            raise LookupError(f"Compression dictionary {short_id} not found")
+        return bytes(data)
+
+
+@lru_cache(maxsize=1)
+def get_dictionary_store():
+    return DictionaryStore(settings.COMPRESSION_DICTIONARY_TTL)
@@ -0,0 +1,42 @@
+from django.db import models
+
+from .compression import compress, decompress
+
+
+class CompressedTextField(models.TextField):
+    """
+    A ``TextField`` stored zlib-compressed in a binary column.
+
+    The ORM reads and writes plain ``str``. Rows written before a column was
+    converted are read back as they are, and ``manage.py compress_text_fields``
+    rewrites them. Only exact-match lookups work on the stored content.
+    ``dictionary`` names the preset dictionary the field trains and uses.
+    """
+
+    def __init__(self, *args, dictionary=None, **kwargs):
+        self.dictionary = dictionary
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.dictionary is not None:
+            kwargs['dictionary'] = self.dictionary
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else decompress(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress(value)
+        return super().to_python(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(compress(value, self.dictionary))
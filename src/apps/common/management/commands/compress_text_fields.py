@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from common.compression import (
+    MAGIC, RAW, compress, decompress, dictionary_id, get_dictionary_store, is_compressed, train_dictionary,
+)
+from common.fields import CompressedTextField
+
+
+class Command(BaseCommand):
+    help = "Compress existing rows of every CompressedTextField in chunks and report the space saved"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--train', action='store_true',
+                            help="Train a fresh preset dictionary per field from recent rows first")
+        parser.add_argument('--sample', type=int, default=2000, help="Rows to train each dictionary on")
+        parser.add_argument('--recompress', action='store_true',
+                            help="Also rewrite rows not compressed with the field's active dictionary")
+
+    def handle(self, *args, **options):
+        targets = [
+            (model, [field for field in model._meta.fields if isinstance(field, CompressedTextField)])
+            for model in apps.get_models()
+        ]
+        targets = [(model, fields) for model, fields in targets if fields]
+
+        if options['train']:
+            for model, fields in targets:
+                for field in fields:
+                    if field.dictionary:
+                        self.train(model, field, options['sample'])
+
+        total_before = total_after = 0
+        for model, fields in targets:
+            stats = self.convert(model, fields, options['chunk_size'], options['recompress'])
+            for field in fields:
+                count, before, after = stats[field.name]
+                total_before += before
+                total_after += after
+                self.stdout.write(
+                    f"{model._meta.label}.{field.name}: compressed {count} values, "
+                    f"{_size(before)} -> {_size(after)} ({_saved(before, after)} saved)"
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {_size(total_before)} -> {_size(total_after)} ({_saved(total_before, total_after)} saved)"
+        ))
+
+    def train(self, model, field, sample):
+        samples = list(model.objects.order_by('-pk').values_list(field.name, flat=True)[:sample])
+        data = train_dictionary(samples)
+        if not data:
+            self.stdout.write(f"{model._meta.label}.{field.name}: too little repetition to train a dictionary")
+            return
+        digest = get_dictionary_store().save(field.dictionary, data)
+        self.stdout.write(
+            f"Trained '{field.dictionary}' dictionary {digest[:8]} ({_size(len(data))}) from {len(samples)} rows"
+        )
+
+    def convert(self, model, fields, chunk_size, recompress):
+        """Rewrite stored values in primary key order, one transaction per chunk."""
+        quote = connection.ops.quote_name
+        table, pk = quote(model._meta.db_table), quote(model._meta.pk.column)
+        columns = ', '.join(quote(field.column) for field in fields)
+        active = {
+            field.name: field.dictionary and get_dictionary_store().active(field.dictionary)
+            for field in fields
+        }
+        stats = defaultdict(lambda: [0, 0, 0])
+        last = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {pk}, {columns} FROM {table} WHERE {pk} > %s ORDER BY {pk} LIMIT %s",
+                    [last, chunk_size],
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    return stats
+                last = rows[-1][0]
+                for index, field in enumerate(fields, start=1):
+                    wanted = active[field.name] and active[field.name][0][:8]
+                    updates = []
+                    for row in rows:
+                        raw = row[index]
+                        if raw is None or not _needs_rewrite(raw, wanted, recompress):
+                            continue
+                        stored = compress(decompress(raw), field.dictionary)
+                        field_stats = stats[field.name]
+                        field_stats[0] += 1
+                        field_stats[1] += len(raw.encode('utf-8') if isinstance(raw, str) else raw)
+                        field_stats[2] += len(stored)
+                        updates.append((connection.Database.Binary(stored), row[0]))
+                    if updates:
+                        cursor.executemany(
+                            f"UPDATE {table} SET {quote(field.column)} = %s WHERE {pk} = %s", updates,
+                        )
+
+
+def _needs_rewrite(raw, dictionary, recompress):
+    if not is_compressed(raw):
+        return True
+    # Values too short to compress are stored raw whatever the dictionary.
+    return recompress and bytes(raw[len(MAGIC):len(MAGIC) + 1]) != RAW and dictionary_id(raw) != dictionary
+
+
+def _size(count):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if count < 1024 or unit == 'GiB':
+            return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def _saved(before, after):
+    return f"{1 - after / before:.0%}" if before else "0%"
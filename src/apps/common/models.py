@@ -8,4 +8,24 @@ class TimestampedModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+class CompressionDictionary(models.Model):
+    """A zlib preset dictionary ``CompressedTextField`` values may reference by ``id``"""
+    id = models.CharField(max_length=8, primary_key=True)  # first four bytes of the digest, in hex
+    digest = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.id
+
+
+class ActiveCompressionDictionary(models.Model):
+    """The dictionary new values of a named field are compressed with"""
+    name = models.CharField(max_length=100, primary_key=True)
+    dictionary = models.ForeignKey(CompressionDictionary, on_delete=models.PROTECT, related_name='+')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.dictionary_id}"
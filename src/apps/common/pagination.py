@@ -0,0 +1,24 @@
+"""
+Opaque keyset cursors for pages ordered newest first on ``(timestamp, id)``.
+
+A cursor carries the last row's full-precision timestamp and id, so rows made
+in the same instant, or within the millisecond a JSON timestamp keeps, are
+neither skipped nor repeated across pages.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from ninja.errors import HttpError
+
+
+def encode_cursor(at, pk):
+    return base64.urlsafe_b64encode(f"{at.isoformat()}|{pk}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        at, pk = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split('|')
+        return datetime.fromisoformat(at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HttpError(400, "Invalid cursor")
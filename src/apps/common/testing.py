@@ -0,0 +1,44 @@
+"""
+Test data shared by the apps' test suites; only tests import this module.
+
+``QuestionTestData`` creates the user, category, difficulty and question most
+tests submit to, once per test class; subclasses extend ``setUpTestData`` for
+anything else they need. Tests that must control every row use ``make_user``
+and ``make_question`` directly.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from categories.models import Category
+from questions.models import Difficulty, Question
+
+
+def make_user(username, **fields):
+    return get_user_model().objects.create_user(
+        username=username, email=f'{username}@test.com', password='x', **fields,
+    )
+
+
+def make_question(slug, **fields):
+    """A question titled and keyed by ``slug``; ``fields`` must name its category, difficulty and author."""
+    return Question.objects.create(**{
+        'title': slug, 'slug': slug, 'description': '', 'problem_statement': '', **fields,
+    })
+
+
+class QuestionTestData(TestCase):
+    username = 'solver'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user(cls.username)
+        cls.category = Category.objects.create(name='Math', slug='math')
+        cls.difficulty = Difficulty.objects.create(name='Easy', level=1)
+        cls.question = cls.make_question('sum')
+
+    @classmethod
+    def make_question(cls, slug, **fields):
+        """A question in the class's category and difficulty, by its user, unless ``fields`` say otherwise."""
+        return make_question(slug, **{
+            'category': cls.category, 'difficulty': cls.difficulty, 'created_by': cls.user, **fields,
+        })
@@ -1,3 +1,65 @@
+import zlib
+
 from django.test import TestCase
 
-# Create your tests here.
+from common.compression import (
+    MAGIC, DictionaryStore, compress, decompress, dictionary_id, get_dictionary_store, train_dictionary,
+)
+
+SOLUTION = """import sys
+from collections import defaultdict
+
+
+def main():
+    n = int(sys.stdin.readline())
+    values = list(map(int, sys.stdin.readline().split()))
+    print(sum(values[:n]))
+
+
+if __name__ == '__main__':
+    main()
+"""
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        get_dictionary_store.cache_clear()
+        self.addCleanup(get_dictionary_store.cache_clear)
+
+    def test_round_trip(self):
+        for text in ['', 'short', SOLUTION * 20, 'ünïcödé ' * 50]:
+            stored = compress(text)
+            self.assertTrue(stored.startswith(MAGIC))
+            self.assertEqual(decompress(stored), text)
+        self.assertLess(len(compress(SOLUTION * 20)), len(SOLUTION))
+
+    def test_legacy_values_pass_through(self):
+        self.assertEqual(decompress('plain text'), 'plain text')
+        self.assertEqual(decompress(memoryview('bytes from bytea'.encode())), 'bytes from bytea')
+
+    def test_trained_dictionary_beats_plain_zlib(self):
+        corpus = [SOLUTION.replace('sum', name) for name in ('min', 'max', 'len', 'sorted', 'set')]
+        digest = get_dictionary_store().save('code', train_dictionary(corpus))
+
+        stored = compress(SOLUTION, dictionary='code')
+        self.assertEqual(dictionary_id(stored), digest[:8])
+        self.assertEqual(decompress(stored), SOLUTION)
+        self.assertLess(len(stored), len(zlib.compress(SOLUTION.encode(), 6)) / 2)
+
+    def test_unknown_dictionary_field_falls_back_to_zlib(self):
+        stored = compress(SOLUTION, dictionary='missing')
+        self.assertIsNone(dictionary_id(stored))
+        self.assertEqual(decompress(stored), SOLUTION)
+
+    def test_dictionaries_are_read_back_from_the_database(self):
+        corpus = [SOLUTION.replace('sum', name) for name in ('min', 'max', 'len')]
+        digest = get_dictionary_store().save('code', train_dictionary(corpus))
+        stored = compress(SOLUTION, dictionary='code')
+
+        store = DictionaryStore(ttl=60)
+        self.assertEqual(store.active('code')[0], digest)
+        self.assertIsNone(store.active('missing'))
+        get_dictionary_store.cache_clear()
+        self.assertEqual(decompress(stored), SOLUTION)
+        with self.assertRaises(LookupError):
+            store.get('00000000')
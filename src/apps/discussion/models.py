@@ -1,7 +1,7 @@
 
 from django.db import models
 from django.contrib.auth import get_user_model
-from apps.common.models import TimestampedModel
+from common.models import TimestampedModel
 
 User = get_user_model()
 
@@ -0,0 +1,5 @@
+from django.contrib import admin
+from .models import JudgeJob, RejudgeRun
+
+admin.site.register(JudgeJob)
+admin.site.register(RejudgeRun)
@@ -0,0 +1,138 @@
+"""
+Disk-backed LRU cache of compiled artifacts.
+
+Entries are keyed by (language, code hash, compile command, toolchain version)
+and shared by every judge worker on the box: writers publish an entry with an
+atomic rename, and eviction plus the hit/miss counters are serialised with an
+``flock`` on a lock file in the cache root. Recency is the entry directory's
+mtime, refreshed on every hit.
+
+Like the rest of the worker side this module has no Django imports.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+COUNTERS = ('hits', 'misses', 'stores', 'evictions')
+
+
+def artifact_key(language, code, toolchain):
+    digest = hashlib.sha256()
+    for part in (language.key, '\0'.join(language.compile), toolchain, code):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, root, max_bytes):
+        self.root = os.fspath(root)
+        self.max_bytes = max_bytes
+        self.entries = os.path.join(self.root, 'entries')
+        os.makedirs(self.entries, exist_ok=True)
+
+    def fetch(self, key, workdir):
+        """Copy a cached entry into ``workdir``; returns False on a miss."""
+        entry = os.path.join(self.entries, key)
+        try:
+            names = os.listdir(entry)
+            for name in names:
+                # Copies, not hard links: the program may rewrite its own files.
+                shutil.copy2(os.path.join(entry, name), os.path.join(workdir, name))
+            os.utime(entry)
+        except FileNotFoundError:
+            # Missing, or evicted while we were copying.
+            self._count(misses=1)
+            return False
+        self._count(hits=1)
+        return True
+
+    def store(self, key, paths):
+        """Publish the compiled files at ``paths`` under ``key`` and enforce the size cap."""
+        staging = tempfile.mkdtemp(dir=self.root, prefix='staging-')
+        try:
+            for path in paths:
+                shutil.copy2(path, os.path.join(staging, os.path.basename(path)))
+            os.rename(staging, os.path.join(self.entries, key))
+        except OSError:
+            # Another worker published the same key first.
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        with self._locked():
+            evicted = self._evict()
+            self._update_counters(stores=1, evictions=evicted)
+
+    def stats(self):
+        with self._locked():
+            counters = self._read_counters()
+        lookups = counters['hits'] + counters['misses']
+        sizes = [_entry_size(os.path.join(self.entries, key)) for key in os.listdir(self.entries)]
+        return {
+            **counters,
+            'hit_rate': counters['hits'] / lookups if lookups else 0.0,
+            'entries': len(sizes),
+            'bytes': sum(sizes),
+            'max_bytes': self.max_bytes,
+        }
+
+    def _evict(self):
+        entries = []
+        for key in os.listdir(self.entries):
+            path = os.path.join(self.entries, key)
+            try:
+                entries.append((os.stat(path).st_mtime, _entry_size(path), path))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def _count(self, **counts):
+        with self._locked():
+            self._update_counters(**counts)
+
+    def _update_counters(self, **counts):
+        counters = self._read_counters()
+        for name, value in counts.items():
+            counters[name] += value
+        counters['updated_at'] = time.time()
+        path = os.path.join(self.root, 'stats.json')
+        with open(path + '.tmp', 'w') as stats:
+            json.dump(counters, stats)
+        os.replace(path + '.tmp', path)
+
+    def _read_counters(self):
+        counters = dict.fromkeys(COUNTERS, 0)
+        try:
+            with open(os.path.join(self.root, 'stats.json')) as stats:
+                counters.update(json.load(stats))
+        except (FileNotFoundError, ValueError):
+            pass
+        return counters
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.root, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _entry_size(path):
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(path))
+    except FileNotFoundError:
+        return 0
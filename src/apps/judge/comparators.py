@@ -0,0 +1,183 @@
+"""
+Streaming output comparators.
+
+A comparator is fed the program's stdout chunk by chunk as it is produced and
+pulls the expected output from a file-like ``source`` in fixed-size chunks, so
+memory stays bounded no matter how large either side is. ``feed`` returns False
+as soon as the outputs are known to differ, which lets the sandbox kill a
+wrong-answer run early.
+
+Modes:
+
+``exact``
+    Byte-for-byte, except that trailing whitespace at the end of the output is
+    ignored.
+``whitespace``
+    The outputs must contain the same whitespace-separated tokens.
+``float``
+    Like ``whitespace``, but tokens that both parse as numbers match when they
+    are within ``tolerance`` (absolute or relative) of each other.
+"""
+import math
+from collections import deque
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = b' \t\r\n\f\v'
+
+MODES = ('exact', 'whitespace', 'float')
+
+
+def make_comparator(mode, source, tolerance=1e-6):
+    if mode == 'exact':
+        return ByteStreamComparator(source, TrimTrailingWhitespace)
+    if mode == 'whitespace':
+        return ByteStreamComparator(source, CollapseWhitespace)
+    if mode == 'float':
+        return FloatComparator(source, tolerance)
+    raise ValueError(f"Unknown comparison mode: {mode}")
+
+
+class TrimTrailingWhitespace:
+    """Pass bytes through, holding back whitespace until more output follows it."""
+
+    def __init__(self):
+        self.pending = b''
+
+    def __call__(self, chunk):
+        stripped = chunk.rstrip(WHITESPACE)
+        if not stripped:
+            self.pending += chunk
+            return b''
+        out = self.pending + stripped
+        self.pending = chunk[len(stripped):]
+        return out
+
+
+class CollapseWhitespace:
+    """Rewrite a stream as its tokens joined by single spaces."""
+
+    def __init__(self):
+        self.started = False
+        self.gap = False
+
+    def __call__(self, chunk):
+        if not chunk:
+            return b''
+        out = bytearray()
+        for index, token in enumerate(chunk.split()):
+            separated = index > 0 or self.gap or chunk[0] in WHITESPACE
+            if separated and self.started:
+                out += b' '
+            out += token
+            self.started = True
+        self.gap = chunk[-1] in WHITESPACE
+        return bytes(out)
+
+
+class _ExpectedStream:
+    def __init__(self, source, transform):
+        self.source = source
+        self.transform = transform
+        self.buffer = b''
+        self.eof = False
+
+    def take(self, size):
+        """Return the next ``size`` transformed bytes, or fewer at end of stream."""
+        while len(self.buffer) < size and not self.eof:
+            chunk = self.source.read(CHUNK_SIZE)
+            if chunk:
+                self.buffer += self.transform(chunk)
+            else:
+                self.eof = True
+        taken, self.buffer = self.buffer[:size], self.buffer[size:]
+        return taken
+
+
+class ByteStreamComparator:
+    def __init__(self, source, transform):
+        self.expected = _ExpectedStream(source, transform())
+        self.actual = transform()
+        self.matching = True
+
+    def feed(self, chunk):
+        if self.matching:
+            data = self.actual(chunk)
+            if data:
+                self.matching = self.expected.take(len(data)) == data
+        return self.matching
+
+    def finish(self):
+        if self.matching:
+            self.matching = self.expected.take(1) == b''
+        return self.matching
+
+
+class _Tokenizer:
+    """Split a stream into whitespace-separated tokens across chunk boundaries."""
+
+    def __init__(self):
+        self.partial = b''
+
+    def __call__(self, chunk):
+        data = self.partial + chunk
+        tokens = data.split()
+        if tokens and data[-1] not in WHITESPACE:
+            self.partial = tokens.pop()
+        else:
+            self.partial = b''
+        return tokens
+
+    def finish(self):
+        tokens = [self.partial] if self.partial else []
+        self.partial = b''
+        return tokens
+
+
+class FloatComparator:
+    def __init__(self, source, tolerance):
+        self.source = source
+        self.tolerance = tolerance
+        self.expected_tokens = _Tokenizer()
+        self.actual_tokens = _Tokenizer()
+        self.pending = deque()
+        self.eof = False
+        self.matching = True
+
+    def feed(self, chunk):
+        if self.matching:
+            self._compare(self.actual_tokens(chunk))
+        return self.matching
+
+    def finish(self):
+        if self.matching:
+            self._compare(self.actual_tokens.finish())
+        if self.matching:
+            self.matching = self._next_expected() is None
+        return self.matching
+
+    def _compare(self, tokens):
+        for token in tokens:
+            if not self._same(token, self._next_expected()):
+                self.matching = False
+                return
+
+    def _next_expected(self):
+        while not self.pending and not self.eof:
+            chunk = self.source.read(CHUNK_SIZE)
+            if chunk:
+                self.pending.extend(self.expected_tokens(chunk))
+            else:
+                self.eof = True
+                self.pending.extend(self.expected_tokens.finish())
+        return self.pending.popleft() if self.pending else None
+
+    def _same(self, actual, expected):
+        if expected is None:
+            return False
+        if actual == expected:
+            return True
+        try:
+            actual_value, expected_value = float(actual), float(expected)
+        except ValueError:
+            return False
+        return math.isclose(actual_value, expected_value, rel_tol=self.tolerance, abs_tol=self.tolerance)
@@ -0,0 +1,413 @@
+"""
+Judge engine: leases jobs from the judge queue, fans them out to a process
+pool and writes the verdicts back.
+
+Only this module talks to the database. Worker processes receive plain-dict
+payloads (see ``runner.judge_submission``) so they never share a connection
+with the parent.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from queue import Empty
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from leaderboard.fastest import record_accepted
+from progress.services import apply_verdicts
+from questions.counters import get_counters
+from questions.models import TestCase
+from submissions.models import Submission, SubmissionResult
+from submissions.packing import pack_results, unpack_results
+
+from . import queue, rejudge
+from .models import JudgeJob
+from .runner import init_worker, judge_submission
+
+logger = logging.getLogger(__name__)
+
+VERDICT_FIELDS = [
+    'status', 'execution_time', 'memory_used', 'passed_test_cases', 'total_test_cases',
+    'points_earned', 'error_message', 'test_case_version', 'packed_results', 'updated_at',
+]
+# A submission in these states has no verdict counted on its question yet.
+UNJUDGED_STATUSES = ('pending', 'running')
+# Recent judged submissions whose packed timings estimate test case costs.
+COST_SAMPLE = 200
+
+
+class JudgeEngine:
+    def __init__(self, workers=None, poll_interval=None):
+        self.case_concurrency = settings.JUDGE_CASE_CONCURRENCY
+        # Every worker runs its cases in parallel, so split the CPUs rather than multiply them.
+        self.workers = workers or settings.JUDGE_WORKERS or max(1, (os.cpu_count() or 1) // self.case_concurrency)
+        self.poll_interval = poll_interval if poll_interval is not None else settings.JUDGE_POLL_INTERVAL
+        self.judged = 0
+        self._case_costs = {}
+        self._progress = multiprocessing.Queue()
+
+    def run(self, once=False):
+        """
+        Judge queued jobs until interrupted.
+
+        With ``once`` the engine drains the current backlog and returns. The
+        pool is kept saturated with up to two payloads per worker so a worker
+        never waits on a database round-trip between submissions, and leases
+        of in-flight jobs are renewed well before they expire. Cases that
+        workers report finished are counted onto their jobs as they arrive,
+        for live progress, and question submission counters are flushed
+        every ``QUESTION_COUNTER_FLUSH_INTERVAL`` seconds, busy or idle, and
+        once more when the engine stops.
+        """
+        in_flight = {}
+        renew_every = settings.JUDGE_LEASE_SECONDS / 3
+        renewed_at = maintained_at = time.monotonic()
+        self.maintain()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=init_worker, initargs=(self._progress,),
+            ) as pool:
+                while True:
+                    if time.monotonic() - maintained_at > settings.JUDGE_MAINTENANCE_INTERVAL:
+                        self.maintain()
+                        maintained_at = time.monotonic()
+
+                    capacity = self.workers * 2 - len(in_flight)
+                    settled = 0
+                    if capacity > 0:
+                        batch, settled = self.claim(capacity)
+                        for job, payload in batch:
+                            in_flight[pool.submit(judge_submission, payload)] = job
+
+                    if not in_flight:
+                        if settled or self.maintain():
+                            continue
+                        if once:
+                            return self.judged
+                        get_counters().maybe_flush()
+                        time.sleep(self.poll_interval)
+                        continue
+
+                    if time.monotonic() - renewed_at > renew_every:
+                        queue.renew({job.lease_token for job in in_flight.values()})
+                        renewed_at = time.monotonic()
+
+                    done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    self.record_progress(in_flight.values())
+                    outcomes = []
+                    for future in done:
+                        job = in_flight.pop(future)
+                        try:
+                            verdict = future.result()
+                        except Exception:
+                            logger.exception("Judging submission %s failed", job.submission_id)
+                            verdict = _internal_error(job.submission)
+                        outcomes.append((job, verdict))
+                    self.record_many(outcomes)
+        finally:
+            # Whatever the exit, counts still buffered would otherwise be lost.
+            get_counters().flush()
+
+    def maintain(self):
+        """
+        Queue orphaned submissions, advance rejudge runs, fail jobs out of
+        attempts and prune finished ones; True if work was queued.
+        """
+        orphans = queue.enqueue_orphans()
+        exhausted = queue.claim_exhausted()
+        for job in exhausted:
+            logger.error("Job %s lapsed %s times; giving up on submission %s", job.pk, job.attempts, job.submission_id)
+        self.record_many([(job, _internal_error(job.submission)) for job in exhausted])
+        queue.prune()
+        return rejudge.advance(settings.JUDGE_REJUDGE_CHUNK_SIZE) or bool(orphans)
+
+    def claim(self, limit):
+        """
+        Lease up to ``limit`` jobs and mark their submissions running.
+
+        Submissions whose verdict can be reused from an identical earlier
+        submission are settled on the spot. Returns the ``(job, payload)``
+        pairs that still need judging and the number settled.
+        """
+        jobs = queue.claim(limit)
+        if not jobs:
+            return [], 0
+        Submission.objects.filter(pk__in=[job.submission_id for job in jobs]).update(status='running')
+
+        # Sample runs judge a subset of the cases, so they neither donate nor reuse verdicts.
+        donors = self.find_donors([job.submission for job in jobs if not job.submission.is_run])
+        self.record_many([
+            (job, self.reuse_verdict(job.submission, donors[job.submission_id]))
+            for job in jobs if job.submission_id in donors
+        ])
+        jobs = [job for job in jobs if job.submission_id not in donors]
+
+        cases = defaultdict(list)
+        for case in TestCase.objects.filter(question_id__in={job.submission.question_id for job in jobs}):
+            cases[case.question_id].append(case)
+        batch = []
+        for job in jobs:
+            test_cases = cases[job.submission.question_id]
+            if job.submission.is_run:
+                test_cases = [case for case in test_cases if case.is_sample]
+            batch.append((job, self.build_payload(job.submission, test_cases, full=not job.submission.is_run)))
+            job.cases_done, job.cases_total = 0, len(test_cases)
+        JudgeJob.objects.bulk_update(jobs, ['cases_done', 'cases_total'])
+        return batch, len(donors)
+
+    def record_progress(self, jobs):
+        """Add the cases workers have reported finished to their jobs, in one query."""
+        finished = Counter()
+        while True:
+            try:
+                submission_id, _ = self._progress.get_nowait()
+            except Empty:
+                break
+            finished[submission_id] += 1
+        changed = []
+        for job in jobs:
+            if finished[job.submission_id]:
+                job.cases_done += finished[job.submission_id]
+                changed.append(job)
+        if changed:
+            JudgeJob.objects.bulk_update(changed, ['cases_done'])
+
+    def find_donors(self, submissions):
+        """
+        Map submission id to an earlier submission with the same question,
+        language and code fingerprint judged against the current test case
+        set. Changing a question's test cases bumps its version, which
+        invalidates every earlier verdict automatically.
+        """
+        wanted = {
+            (s.question_id, s.language, s.code_fingerprint, s.question.test_case_version): s.pk
+            for s in submissions if s.code_fingerprint
+        }
+        if not wanted:
+            return {}
+        candidates = (
+            Submission.objects.filter(
+                question_id__in={key[0] for key in wanted},
+                language__in={key[1] for key in wanted},
+                code_fingerprint__in={key[2] for key in wanted},
+                test_case_version__in={key[3] for key in wanted},
+                is_run=False,
+            )
+            .exclude(pk__in=[s.pk for s in submissions])
+            .order_by('-id')
+        )
+        donors = {}
+        for candidate in candidates:
+            key = (candidate.question_id, candidate.language, candidate.code_fingerprint, candidate.test_case_version)
+            if key in wanted:
+                donors.setdefault(wanted[key], candidate)
+        return donors
+
+    def reuse_verdict(self, submission, donor):
+        logger.info("Submission %s: reusing verdict of identical submission %s", submission.pk, donor.pk)
+        return {
+            'submission_id': submission.pk,
+            'status': donor.status,
+            'results': [
+                {
+                    'test_case_id': result.test_case_id,
+                    'status': result.status,
+                    'execution_time': result.execution_time,
+                    'wall_time': result.wall_time,
+                    'memory_used': result.memory_used,
+                    'output': result.output,
+                    'error_message': result.error_message,
+                }
+                for result in donor.case_results
+            ],
+            'passed_test_cases': donor.passed_test_cases,
+            'total_test_cases': donor.total_test_cases,
+            'execution_time': donor.execution_time,
+            'memory_used': donor.memory_used,
+            'error_message': donor.error_message,
+            'test_case_version': donor.test_case_version,
+        }
+
+    def build_payload(self, submission, test_cases, full=True):
+        question = submission.question
+        policy = question.judge_policy or settings.JUDGE_POLICY
+        if policy == 'first_failure':
+            test_cases = self.order_by_cost(question.pk, test_cases)
+        return {
+            'submission_id': submission.pk,
+            # Only a full judge is a reusable verdict for this test case set.
+            'test_case_version': question.test_case_version if full else None,
+            'language': submission.language,
+            'policy': policy,
+            'comparison': question.output_comparison,
+            'float_tolerance': settings.JUDGE_FLOAT_TOLERANCE,
+            'code': submission.code,
+            'time_limit': question.time_limit,
+            'memory_limit': question.memory_limit,
+            'compile_time_limit': settings.JUDGE_COMPILE_TIME_LIMIT,
+            'artifact_cache': artifact_cache_config(),
+            'output_limit': settings.JUDGE_OUTPUT_LIMIT,
+            'stored_output_chars': settings.JUDGE_STORED_OUTPUT_CHARS,
+            'case_concurrency': self.case_concurrency,
+            'warm_pool': settings.JUDGE_PYTHON_WARM_POOL,
+            'cases': [case_payload(case) for case in test_cases],
+        }
+
+    def order_by_cost(self, question_id, test_cases):
+        """
+        Order test cases cheapest first so failing submissions are rejected early.
+
+        Cost is each case's mean CPU time over the packed results of the last
+        ``COST_SAMPLE`` judged submissions, cached per question for
+        ``JUDGE_CASE_COST_TTL`` seconds. Cases with no history run last,
+        shortest input first.
+        """
+        cached = self._case_costs.get(question_id)
+        if cached is None or time.monotonic() - cached[0] > settings.JUDGE_CASE_COST_TTL:
+            recent = (
+                Submission.objects.filter(question_id=question_id, packed_results__isnull=False)
+                .order_by('-id')
+                .values_list('packed_results', flat=True)[:COST_SAMPLE]
+            )
+            totals, counts = defaultdict(float), defaultdict(int)
+            for packed in recent:
+                for result in unpack_results(packed):
+                    if result['execution_time'] is not None:
+                        totals[result['test_case_id']] += result['execution_time']
+                        counts[result['test_case_id']] += 1
+            costs = {case_id: totals[case_id] / counts[case_id] for case_id in totals}
+            cached = self._case_costs[question_id] = (time.monotonic(), costs)
+        costs = cached[1]
+        return sorted(
+            test_cases,
+            key=lambda case: (case.pk not in costs, costs.get(case.pk, 0), len(case.input_data), case.pk),
+        )
+
+    def record(self, job, verdict):
+        self.record_many([(job, verdict)])
+
+    def record_many(self, outcomes):
+        """
+        Persist ``(job, verdict)`` pairs in a fixed number of queries: one
+        delete and one bulk insert of failing results, one bulk update of
+        submissions and one progress upsert for the whole batch. Verdicts are
+        written only for jobs whose lease this engine still holds.
+        """
+        if not outcomes:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            owned = queue.complete_many(
+                [job for job, _ in outcomes],
+                failed={job.pk for job, verdict in outcomes if verdict.get('internal_error')},
+                now=now,
+            )
+            for job, _ in outcomes:
+                if job.pk not in owned:
+                    logger.warning("Lost the lease on job %s; dropping its verdict", job.pk)
+            outcomes = [(job, verdict) for job, verdict in outcomes if job.pk in owned]
+            if not outcomes:
+                return
+
+            # Rejudges replace the previous result set wholesale. Every case is
+            # packed onto the submission; rows are only kept for failures.
+            keep_all = settings.JUDGE_KEEP_ALL_RESULTS
+            SubmissionResult.objects.filter(submission_id__in=[job.submission_id for job, _ in outcomes]).delete()
+            SubmissionResult.objects.bulk_create([
+                SubmissionResult(
+                    submission_id=job.submission_id,
+                    test_case_id=result['test_case_id'],
+                    status=result['status'],
+                    execution_time=result['execution_time'],
+                    wall_time=result['wall_time'],
+                    memory_used=result['memory_used'],
+                    output=result['output'],
+                    error_message=result['error_message'],
+                )
+                for job, verdict in outcomes
+                for result in verdict['results']
+                if keep_all or result['status'] != 'accepted'
+            ], batch_size=1000)
+
+            submissions, counted = [], []
+            for job, verdict in outcomes:
+                submission = job.submission
+                if not submission.is_run:
+                    counted.append((submission, submission.status))
+                submission.status = verdict['status']
+                submission.execution_time = verdict['execution_time']
+                submission.memory_used = verdict['memory_used']
+                submission.passed_test_cases = verdict['passed_test_cases']
+                submission.total_test_cases = verdict['total_test_cases']
+                submission.points_earned = (
+                    submission.question.difficulty.points
+                    if verdict['status'] == 'accepted' and not submission.is_run else 0
+                )
+                submission.error_message = verdict['error_message']
+                submission.test_case_version = verdict.get('test_case_version')
+                submission.packed_results = pack_results(verdict['results'])
+                submission.updated_at = now
+                submissions.append(submission)
+            Submission.objects.bulk_update(submissions, VERDICT_FIELDS, batch_size=500)
+            apply_verdicts([(submission, old in UNJUDGED_STATUSES) for submission, old in counted])
+            record_accepted([submission for submission, _ in counted])
+
+        self.count_verdicts(counted)
+        self.judged += len(outcomes)
+        for job, verdict in outcomes:
+            logger.info("Submission %s: %s", job.submission_id, verdict['status'])
+
+    def count_verdicts(self, changes):
+        """
+        Add ``(submission, old_status)`` changes to the question counters. A
+        first verdict counts as a submission; a rejudge only moves it in or
+        out of the successful ones.
+        """
+        counters = get_counters()
+        for submission, old in changes:
+            counters.add(
+                submission.question_id,
+                total=int(old in UNJUDGED_STATUSES),
+                successful=int(submission.status == 'accepted') - int(old == 'accepted'),
+            )
+        counters.maybe_flush()
+
+
+def artifact_cache_config():
+    """(root, max_bytes) for workers to open the shared artifact cache, or None."""
+    if not settings.JUDGE_ARTIFACT_CACHE_ROOT:
+        return None
+    return (os.fspath(settings.JUDGE_ARTIFACT_CACHE_ROOT), settings.JUDGE_ARTIFACT_CACHE_MAX_BYTES)
+
+
+def case_payload(case):
+    """Describe one test case; blob-backed data is passed by path, not by value."""
+    payload = {'id': case.pk}
+    if case.input_blob:
+        payload['input_path'] = case.input_path
+    else:
+        payload['input'] = case.input_data
+    if case.expected_output_blob:
+        payload['expected_path'] = case.expected_output_path
+    else:
+        payload['expected'] = case.expected_output
+    return payload
+
+
+def _internal_error(submission):
+    return {
+        'submission_id': submission.pk,
+        'status': 'runtime_error',
+        'results': [],
+        'passed_test_cases': 0,
+        'total_test_cases': 0,
+        'execution_time': None,
+        'memory_used': None,
+        'error_message': 'Internal judge error',
+        'internal_error': True,
+    }
@@ -0,0 +1,110 @@
+"""
+Compile and run commands for every language in ``Submission.LANGUAGE_CHOICES``.
+
+Commands are templates; ``{src}``, ``{exe}``, ``{dir}`` and ``{memory_mb}`` are
+filled in by the runner for each submission. ``artifacts`` are glob patterns,
+relative to the work directory, for the files a compile produces; they are
+what the artifact cache stores.
+"""
+import glob
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Language:
+    key: str
+    source_name: str
+    run: tuple
+    compile: tuple = ()
+    version: tuple = ()
+    artifacts: tuple = ('main',)
+    # Runtimes that reserve large virtual address ranges up front (JVM, V8, Go)
+    # cannot run under RLIMIT_AS, so their heap is capped with flags instead.
+    limit_address_space: bool = True
+    # Run cases in processes forked from a pre-initialised interpreter (see ``warmpool``).
+    warm_pool: bool = False
+
+    @property
+    def is_compiled(self):
+        return bool(self.compile)
+
+    def artifact_paths(self, workdir):
+        return sorted(
+            path for pattern in self.artifacts
+            for path in glob.glob(os.path.join(workdir, pattern))
+        )
+
+
+LANGUAGES = {
+    'python': Language(
+        key='python',
+        source_name='main.py',
+        run=(sys.executable, '-I', '{src}'),
+        warm_pool=True,
+    ),
+    'c': Language(
+        key='c',
+        source_name='main.c',
+        compile=('gcc', '-O2', '-std=c11', '-o', '{exe}', '{src}', '-lm'),
+        version=('gcc', '--version'),
+        run=('{exe}',),
+    ),
+    'cpp': Language(
+        key='cpp',
+        source_name='main.cpp',
+        compile=('g++', '-O2', '-std=c++17', '-o', '{exe}', '{src}'),
+        version=('g++', '--version'),
+        run=('{exe}',),
+    ),
+    'java': Language(
+        key='java',
+        source_name='Main.java',
+        compile=('javac', '-d', '{dir}', '{src}'),
+        version=('javac', '-version'),
+        artifacts=('*.class',),
+        run=('java', '-Xmx{memory_mb}m', '-Xss64m', '-cp', '{dir}', 'Main'),
+        limit_address_space=False,
+    ),
+    'javascript': Language(
+        key='javascript',
+        source_name='main.js',
+        run=('node', '--max-old-space-size={memory_mb}', '{src}'),
+        limit_address_space=False,
+    ),
+    'go': Language(
+        key='go',
+        source_name='main.go',
+        compile=('go', 'build', '-o', '{exe}', '{src}'),
+        version=('go', 'version'),
+        run=('{exe}',),
+        limit_address_space=False,
+    ),
+    'rust': Language(
+        key='rust',
+        source_name='main.rs',
+        compile=('rustc', '-O', '--edition=2021', '-o', '{exe}', '{src}'),
+        version=('rustc', '--version'),
+        run=('{exe}',),
+    ),
+}
+
+
+def format_command(template, **values):
+    return [part.format(**values) for part in template]
+
+
+@lru_cache(maxsize=None)
+def toolchain_version(language):
+    """The compiler's version banner, so an upgraded toolchain misses the artifact cache."""
+    if not language.version:
+        return ''
+    try:
+        completed = subprocess.run(language.version, capture_output=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return ''
+    banner = (completed.stdout or completed.stderr).decode('utf-8', 'replace')
+    return banner.strip().splitlines()[0] if banner.strip() else ''
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from judge.engine import JudgeEngine
+
+
+class Command(BaseCommand):
+    help = "Judge queued submissions in a pool of sandboxed worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int,
+            help="Worker processes (default: JUDGE_WORKERS, or the CPUs divided by JUDGE_CASE_CONCURRENCY)",
+        )
+        parser.add_argument('--poll-interval', type=float, help="Seconds to wait when there is nothing to judge")
+        parser.add_argument('--once', action='store_true', help="Judge the current backlog and exit")
+
+    def handle(self, *args, **options):
+        engine = JudgeEngine(workers=options['workers'], poll_interval=options['poll_interval'])
+        self.stdout.write(f"Judging with {engine.workers} worker processes...")
+        try:
+            judged = engine.run(once=options['once'])
+        except KeyboardInterrupt:
+            judged = engine.judged
+        self.stdout.write(self.style.SUCCESS(f"Judged {judged} submissions"))
@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from judge.artifacts import ArtifactCache
+from judge.engine import artifact_cache_config
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters and size of the compiled-artifact cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Print one JSON object, for metrics scrapers")
+
+    def handle(self, *args, **options):
+        config = artifact_cache_config()
+        if config is None:
+            raise CommandError("JUDGE_ARTIFACT_CACHE_ROOT is not set")
+        stats = ArtifactCache(*config).stats()
+        if options['json']:
+            self.stdout.write(json.dumps(stats))
+            return
+        for name, value in stats.items():
+            self.stdout.write(f"{name}: {value}")
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from judge import rejudge
+from judge.models import RejudgeRun
+from questions.models import Question
+
+
+class Command(BaseCommand):
+    help = "Rejudge every submission to a question, resumably and in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('question_id', nargs='?', type=int, help="Start a new rejudge of this question")
+        parser.add_argument('--resume', type=int, metavar='RUN_ID', help="Continue queueing an interrupted run")
+        parser.add_argument('--status', type=int, metavar='RUN_ID', help="Show the progress of a run")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--wait', action='store_true',
+                            help="Wait for judge workers to finish, then rebuild user progress")
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.report(self.get_run(options['status']))
+            return
+
+        if options['resume']:
+            run = self.get_run(options['resume'])
+        elif options['question_id']:
+            try:
+                question = Question.objects.get(pk=options['question_id'])
+            except Question.DoesNotExist:
+                raise CommandError(f"Question {options['question_id']} does not exist")
+            run = rejudge.start_rejudge(question)
+            self.stdout.write(f"Started rejudge run {run.pk} for {run.total} submissions of '{question}'")
+        else:
+            raise CommandError("Give a question id, --resume RUN_ID or --status RUN_ID")
+
+        if run.status == 'enqueueing':
+            for run in rejudge.enqueue_chunks(run, chunk_size=options['chunk_size']):
+                self.stdout.write(f"Queued {run.enqueued}/{run.total} ({_percent(run.enqueued, run.total)})")
+
+        if not options['wait']:
+            self.stdout.write(
+                f"Judge workers will pick the jobs up; check with 'rejudge --status {run.pk}'. "
+                "User progress is rebuilt automatically when the run finishes."
+            )
+            return
+
+        while not rejudge.finalize(run):
+            self.report(run)
+            time.sleep(5)
+        self.stdout.write(self.style.SUCCESS(f"Rejudge run {run.pk} finished; user progress rebuilt"))
+
+    def get_run(self, run_id):
+        try:
+            return RejudgeRun.objects.get(pk=run_id)
+        except RejudgeRun.DoesNotExist:
+            raise CommandError(f"Rejudge run {run_id} does not exist")
+
+    def report(self, run):
+        counts = rejudge.progress(run)
+        finished = counts.get('done', 0) + counts.get('failed', 0)
+        self.stdout.write(
+            f"Run {run.pk} [{run.status}]: judged {finished}/{run.total} ({_percent(finished, run.total)}), "
+            f"queued {counts.get('queued', 0)}, in progress {counts.get('leased', 0)}, "
+            f"failed {counts.get('failed', 0)}, not yet queued {counts['unqueued']}"
+        )
+
+
+def _percent(part, whole):
+    return f"{part / whole:.1%}" if whole else "100.0%"
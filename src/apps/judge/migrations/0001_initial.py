@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('submissions', '0003_submission_is_run'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JudgeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('run', 'Run against samples'), ('submit', 'Submit'), ('rejudge', 'Rejudge')], default='submit', max_length=10)),
+                ('priority', models.IntegerField(default=100)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('leased', 'Leased'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('round', models.BigIntegerField(default=0)),
+                ('lease_token', models.CharField(blank=True, max_length=32)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judge_jobs', to='submissions.submission')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judge_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', '-priority', 'round', 'created_at'], name='judgejob_claim_idx'), models.Index(fields=['user', 'priority', 'round'], name='judgejob_user_round_idx'), models.Index(fields=['priority', 'round'], name='judgejob_tier_round_idx'), models.Index(fields=['status', 'finished_at'], name='judgejob_finished_idx'), models.Index(fields=['status', 'lease_expires_at'], name='judgejob_lease_idx'), models.Index(fields=['lease_token'], name='judgejob_token_idx')],
+            },
+        ),
+    ]
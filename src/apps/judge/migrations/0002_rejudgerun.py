@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0001_initial'),
+        ('questions', '0005_question_test_case_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RejudgeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('enqueueing', 'Enqueueing'), ('judging', 'Judging'), ('done', 'Done')], default='enqueueing', max_length=20)),
+                ('upto_submission_id', models.BigIntegerField(default=0)),
+                ('last_enqueued_id', models.BigIntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('enqueued', models.IntegerField(default=0)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rejudge_runs', to='questions.question')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='judgejob',
+            name='rejudge',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='judge.rejudgerun'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0002_rejudgerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='judgejob',
+            name='cases_done',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='judgejob',
+            name='cases_total',
+            field=models.IntegerField(default=0),
+        ),
+    ]
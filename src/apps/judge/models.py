@@ -0,0 +1,78 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from common.models import TimestampedModel
+
+User = get_user_model()
+
+
+class JudgeJob(TimestampedModel):
+    """A unit of judge work, claimed by workers through a time-limited lease"""
+    KIND_CHOICES = [
+        ('run', 'Run against samples'),
+        ('submit', 'Submit'),
+        ('rejudge', 'Rejudge'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('leased', 'Leased'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    # Higher runs first: interactive sample runs, then submits, then rejudges.
+    KIND_PRIORITY = {'run': 200, 'submit': 100, 'rejudge': 0}
+
+    submission = models.ForeignKey('submissions.Submission', on_delete=models.CASCADE, related_name='judge_jobs')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='judge_jobs')  # for per-user fairness
+    rejudge = models.ForeignKey('RejudgeRun', on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='submit')
+    priority = models.IntegerField(default=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    round = models.BigIntegerField(default=0)  # per-user fairness; see judge.queue
+
+    # Lease
+    lease_token = models.CharField(max_length=32, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Live progress for streaming clients, written in batches by the engine.
+    cases_done = models.IntegerField(default=0)
+    cases_total = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'round', 'created_at'], name='judgejob_claim_idx'),
+            models.Index(fields=['user', 'priority', 'round'], name='judgejob_user_round_idx'),
+            models.Index(fields=['priority', 'round'], name='judgejob_tier_round_idx'),
+            models.Index(fields=['status', 'finished_at'], name='judgejob_finished_idx'),
+            models.Index(fields=['status', 'lease_expires_at'], name='judgejob_lease_idx'),
+            models.Index(fields=['lease_token'], name='judgejob_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job for submission {self.submission_id} - {self.status}"
+
+
+class RejudgeRun(TimestampedModel):
+    """A resumable rejudge of every submission to a question"""
+    STATUS_CHOICES = [
+        ('enqueueing', 'Enqueueing'),
+        ('judging', 'Judging'),
+        ('done', 'Done'),
+    ]
+
+    question = models.ForeignKey('questions.Question', on_delete=models.CASCADE, related_name='rejudge_runs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='enqueueing')
+
+    # Submissions up to this id existed when the run started; later ones were
+    # already judged against the new test cases.
+    upto_submission_id = models.BigIntegerField(default=0)
+    last_enqueued_id = models.BigIntegerField(default=0)  # checkpoint for resuming
+    total = models.IntegerField(default=0)
+    enqueued = models.IntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Rejudge of {self.question} - {self.status}"
@@ -0,0 +1,219 @@
+"""
+Database-backed judge queue.
+
+Producers create a Submission and call ``enqueue`` in the same transaction
+(pending submissions left without a job are swept up by the engine as plain
+submits); judge engines lease batches of jobs with
+``claim``. A claim is a single conditional UPDATE stamped with a fresh lease
+token, so concurrent engines never receive the same job and a batch costs a
+constant number of round-trips regardless of its size. Leases that are not
+renewed expire and the job is retried, up to ``JUDGE_MAX_ATTEMPTS``; after
+that the engine records an internal error for it (``claim_exhausted``).
+
+Ordering is by priority, then by round, then by age. A job's round is fixed
+when it is queued: one past the user's last job in the same priority tier,
+and never behind the tier's oldest queued round. Every user's next job
+is therefore handed out before anyone's one after it, so one user submitting
+in a loop cannot starve the rest, and a claim is an index range scan of
+``limit`` rows however long the queue is. Finished jobs are deleted after
+``JUDGE_JOB_RETENTION`` seconds (``prune``).
+"""
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from submissions.models import Submission
+
+from .models import JudgeJob
+
+User = get_user_model()
+
+ACTIVE_STATUSES = ('queued', 'leased')
+
+
+def enqueue(submission, kind='submit'):
+    if kind == 'run' and not submission.is_run:
+        submission.is_run = True
+        Submission.objects.filter(pk=submission.pk).update(is_run=True)
+    job = JudgeJob(
+        submission=submission,
+        user_id=submission.user_id,
+        kind=kind,
+        priority=JudgeJob.KIND_PRIORITY[kind],
+    )
+    assign_rounds([job])
+    job.save()
+    return job
+
+
+def enqueue_many(submissions, kind='submit', rejudge=None, batch_size=1000):
+    """Bulk-enqueue an iterable of submissions (or ``(id, user_id)`` pairs)."""
+    priority = JudgeJob.KIND_PRIORITY[kind]
+    jobs = []
+    for submission in submissions:
+        submission_id, user_id = (
+            (submission.pk, submission.user_id) if isinstance(submission, Submission) else submission
+        )
+        jobs.append(JudgeJob(
+            submission_id=submission_id, user_id=user_id, kind=kind, priority=priority, rejudge=rejudge,
+        ))
+    for start in range(0, len(jobs), batch_size):
+        assign_rounds(jobs[start:start + batch_size])
+    return len(JudgeJob.objects.bulk_create(jobs, batch_size=batch_size))
+
+
+def assign_rounds(jobs):
+    """
+    Set the round of new jobs, in order: one past the user's last job in the
+    tier, but not behind the tier's current round (its oldest queued round,
+    or the last round handed out when nothing is queued). Every lookup is an
+    index seek, two or three queries per tier per batch.
+    """
+    if not jobs:
+        return
+    users = {job.user_id for job in jobs}
+    current, last = {}, {}
+    for priority in {job.priority for job in jobs}:
+        tier = JudgeJob.objects.filter(priority=priority)
+        current[priority] = (
+            tier.filter(status='queued').order_by('round').values_list('round', flat=True).first()
+            or tier.order_by('-round').values_list('round', flat=True).first()
+            or 1
+        )
+        latest = tier.filter(user_id=OuterRef('pk')).order_by('-round').values('round')[:1]
+        for user_id, round_ in User.objects.filter(pk__in=users).annotate(last=Subquery(latest)).values_list(
+            'pk', 'last',
+        ):
+            if round_ is not None:
+                last[priority, user_id] = round_
+    for job in jobs:
+        key = (job.priority, job.user_id)
+        job.round = max(last[key] + 1 if key in last else 1, current[job.priority])
+        last[key] = job.round
+
+
+def enqueue_orphans():
+    """Queue pending submissions that were created without a job (e.g. via bulk_create)."""
+    orphans = (
+        Submission.objects.filter(status='pending')
+        .exclude(judge_jobs__status__in=ACTIVE_STATUSES)
+    )
+    return sum(
+        enqueue_many(orphans.filter(is_run=is_run).values_list('id', 'user_id').iterator(), kind=kind)
+        for is_run, kind in ((False, 'submit'), (True, 'run'))
+    )
+
+
+def claim(limit, lease_seconds=None):
+    """Lease up to ``limit`` queued jobs and return them with their submissions loaded."""
+    lease_seconds = lease_seconds or settings.JUDGE_LEASE_SECONDS
+    release_expired()
+
+    candidates = list(
+        JudgeJob.objects.filter(status='queued')
+        .order_by('-priority', 'round', 'created_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    if not candidates:
+        return []
+
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    JudgeJob.objects.filter(pk__in=candidates, status='queued').update(
+        status='leased',
+        lease_token=token,
+        lease_expires_at=now + timedelta(seconds=lease_seconds),
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    return list(
+        JudgeJob.objects.filter(lease_token=token, status='leased')
+        .select_related('submission', 'submission__question', 'submission__question__difficulty')
+        .order_by('-priority', 'round', 'created_at', 'id')
+    )
+
+
+def renew(tokens, lease_seconds=None):
+    """Extend the leases of jobs still being judged."""
+    lease_seconds = lease_seconds or settings.JUDGE_LEASE_SECONDS
+    return JudgeJob.objects.filter(lease_token__in=tokens, status='leased').update(
+        lease_expires_at=timezone.now() + timedelta(seconds=lease_seconds),
+    )
+
+
+def complete(job, status='done'):
+    """Mark a leased job finished; False if the lease was lost to another engine."""
+    failed = {job.pk} if status == 'failed' else set()
+    return job.pk in complete_many([job], failed=failed)
+
+
+def complete_many(jobs, failed=(), now=None):
+    """
+    Finish a batch of leased jobs and return the ids this engine still owned.
+
+    Each claim batch shares one lease token, so this is one UPDATE per
+    (token, status) plus one SELECT to learn which rows carry our stamp.
+    """
+    now = now or timezone.now()
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[job.lease_token, 'failed' if job.pk in failed else 'done'].append(job.pk)
+    for (token, status), ids in groups.items():
+        JudgeJob.objects.filter(pk__in=ids, lease_token=token, status='leased').update(
+            status=status, finished_at=now, updated_at=now,
+        )
+    return set(
+        JudgeJob.objects.filter(pk__in=[job.pk for job in jobs], finished_at=now)
+        .values_list('pk', flat=True)
+    )
+
+
+def release_expired():
+    """Requeue jobs whose lease lapsed; those out of attempts are left for ``claim_exhausted``."""
+    now = timezone.now()
+    return JudgeJob.objects.filter(
+        status='leased', lease_expires_at__lt=now, attempts__lt=settings.JUDGE_MAX_ATTEMPTS,
+    ).update(status='queued', lease_token='', lease_expires_at=None, updated_at=now)
+
+
+def claim_exhausted(limit=100, lease_seconds=None):
+    """
+    Lease jobs that lapsed on their last attempt, so the engine can record
+    an internal error for their submissions instead of leaving them running.
+    """
+    lease_seconds = lease_seconds or settings.JUDGE_LEASE_SECONDS
+    now = timezone.now()
+    exhausted = list(
+        JudgeJob.objects.filter(
+            status='leased', lease_expires_at__lt=now, attempts__gte=settings.JUDGE_MAX_ATTEMPTS,
+        ).values_list('id', flat=True)[:limit]
+    )
+    if not exhausted:
+        return []
+    token = uuid.uuid4().hex
+    JudgeJob.objects.filter(pk__in=exhausted, status='leased', lease_expires_at__lt=now).update(
+        lease_token=token, lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now,
+    )
+    return list(
+        JudgeJob.objects.filter(lease_token=token, status='leased')
+        .select_related('submission', 'submission__question', 'submission__question__difficulty')
+    )
+
+
+def prune(limit=1000):
+    """Delete up to ``limit`` jobs finished over ``JUDGE_JOB_RETENTION`` seconds ago; returns how many."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JUDGE_JOB_RETENTION)
+    finished = list(
+        JudgeJob.objects.filter(status__in=('done', 'failed'), finished_at__lt=cutoff)
+        # A rejudge still in progress counts its finished jobs.
+        .exclude(rejudge__status__in=('enqueueing', 'judging'))
+        .values_list('id', flat=True)[:limit]
+    )
+    if finished:
+        JudgeJob.objects.filter(pk__in=finished).delete()
+    return len(finished)
@@ -0,0 +1,110 @@
+"""
+Bulk rejudging of a question's submissions after its test cases change.
+
+A ``RejudgeRun`` moves through three phases, each safe to interrupt:
+
+1. *enqueueing* - submissions are streamed in id order and queued as
+   low-priority ``rejudge`` jobs one chunk per transaction, with the last id
+   checkpointed alongside, so a crashed run resumes where it stopped;
+2. *judging* - judge engines work the jobs behind live traffic and write
+   verdicts in batches;
+3. once no job is left, derived ``UserProgress`` rows and user totals are
+   rebuilt for the question in batches and the run is *done*.
+
+Judge engines call ``advance`` between batches, so a run started from the
+admin progresses without anyone babysitting it.
+"""
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from progress.services import rebuild_progress
+from submissions.models import Submission
+
+from . import queue
+from .models import RejudgeRun
+
+
+def start_rejudge(question):
+    submissions = Submission.objects.filter(question=question, is_run=False)
+    upto = submissions.aggregate(last=Max('id'))['last'] or 0
+    return RejudgeRun.objects.create(
+        question=question,
+        upto_submission_id=upto,
+        total=submissions.filter(id__lte=upto).count(),
+    )
+
+
+def enqueue_chunks(run, chunk_size=1000, max_chunks=None):
+    """
+    Queue the run's remaining submissions, yielding the run after each chunk.
+
+    Stops after ``max_chunks`` chunks if given; call again to continue.
+    """
+    remaining = (
+        Submission.objects.filter(
+            question_id=run.question_id,
+            id__gt=run.last_enqueued_id,
+            id__lte=run.upto_submission_id,
+            is_run=False,
+        )
+        .order_by('id')
+        .values_list('id', 'user_id')
+    )
+    chunk, chunks = [], 0
+    for row in remaining.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _enqueue_chunk(run, chunk)
+            chunks += 1
+            yield run
+            if max_chunks is not None and chunks >= max_chunks:
+                return
+    if chunk:
+        _enqueue_chunk(run, chunk)
+    run.status = 'judging'
+    run.save(update_fields=['status', 'updated_at'])
+    yield run
+
+
+def _enqueue_chunk(run, chunk):
+    with transaction.atomic():
+        queue.enqueue_many(chunk, kind='rejudge', rejudge=run)
+        run.last_enqueued_id = chunk[-1][0]
+        run.enqueued += len(chunk)
+        run.save(update_fields=['last_enqueued_id', 'enqueued', 'updated_at'])
+    chunk.clear()
+
+
+def progress(run):
+    """Job counts by status, plus how many submissions are still to be queued."""
+    counts = dict(run.jobs.values_list('status').annotate(count=Count('id')).order_by())
+    counts['unqueued'] = run.total - run.enqueued
+    return counts
+
+
+def finalize(run, batch_size=500):
+    """Rebuild derived progress once every job has finished; False if jobs remain."""
+    if run.status == 'enqueueing' or run.jobs.filter(status__in=queue.ACTIVE_STATUSES).exists():
+        return False
+    rebuild_progress(question_ids=[run.question_id], batch_size=batch_size)
+    run.status = 'done'
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return True
+
+
+def advance(chunk_size=1000):
+    """
+    Queue one more chunk of each enqueueing run and finalize finished ones.
+
+    Returns True if anything changed.
+    """
+    changed = False
+    for run in RejudgeRun.objects.exclude(status='done').order_by('id'):
+        if run.status == 'enqueueing':
+            for _ in enqueue_chunks(run, chunk_size=chunk_size, max_chunks=1):
+                changed = True
+        else:
+            changed = finalize(run) or changed
+    return changed
@@ -0,0 +1,252 @@
+"""
+Judge worker entry point.
+
+``judge_submission`` takes a plain-dict payload built by the engine, compiles
+and runs the code against its test cases in a scratch directory and returns a
+plain-dict verdict. Up to ``case_concurrency`` test cases run at once, each
+in its own sandboxed process, and results always come back in case order.
+Under the ``first_failure`` policy it stops at the first case that is not
+accepted, so only the cases up to it get results. Each case's CPU time and
+peak RSS come from the child's rusage; they decide time and memory limit
+verdicts, and the submission reports the maxima over its cases. It runs
+inside pool worker processes and must not touch Django or the database;
+progress goes back to the engine over the queue given to ``init_worker``.
+"""
+import io
+import math
+import mmap
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+from .artifacts import ArtifactCache, artifact_key
+from .comparators import make_comparator
+from .languages import LANGUAGES, format_command, toolchain_version
+from .sandbox import MB, run_process
+from .warmpool import get_warm_pool
+
+OUT_OF_MEMORY_MARKERS = (
+    'MemoryError',
+    'std::bad_alloc',
+    'OutOfMemoryError',
+    'JavaScript heap out of memory',
+    'memory allocation of',
+    'out of memory',
+)
+
+
+def judge_submission(payload):
+    """Judge one submission payload and return its verdict."""
+    language = LANGUAGES.get(payload['language'])
+    if language is None:
+        return _compile_failure(payload, f"Unsupported language: {payload['language']}")
+
+    with tempfile.TemporaryDirectory(prefix='judge-') as workdir:
+        paths = {
+            'src': os.path.join(workdir, language.source_name),
+            'exe': os.path.join(workdir, 'main'),
+            'dir': workdir,
+            'memory_mb': payload['memory_limit'],
+        }
+        with open(paths['src'], 'w', encoding='utf-8') as source:
+            source.write(payload['code'])
+
+        if language.is_compiled:
+            cache = _artifact_cache(payload.get('artifact_cache'))
+            key = cache and artifact_key(language, payload['code'], toolchain_version(language))
+            if not (cache and cache.fetch(key, workdir)):
+                compiled = run_process(
+                    format_command(language.compile, **paths),
+                    time_limit=payload['compile_time_limit'],
+                    memory_limit=None,
+                    cwd=workdir,
+                    env=os.environ.copy(),
+                )
+                if compiled.returncode != 0:
+                    message = (compiled.stderr or compiled.stdout).decode('utf-8', 'replace')
+                    return _compile_failure(payload, message[-payload['stored_output_chars']:])
+                if cache:
+                    cache.store(key, language.artifact_paths(workdir))
+
+        argv = format_command(language.run, **paths)
+        env = {'PATH': os.environ.get('PATH', '/usr/bin:/bin'), 'LANG': 'C.UTF-8', 'HOME': workdir}
+        results = run_cases(argv, payload, language, workdir, env)
+
+    return summarize(payload, results)
+
+
+def run_cases(argv, payload, language, workdir, env):
+    """
+    Run every case and return the results in case order.
+
+    Cases fan out over ``case_concurrency`` threads, each waiting on its own
+    child process, so the wall time of a submission approaches that of its
+    slowest cases rather than their sum. Under ``first_failure`` a failing
+    case cancels every case after it - queued ones never start and running
+    ones are killed - while earlier cases finish, so the reported first
+    failure is the same as a sequential run would find.
+    """
+    cases = payload['cases']
+    fail_fast = payload.get('policy') == 'first_failure'
+    concurrency = min(payload.get('case_concurrency') or 1, len(cases))
+    if concurrency <= 1:
+        results = []
+        for case in cases:
+            result = run_case(argv, case, payload, language, workdir, env)
+            _report_case(payload, result)
+            results.append(result)
+            if fail_fast and result['status'] != 'accepted':
+                break
+        return results
+
+    cancels = [threading.Event() for _ in cases]
+
+    def run_one(index):
+        if cancels[index].is_set():
+            return None
+        # Concurrent runs get separate working directories so scratch files cannot collide.
+        cwd = tempfile.mkdtemp(prefix=f'case-{index}-', dir=workdir)
+        result = run_case(argv, cases[index], payload, language, cwd, env, cancel=cancels[index])
+        if not cancels[index].is_set():
+            _report_case(payload, result)
+        if fail_fast and result['status'] != 'accepted':
+            for later in cancels[index + 1:]:
+                later.set()
+        return result
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(run_one, range(len(cases))))
+
+    results = []
+    for result in outcomes:
+        results.append(result)
+        if fail_fast and result['status'] != 'accepted':
+            break
+    return results
+
+
+def run_case(argv, case, payload, language, workdir, env, cancel=None):
+    """Run the program against one test case, grading its output as it streams."""
+    limit = payload['stored_output_chars']
+    memory_limit = payload['memory_limit'] * MB
+    with _expected_source(case) as expected:
+        comparator = make_comparator(payload.get('comparison', 'whitespace'), expected, payload.get('float_tolerance', 1e-6))
+        run = run_process(
+            argv,
+            stdin=case.get('input', '').encode('utf-8'),
+            stdin_path=case.get('input_path'),
+            time_limit=payload['time_limit'],
+            memory_limit=payload['memory_limit'],
+            limit_address_space=language.limit_address_space,
+            output_limit=payload['output_limit'],
+            cwd=workdir,
+            env=env,
+            stdout_sink=comparator.feed,
+            capture_limit=limit * 4,
+            cancel=cancel,
+            spawn=get_warm_pool().spawn if language.warm_pool and payload.get('warm_pool') else None,
+            rss_limit=None if language.limit_address_space else memory_limit,
+        )
+        error = run.stderr.decode('utf-8', 'replace')
+
+        # RLIMIT_CPU only has whole-second granularity, so the measured CPU time decides.
+        if run.cpu_limit_hit or run.cpu_time > payload['time_limit']:
+            status = 'time_limit_exceeded'
+        elif run.memory_limit_exceeded or run.max_rss > memory_limit:
+            status = 'memory_limit_exceeded'
+        elif run.aborted:
+            status = 'wrong_answer'
+        elif run.output_limit_exceeded:
+            status = 'runtime_error'
+            error = 'Output limit exceeded'
+        elif run.returncode != 0:
+            if any(marker in error for marker in OUT_OF_MEMORY_MARKERS):
+                status = 'memory_limit_exceeded'
+            else:
+                status = 'runtime_error'
+        elif comparator.finish():
+            status = 'accepted'
+        else:
+            status = 'wrong_answer'
+
+    return {
+        'test_case_id': case['id'],
+        'status': status,
+        'execution_time': round(run.cpu_time, 4),
+        'wall_time': round(run.wall_time, 4),
+        'memory_used': math.ceil(run.max_rss / MB),
+        'output': run.stdout.decode('utf-8', 'replace')[:limit],
+        'error_message': error[-limit:] if status != 'accepted' else '',
+    }
+
+
+@contextmanager
+def _expected_source(case):
+    """Open the expected output as a readable source without copying blobs into memory."""
+    if case.get('expected_path') is None:
+        yield io.BytesIO(case['expected'].encode('utf-8'))
+        return
+    with open(case['expected_path'], 'rb') as expected_file:
+        if os.fstat(expected_file.fileno()).st_size == 0:
+            yield io.BytesIO()
+            return
+        with mmap.mmap(expected_file.fileno(), 0, access=mmap.ACCESS_READ) as expected:
+            yield expected
+
+
+def summarize(payload, results):
+    """Fold per-case results into the submission verdict."""
+    status = next((r['status'] for r in results if r['status'] != 'accepted'), 'accepted')
+    times = [r['execution_time'] for r in results if r['execution_time'] is not None]
+    memory = [r['memory_used'] for r in results if r['memory_used'] is not None]
+    failed = next((r for r in results if r['status'] != 'accepted'), None)
+    return {
+        'submission_id': payload['submission_id'],
+        'test_case_version': payload.get('test_case_version'),
+        'status': status,
+        'results': results,
+        'passed_test_cases': sum(1 for r in results if r['status'] == 'accepted'),
+        'total_test_cases': len(payload['cases']),
+        'execution_time': max(times) if times else None,
+        'memory_used': max(memory) if memory else None,
+        'error_message': failed['error_message'] if failed else '',
+    }
+
+
+_progress_queue = None
+
+
+def init_worker(progress_queue):
+    """Pool initializer: report each finished case as ``(submission_id, status)`` on ``progress_queue``."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _report_case(payload, result):
+    if _progress_queue is not None:
+        _progress_queue.put((payload['submission_id'], result['status']))
+
+
+@lru_cache(maxsize=None)
+def _artifact_cache(config):
+    if not config:
+        return None
+    root, max_bytes = config
+    return ArtifactCache(root, max_bytes)
+
+
+def _compile_failure(payload, message):
+    return {
+        'submission_id': payload['submission_id'],
+        'test_case_version': payload.get('test_case_version'),
+        'status': 'compilation_error',
+        'results': [],
+        'passed_test_cases': 0,
+        'total_test_cases': len(payload['cases']),
+        'execution_time': None,
+        'memory_used': None,
+        'error_message': message,
+    }
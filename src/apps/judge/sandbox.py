@@ -0,0 +1,267 @@
+"""
+Run untrusted programs in a child process under resource limits.
+
+This module deliberately has no Django imports: it is executed inside judge
+worker processes, which never touch the database.
+"""
+import errno
+import math
+import os
+import resource
+import selectors
+import signal
+import subprocess
+import time
+from dataclasses import dataclass
+from functools import partial
+
+MB = 1024 * 1024
+READ_SIZE = 64 * 1024
+POLL_INTERVAL = 0.05  # seconds between cancel checks and RSS samples
+
+
+@dataclass
+class RunResult:
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    wall_time: float
+    # From the child's rusage: user + system CPU seconds and peak resident set in bytes.
+    cpu_time: float = 0.0
+    max_rss: int = 0
+    timed_out: bool = False
+    # The stdout sink rejected the output, so the child was killed early.
+    aborted: bool = False
+    output_limit_exceeded: bool = False
+    # The caller's ``cancel`` event fired, so the child was killed early.
+    cancelled: bool = False
+    # Sampled RSS went over ``rss_limit``, so the child was killed early.
+    memory_limit_exceeded: bool = False
+    stdout_size: int = 0
+
+    @property
+    def signal(self):
+        return -self.returncode if self.returncode < 0 else None
+
+    @property
+    def killed_by_judge(self):
+        return (self.timed_out or self.aborted or self.output_limit_exceeded or self.cancelled
+                or self.memory_limit_exceeded)
+
+    @property
+    def cpu_limit_hit(self):
+        if self.timed_out or self.signal == signal.SIGXCPU:
+            return True
+        # SIGKILL we did not send ourselves comes from the RLIMIT_CPU hard limit.
+        return self.signal == signal.SIGKILL and not self.killed_by_judge
+
+
+def resource_limits(time_limit, memory_limit, limit_address_space, output_limit):
+    """The ``(resource, soft, hard)`` rlimits a child runs under."""
+    cpu_seconds = max(1, math.ceil(time_limit))
+    # SIGXCPU at the soft limit, SIGKILL one second later.
+    limits = [(resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 1)]
+    if memory_limit and limit_address_space:
+        limits.append((resource.RLIMIT_AS, memory_limit * MB, memory_limit * MB))
+    limits.append((resource.RLIMIT_FSIZE, output_limit, output_limit))
+    limits.append((resource.RLIMIT_CORE, 0, 0))
+    return limits
+
+
+def apply_limits(limits):
+    for which, soft, hard in limits:
+        resource.setrlimit(which, (soft, hard))
+
+
+def run_process(argv, stdin=b'', time_limit=5, memory_limit=256, wall_limit=None,
+                limit_address_space=True, output_limit=64 * MB, cwd=None, env=None,
+                stdin_path=None, stdout_sink=None, capture_limit=None, cancel=None, spawn=None,
+                rss_limit=None):
+    """
+    Run ``argv`` to completion and capture its output.
+
+    ``time_limit`` is CPU seconds, enforced by RLIMIT_CPU; ``wall_limit`` guards
+    against programs that sleep or block and defaults to twice the CPU limit.
+    ``memory_limit`` is in MB. With ``stdin_path`` the file itself becomes the
+    child's stdin, so its contents never pass through this process.
+
+    Output is read incrementally. Each stdout chunk is passed to
+    ``stdout_sink``; if it returns False the child is killed straight away.
+    Only the first ``capture_limit`` bytes of stdout and the last
+    ``capture_limit`` bytes of stderr are kept, and a child that writes more
+    than ``output_limit`` bytes is killed.
+
+    ``cancel`` is an optional ``threading.Event``; once it is set the child is
+    killed within ``POLL_INTERVAL`` seconds and the result marked ``cancelled``.
+
+    CPU time and peak RSS come from the child's rusage, collected with
+    ``wait4`` when it is reaped. For runtimes that cannot run under RLIMIT_AS,
+    ``rss_limit`` (bytes) has the child's resident set sampled from /proc
+    while it runs, and the child is killed as soon as it goes over.
+
+    ``spawn`` replaces the default ``Popen`` launcher. It is called as
+    ``spawn(argv, stdin, limits, cwd, env)`` and must return a ``Popen``-like
+    object whose process leads its own session and which offers
+    ``wait4(timeout)``, returning ``(returncode, cpu_time, max_rss)``, if it
+    cannot be reaped by this process; see ``warmpool``.
+    """
+    if wall_limit is None:
+        wall_limit = time_limit * 2 + 1
+    if capture_limit is None:
+        capture_limit = output_limit
+    limits = resource_limits(time_limit, memory_limit, limit_address_space, output_limit)
+    spawn = spawn or _spawn
+    if stdin_path is not None:
+        with open(stdin_path, 'rb') as stdin_file:
+            proc = spawn(argv, stdin_file, limits, cwd, env)
+            stdin = None
+    else:
+        proc = spawn(argv, subprocess.PIPE, limits, cwd, env)
+    return _communicate(proc, stdin, wall_limit, output_limit, capture_limit, stdout_sink, cancel, rss_limit)
+
+
+def _spawn(argv, stdin, limits, cwd, env):
+    return subprocess.Popen(
+        argv,
+        stdin=stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        env=env,
+        start_new_session=True,
+        preexec_fn=partial(apply_limits, limits),
+    )
+
+
+def _communicate(proc, stdin_data, wall_limit, output_limit, capture_limit, stdout_sink, cancel, rss_limit):
+    started = time.monotonic()
+    deadline = started + wall_limit
+    result = RunResult(returncode=0, stdout=b'', stderr=b'', wall_time=0.0)
+    stdout, stderr = bytearray(), bytearray()
+
+    selector = selectors.DefaultSelector()
+    selector.register(proc.stdout, selectors.EVENT_READ)
+    selector.register(proc.stderr, selectors.EVENT_READ)
+    to_write = memoryview(stdin_data or b'')
+    if proc.stdin is not None:
+        if to_write:
+            os.set_blocking(proc.stdin.fileno(), False)
+            selector.register(proc.stdin, selectors.EVENT_WRITE)
+        else:
+            proc.stdin.close()
+
+    with selector:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                result.timed_out = True
+                break
+            if cancel is not None and cancel.is_set():
+                result.cancelled = True
+                break
+            if rss_limit is not None:
+                rss = _sample_rss(proc.pid)
+                result.max_rss = max(result.max_rss, rss)
+                if rss > rss_limit:
+                    result.memory_limit_exceeded = True
+                    break
+            if cancel is not None or rss_limit is not None:
+                remaining = min(remaining, POLL_INTERVAL)
+            for key, _ in selector.select(remaining):
+                if key.fileobj is proc.stdin:
+                    try:
+                        written = os.write(key.fd, to_write[:READ_SIZE])
+                    except BlockingIOError:
+                        continue
+                    except BrokenPipeError:
+                        written = len(to_write)
+                    to_write = to_write[written:]
+                    if not to_write:
+                        selector.unregister(proc.stdin)
+                        proc.stdin.close()
+                    continue
+
+                chunk = os.read(key.fd, READ_SIZE)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                elif key.fileobj is proc.stderr:
+                    stderr += chunk
+                    if len(stderr) > 2 * capture_limit:
+                        del stderr[:-capture_limit]
+                else:
+                    result.stdout_size += len(chunk)
+                    if len(stdout) < capture_limit:
+                        stdout += chunk[:capture_limit - len(stdout)]
+                    if result.stdout_size > output_limit:
+                        result.output_limit_exceeded = True
+                    elif stdout_sink is not None and not stdout_sink(chunk):
+                        result.aborted = True
+            if result.aborted or result.output_limit_exceeded:
+                break
+
+    if result.killed_by_judge:
+        _kill_group(proc)
+    for stream in (proc.stdin, proc.stdout, proc.stderr):
+        if stream is not None and not stream.closed:
+            stream.close()
+    wait4 = getattr(proc, 'wait4', None) or partial(_wait4, proc)
+    try:
+        returncode, cpu_time, max_rss = wait4(max(deadline - time.monotonic(), 0.1))
+    except subprocess.TimeoutExpired:
+        result.timed_out = True
+        _kill_group(proc)
+        returncode, cpu_time, max_rss = wait4(None)
+    result.wall_time = time.monotonic() - started
+    # Reap anything the program left running in its session.
+    _kill_group(proc)
+
+    result.returncode = returncode
+    result.cpu_time = cpu_time
+    result.max_rss = max(result.max_rss, max_rss)
+    result.stdout = bytes(stdout)
+    result.stderr = bytes(stderr[-capture_limit:])
+    return result
+
+
+def _wait4(proc, timeout):
+    """``Popen.wait`` that also returns the child's CPU time and peak RSS."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        pid, status, usage = os.wait4(proc.pid, 0 if deadline is None else os.WNOHANG)
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in kilobytes on Linux.
+            return proc.returncode, usage.ru_utime + usage.ru_stime, usage.ru_maxrss * 1024
+        if time.monotonic() >= deadline:
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+        time.sleep(delay)
+        delay = min(delay * 2, 0.01)
+
+
+def _sample_rss(pid):
+    """The resident set of ``pid`` in bytes, or 0 once it has gone."""
+    try:
+        with open(f'/proc/{pid}/status', 'rb') as status:
+            for line in status:
+                if line.startswith(b'VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def _kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError as exc:
+        if exc.errno not in (errno.ESRCH, errno.EPERM):
+            raise
+        if exc.errno == errno.ESRCH:
+            # A child forked by the warm pool has no group of its own until it
+            # runs setsid(); kill it directly in case it has not got that far.
+            try:
+                os.kill(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
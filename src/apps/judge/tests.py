@@ -0,0 +1,469 @@
+import io
+import os
+import queue as stdlib_queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from common.testing import QuestionTestData, make_user
+from leaderboard.fastest import fastest
+from progress.models import UserProgress
+from progress.services import rebuild_progress
+from questions.blobstore import BlobStore
+from questions.counters import get_counters
+from questions.models import TestCase as QuestionTestCase
+from submissions.models import Submission
+from submissions.packing import pack_results
+from judge.artifacts import ArtifactCache
+from judge.comparators import make_comparator
+from judge import queue
+from judge.engine import JudgeEngine
+from judge.models import JudgeJob
+from judge.rejudge import start_rejudge
+from judge.runner import init_worker, judge_submission
+from judge.sandbox import _kill_group, run_process
+
+ECHO_SUM = "a, b = map(int, input().split())\nprint(a + b)\n"
+# Sleeps for a tenth of its input in seconds and echoes it, except that it gets 1 wrong.
+SLEEPY_ECHO = "import time\nn = int(input())\ntime.sleep(n / 10)\nprint(-1 if n == 1 else n)\n"
+
+
+def make_payload(code, cases, **overrides):
+    payload = {
+        'submission_id': 1,
+        'language': 'python',
+        'code': code,
+        'time_limit': 1,
+        'memory_limit': 256,
+        'compile_time_limit': 10,
+        'output_limit': 1024 * 1024,
+        'stored_output_chars': 200,
+        'cases': [{'id': i, 'input': given, 'expected': expected} for i, (given, expected) in enumerate(cases)],
+    }
+    payload.update(overrides)
+    return payload
+
+
+class RunnerTests(SimpleTestCase):
+    def test_accepted(self):
+        verdict = judge_submission(make_payload(ECHO_SUM, [('1 2\n', '3'), ('5 5\n', '10\n')]))
+        self.assertEqual(verdict['status'], 'accepted')
+        self.assertEqual(verdict['passed_test_cases'], 2)
+
+    def test_wrong_answer_reports_first_failure(self):
+        verdict = judge_submission(make_payload(ECHO_SUM, [('1 2\n', '3'), ('1 1\n', '3')]))
+        self.assertEqual(verdict['status'], 'wrong_answer')
+        self.assertEqual([r['status'] for r in verdict['results']], ['accepted', 'wrong_answer'])
+
+    def test_first_failure_policy_stops_early(self):
+        cases = [('1 2\n', '3'), ('1 1\n', '3'), ('2 2\n', '4')]
+        verdict = judge_submission(make_payload(ECHO_SUM, cases, policy='first_failure'))
+        self.assertEqual(verdict['status'], 'wrong_answer')
+        self.assertEqual(len(verdict['results']), 2)
+        self.assertEqual(verdict['passed_test_cases'], 1)
+        self.assertEqual(verdict['total_test_cases'], 3)
+
+    def test_parallel_cases_report_in_case_order(self):
+        cases = [('3\n', '3'), ('0\n', '0'), ('2\n', '2'), ('1\n', '1')]
+        verdict = judge_submission(make_payload(SLEEPY_ECHO, cases, case_concurrency=4))
+        self.assertEqual([r['test_case_id'] for r in verdict['results']], [0, 1, 2, 3])
+        self.assertEqual(
+            [r['status'] for r in verdict['results']],
+            ['accepted', 'accepted', 'accepted', 'wrong_answer'],
+        )
+        self.assertEqual(verdict['execution_time'], max(r['execution_time'] for r in verdict['results']))
+
+    def test_parallel_first_failure_cancels_later_cases(self):
+        # Case 1 fails while case 0 is still running; case 2 would sleep past the wall limit.
+        cases = [('3\n', '3'), ('1\n', '1'), ('50\n', '50')]
+        started = time.monotonic()
+        verdict = judge_submission(make_payload(SLEEPY_ECHO, cases, policy='first_failure', case_concurrency=3))
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual([r['status'] for r in verdict['results']], ['accepted', 'wrong_answer'])
+        self.assertEqual(verdict['status'], 'wrong_answer')
+
+    def test_warm_pool_matches_cold_start(self):
+        programs = [
+            (ECHO_SUM, 'accepted'),
+            ("while True:\n    pass\n", 'time_limit_exceeded'),
+            ("raise SystemExit(3)\n", 'runtime_error'),
+            ("x = [0] * 10 ** 9\n", 'memory_limit_exceeded'),
+        ]
+        for code, status in programs:
+            with self.subTest(status=status):
+                verdict = judge_submission(make_payload(code, [('1 2\n', '3')], warm_pool=True))
+                self.assertEqual(verdict['status'], status)
+
+    def test_warm_pool_children_do_not_share_state(self):
+        # Each case runs in a fresh fork, so a change to a preloaded module does not leak.
+        code = "import math\nprint(getattr(math, 'leak', 0))\nmath.leak = 1\n"
+        verdict = judge_submission(make_payload(code, [('', '0'), ('', '0')], warm_pool=True))
+        self.assertEqual(verdict['status'], 'accepted')
+
+    def test_kill_reaches_a_child_without_its_own_process_group(self):
+        # A warm pool child is killed this way if it times out before its setsid().
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        _kill_group(child)
+        self.assertEqual(child.wait(timeout=5), -signal.SIGKILL)
+
+    def test_reports_cpu_time_and_peak_memory(self):
+        code = "data = bytearray(64 * 1024 * 1024)\nsum(range(3 * 10 ** 6))\nprint(len(data))\n"
+        verdict = judge_submission(make_payload(code, [('', str(64 * 1024 * 1024))]))
+        result = verdict['results'][0]
+        self.assertEqual(verdict['status'], 'accepted')
+        self.assertGreater(result['execution_time'], 0)
+        self.assertGreaterEqual(result['wall_time'], result['execution_time'] * 0.5)
+        self.assertGreaterEqual(result['memory_used'], 64)
+        self.assertEqual(verdict['memory_used'], result['memory_used'])
+
+    def test_reports_each_finished_case(self):
+        progress = stdlib_queue.Queue()
+        init_worker(progress)
+        try:
+            judge_submission(make_payload(ECHO_SUM, [('1 2\n', '3'), ('1 1\n', '2')], submission_id=7))
+        finally:
+            init_worker(None)
+        self.assertEqual(sorted([progress.get_nowait(), progress.get_nowait()]), [(7, 'accepted'), (7, 'accepted')])
+        self.assertTrue(progress.empty())
+
+    def test_time_limit(self):
+        verdict = judge_submission(make_payload("while True:\n    pass\n", [('', '')]))
+        self.assertEqual(verdict['status'], 'time_limit_exceeded')
+
+    def test_runtime_error(self):
+        verdict = judge_submission(make_payload("raise SystemExit(3)\n", [('', '')]))
+        self.assertEqual(verdict['status'], 'runtime_error')
+
+    def test_unknown_language(self):
+        verdict = judge_submission(make_payload(ECHO_SUM, [('1 2\n', '3')], language='cobol'))
+        self.assertEqual(verdict['status'], 'compilation_error')
+
+    def test_blob_backed_cases(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = BlobStore(root)
+            case = {
+                'id': 1,
+                'input_path': store.path(store.put(b'40 2\n')),
+                'expected_path': store.path(store.put(b'42\n')),
+            }
+            verdict = judge_submission(make_payload(ECHO_SUM, []) | {'cases': [case]})
+        self.assertEqual(verdict['status'], 'accepted')
+
+
+class SandboxTests(SimpleTestCase):
+    def test_rusage_is_collected(self):
+        run = run_process([sys.executable, '-c', 'sum(range(3 * 10 ** 6))'])
+        self.assertEqual(run.returncode, 0)
+        self.assertGreater(run.cpu_time, 0)
+        self.assertGreater(run.max_rss, 0)
+
+    def test_rss_limit_kills_runaway_memory(self):
+        code = "import time\ndata = bytearray(256 * 1024 * 1024)\ntime.sleep(5)\n"
+        run = run_process(
+            [sys.executable, '-c', code], memory_limit=None, limit_address_space=False, rss_limit=64 * 1024 * 1024,
+        )
+        self.assertTrue(run.memory_limit_exceeded)
+        self.assertFalse(run.cpu_limit_hit)
+        self.assertLess(run.wall_time, 3)
+
+
+class EngineTests(QuestionTestData):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.question.time_limit = 1
+        cls.question.save(update_fields=['time_limit'])
+        QuestionTestCase.objects.create(question=cls.question, input_data='1 2', expected_output='3')
+        QuestionTestCase.objects.create(question=cls.question, input_data='2 2', expected_output='4')
+
+    def test_workers_share_cpus_with_concurrent_cases(self):
+        with mock.patch('judge.engine.os.cpu_count', return_value=8):
+            engine = JudgeEngine()
+            self.assertEqual((engine.workers, engine.case_concurrency), (2, 4))
+            self.assertEqual(JudgeEngine(workers=3).workers, 3)
+            with self.settings(JUDGE_CASE_CONCURRENCY=1):
+                self.assertEqual(JudgeEngine().workers, 8)
+        with mock.patch('judge.engine.os.cpu_count', return_value=2):
+            self.assertEqual(JudgeEngine().workers, 1)
+
+    def test_idle_and_stopping_engine_flush_question_counters(self):
+        counters = get_counters()
+        self.addCleanup(counters.flush)
+        counters.add(self.question.pk, total=1)
+        seen = []
+
+        def idle(seconds):
+            self.question.refresh_from_db()
+            seen.append(self.question.total_submissions)
+            counters.add(self.question.pk, total=1)
+            raise KeyboardInterrupt
+
+        with mock.patch.object(counters, 'interval', 0), mock.patch('judge.engine.time.sleep', idle):
+            with self.assertRaises(KeyboardInterrupt):
+                JudgeEngine(workers=1).run()
+        self.question.refresh_from_db()
+        self.assertEqual((seen, self.question.total_submissions), ([1], 2))
+
+    def test_judges_pending_submissions(self):
+        good = Submission.objects.create(user=self.user, question=self.question, code=ECHO_SUM, language='python')
+        bad = Submission.objects.create(user=self.user, question=self.question, code="print(0)\n", language='python')
+
+        self.assertEqual(JudgeEngine(workers=1).run(once=True), 2)
+
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual(good.status, 'accepted')
+        self.assertEqual(good.points_earned, 10)
+        self.assertEqual(len(good.case_results), 2)
+        self.assertEqual(good.results.count(), 0)
+        self.assertEqual(bad.status, 'wrong_answer')
+        self.assertEqual(bad.passed_test_cases, 0)
+        self.assertEqual(bad.results.count(), 2)
+        self.question.refresh_from_db()
+        self.assertEqual((self.question.total_submissions, self.question.successful_submissions), (2, 1))
+        progress = UserProgress.objects.get(user=self.user, question=self.question)
+        self.assertEqual((progress.status, progress.attempts, progress.best_submission), ('solved', 2, good))
+        self.assertEqual([entry[2] for entry in fastest(self.question.pk)['python']], [good.pk])
+
+    def test_sample_run_never_counts(self):
+        self.question.test_cases.filter(input_data='1 2').update(is_sample=True)
+        submission = Submission.objects.create(user=self.user, question=self.question, code=ECHO_SUM, language='python')
+        queue.enqueue(submission, kind='run')
+        JudgeEngine(workers=1).run(once=True)
+
+        submission.refresh_from_db()
+        self.assertEqual((submission.is_run, submission.status, submission.points_earned), (True, 'accepted', 0))
+        self.assertEqual(start_rejudge(self.question).total, 0)
+        rebuild_progress(question_ids=[self.question.pk])
+        self.assertFalse(UserProgress.objects.exists())
+        self.assertEqual(fastest(self.question.pk), {})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_points, 0)
+
+    def test_first_failure_orders_cases_by_past_cost(self):
+        slow, fast = self.question.test_cases.order_by('id')
+        Submission.objects.create(
+            user=self.user, question=self.question, code='', language='python',
+            packed_results=pack_results([
+                {'test_case_id': slow.pk, 'status': 'accepted', 'execution_time': 0.9},
+                {'test_case_id': fast.pk, 'status': 'accepted', 'execution_time': 0.1},
+            ]),
+        )
+
+        ordered = JudgeEngine(workers=1).order_by_cost(self.question.pk, [slow, fast])
+        self.assertEqual(ordered, [fast, slow])
+
+    def test_identical_resubmission_reuses_verdict(self):
+        first = Submission.objects.create(user=self.user, question=self.question, code=ECHO_SUM, language='python')
+        JudgeEngine(workers=1).run(once=True)
+        # Same program, different line endings.
+        again = Submission.objects.create(
+            user=self.user, question=self.question, code=ECHO_SUM.replace('\n', '\r\n'), language='python',
+        )
+
+        again = Submission.objects.get(pk=again.pk)
+        engine = JudgeEngine(workers=1)
+        self.assertEqual(engine.find_donors([again])[again.pk], first)
+        engine.run(once=True)
+        again.refresh_from_db()
+        self.assertEqual(again.status, 'accepted')
+        self.assertEqual(len(again.case_results), 2)
+
+    def test_whitespace_inside_the_program_prevents_reuse(self):
+        self.question.refresh_from_db()
+        judged = Submission.objects.create(
+            user=self.user, question=self.question, code='print("""x\ny""")\n', language='python',
+            status='wrong_answer', test_case_version=self.question.test_case_version,
+        )
+        same, padded = [
+            Submission.objects.get(pk=Submission.objects.create(
+                user=self.user, question=self.question, code=code, language='python',
+            ).pk)
+            for code in ('print("""x\r\ny""")\r\n', 'print("""x   \ny""")\n')
+        ]
+        self.assertEqual(JudgeEngine(workers=1).find_donors([same, padded]), {same.pk: judged})
+
+    def test_changing_test_cases_invalidates_reuse(self):
+        Submission.objects.create(user=self.user, question=self.question, code=ECHO_SUM, language='python')
+        JudgeEngine(workers=1).run(once=True)
+        QuestionTestCase.objects.create(question=self.question, input_data='3 3', expected_output='6')
+
+        again = Submission.objects.create(user=self.user, question=self.question, code=ECHO_SUM, language='python')
+        again = Submission.objects.get(pk=again.pk)
+        self.assertEqual(JudgeEngine(workers=1).find_donors([again]), {})
+
+    def test_rejudge_regrades_and_rebuilds_progress(self):
+        submission = Submission.objects.create(
+            user=self.user, question=self.question, code="print(3)\n", language='python',
+        )
+        JudgeEngine(workers=1).run(once=True)
+        self.question.test_cases.filter(input_data='2 2').delete()
+        self.assertEqual(Submission.objects.get(pk=submission.pk).status, 'wrong_answer')
+
+        run = start_rejudge(self.question)
+        self.assertEqual(run.total, 1)
+        JudgeEngine(workers=1).run(once=True)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, 'done')
+        self.assertEqual(run.enqueued, 1)
+        self.assertEqual(Submission.objects.get(pk=submission.pk).status, 'accepted')
+        progress = UserProgress.objects.get(user=self.user, question=self.question)
+        self.assertEqual(progress.status, 'solved')
+        self.assertEqual(progress.best_submission_id, submission.pk)
+
+
+class ComparatorTests(SimpleTestCase):
+    def compare(self, mode, actual_chunks, expected, tolerance=1e-6):
+        comparator = make_comparator(mode, io.BytesIO(expected), tolerance)
+        for chunk in actual_chunks:
+            if not comparator.feed(chunk):
+                return False
+        return comparator.finish()
+
+    def test_exact_ignores_only_trailing_whitespace(self):
+        self.assertTrue(self.compare('exact', [b'1 2\n3', b'\n\n'], b'1 2\n3\n'))
+        self.assertFalse(self.compare('exact', [b'1  2\n3\n'], b'1 2\n3\n'))
+
+    def test_whitespace_mode_across_chunk_boundaries(self):
+        self.assertTrue(self.compare('whitespace', [b'  12', b'3 4', b'5\n\n'], b'123\t45'))
+        self.assertFalse(self.compare('whitespace', [b'12', b' 34'], b'1234'))
+        self.assertFalse(self.compare('whitespace', [b'1 2'], b'1 2 3'))
+
+    def test_float_tolerance(self):
+        self.assertTrue(self.compare('float', [b'0.3333', b'334 yes'], b'0.333333 yes', tolerance=1e-5))
+        self.assertFalse(self.compare('float', [b'0.34 yes'], b'0.333333 yes', tolerance=1e-5))
+
+    def test_stops_at_first_mismatch(self):
+        comparator = make_comparator('whitespace', io.BytesIO(b'1 2 3'))
+        self.assertFalse(comparator.feed(b'9 '))
+        self.assertFalse(comparator.feed(b'2 3'))
+
+    def test_wrong_answer_kills_long_running_output(self):
+        code = "import time\nprint(1, flush=True)\ntime.sleep(30)\n"
+        verdict = judge_submission(make_payload(code, [('', '2')], time_limit=10))
+        self.assertEqual(verdict['status'], 'wrong_answer')
+        self.assertLess(verdict['results'][0]['execution_time'], 5)
+
+
+class ArtifactCacheTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+
+    def build(self, name, size):
+        path = os.path.join(self.root, name)
+        with open(path, 'wb') as artifact:
+            artifact.write(b'\0' * size)
+        return path
+
+    def test_hit_and_miss_counters(self):
+        cache = ArtifactCache(os.path.join(self.root, 'cache'), max_bytes=1024)
+        workdir = tempfile.mkdtemp(dir=self.root)
+        self.assertFalse(cache.fetch('k', workdir))
+        cache.store('k', [self.build('main', 10)])
+        self.assertTrue(cache.fetch('k', workdir))
+        self.assertTrue(os.path.exists(os.path.join(workdir, 'main')))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stores']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_evicts_least_recently_used(self):
+        cache = ArtifactCache(os.path.join(self.root, 'cache'), max_bytes=150)
+        cache.store('old', [self.build('main', 100)])
+        os.utime(os.path.join(cache.entries, 'old'), (0, 0))
+        cache.store('new', [self.build('main', 100)])
+        self.assertEqual(os.listdir(cache.entries), ['new'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    @skipUnless(shutil.which('gcc'), "gcc is not installed")
+    def test_cached_compile_is_reused(self):
+        code = '#include <stdio.h>\nint main(){int a,b;scanf("%d %d",&a,&b);printf("%d\\n",a+b);}\n'
+        config = (os.path.join(self.root, 'cache'), 10 * 1024 * 1024)
+        for _ in range(2):
+            verdict = judge_submission(make_payload(code, [('1 2', '3')], language='c', artifact_cache=config))
+            self.assertEqual(verdict['status'], 'accepted')
+        stats = ArtifactCache(*config).stats()
+        self.assertEqual((stats['hits'], stats['stores']), (1, 1))
+
+
+class QueueTests(QuestionTestData):
+    username = 'spammer'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.spammer = cls.user
+        cls.other = make_user('other')
+
+    def submit(self, user, kind='submit'):
+        submission = Submission.objects.create(user=user, question=self.question, code='', language='python')
+        return queue.enqueue(submission, kind=kind)
+
+    def test_priority_order(self):
+        rejudge = self.submit(self.spammer, kind='rejudge')
+        submit = self.submit(self.spammer)
+        run = self.submit(self.spammer, kind='run')
+        self.assertEqual(queue.claim(3), [run, submit, rejudge])
+
+    def test_one_user_cannot_starve_others(self):
+        spam = [self.submit(self.spammer) for _ in range(5)]
+        late = self.submit(self.other)
+        self.assertEqual(queue.claim(2), [spam[0], late])
+
+    def test_claimed_jobs_are_not_handed_out_twice(self):
+        jobs = [self.submit(self.spammer) for _ in range(3)]
+        first = queue.claim(2)
+        second = queue.claim(2)
+        self.assertEqual(first + second, jobs)
+        self.assertEqual(queue.claim(2), [])
+
+    def test_expired_lease_is_retried(self):
+        job = self.submit(self.spammer)
+        leased, = queue.claim(1)
+        JudgeJob.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+
+        retried, = queue.claim(1)
+        self.assertEqual(retried.attempts, 2)
+        self.assertFalse(queue.complete(leased))
+        self.assertTrue(queue.complete(retried))
+
+    @override_settings(JUDGE_MAX_ATTEMPTS=1)
+    def test_exhausted_job_fails_its_submission(self):
+        job = self.submit(self.spammer)
+        queue.claim(1)
+        JudgeJob.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(queue.claim(1), [])
+
+        self.addCleanup(get_counters().flush)
+        JudgeEngine(workers=1).maintain()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        submission = Submission.objects.get(pk=job.submission_id)
+        self.assertEqual((submission.status, submission.error_message), ('runtime_error', 'Internal judge error'))
+
+    def test_late_users_join_the_current_round(self):
+        spam = [self.submit(self.spammer) for _ in range(4)]
+        self.assertEqual(queue.claim(2), spam[:2])
+        for job in spam[:2]:
+            queue.complete(job)
+        late = self.submit(self.other)
+        more = self.submit(self.spammer)
+        self.assertEqual(queue.claim(4), [spam[2], late, spam[3], more])
+
+    @override_settings(JUDGE_JOB_RETENTION=0)
+    def test_prune_deletes_finished_jobs(self):
+        self.submit(self.spammer)
+        queued = self.submit(self.other)
+        queue.complete(queue.claim(1)[0])
+        self.assertEqual(queue.prune(), 1)
+        self.assertEqual(list(JudgeJob.objects.all()), [queued])
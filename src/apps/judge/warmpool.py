@@ -0,0 +1,143 @@
+"""
+Client for the Python fork server in ``zygote``.
+
+Each judge worker keeps one zygote, started on first use and restarted if it
+dies. ``WarmPool.spawn`` has the signature ``sandbox.run_process`` expects of
+a launcher and returns a ``ZygoteProcess``, which offers the part of the
+``Popen`` interface the sandbox uses. Like the rest of the worker side of
+the judge, this module must not touch Django or the database.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+from functools import lru_cache
+
+ZYGOTE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zygote.py')
+REPLY_SIZE = 4096
+
+
+class ZygoteError(RuntimeError):
+    pass
+
+
+class ZygoteProcess:
+    """A process forked by the zygote; its exit status and rusage arrive on the reply socket."""
+
+    def __init__(self, args, pid, stdin, stdout, stderr, reply):
+        self.args = args
+        self.pid = pid
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+        self.cpu_time = None
+        self.max_rss = None
+        self._reply = reply
+
+    def wait(self, timeout=None):
+        return self.wait4(timeout)[0]
+
+    def wait4(self, timeout=None):
+        if self.returncode is None:
+            self._reply.settimeout(timeout)
+            try:
+                message = _receive(self._reply)
+            except socket.timeout:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            self._reply.close()
+            self.returncode = message['returncode']
+            self.cpu_time = message['cpu_time']
+            self.max_rss = message['max_rss']
+        return self.returncode, self.cpu_time, self.max_rss
+
+
+class WarmPool:
+    def __init__(self, python=sys.executable):
+        self.python = python
+        self._lock = threading.Lock()
+        self._zygote = None
+        self._control = None
+
+    def spawn(self, argv, stdin, limits, cwd, env):
+        """
+        Run the Python script ``argv[-1]`` in a process forked from the zygote.
+
+        The other elements of ``argv`` are ignored: every child runs under the
+        zygote's interpreter and flags.
+        """
+        control = self._ensure_started()
+        if stdin is subprocess.PIPE:
+            child_stdin, stdin_write = os.pipe()
+            parent_stdin = open(stdin_write, 'wb')
+        else:
+            child_stdin, parent_stdin = stdin.fileno(), None
+        stdout_read, stdout_write = os.pipe()
+        stderr_read, stderr_write = os.pipe()
+        reply, remote = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        header = json.dumps({'script': argv[-1], 'cwd': cwd, 'env': env or {}, 'limits': limits})
+        try:
+            socket.send_fds(control, [header.encode()], [remote.fileno(), child_stdin, stdout_write, stderr_write])
+        except OSError as exc:
+            for fd in (stdout_read, stderr_read):
+                os.close(fd)
+            if parent_stdin is not None:
+                parent_stdin.close()
+            reply.close()
+            raise ZygoteError(f"Python zygote is not accepting work: {exc}") from exc
+        finally:
+            remote.close()
+            for fd in (stdout_write, stderr_write):
+                os.close(fd)
+            if parent_stdin is not None:
+                os.close(child_stdin)
+
+        message = _receive(reply)
+        return ZygoteProcess(
+            argv, message['pid'], parent_stdin, open(stdout_read, 'rb'), open(stderr_read, 'rb'), reply,
+        )
+
+    def close(self):
+        with self._lock:
+            if self._zygote is not None:
+                self._control.close()
+                self._zygote.wait()
+                self._zygote = self._control = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._zygote is None or self._zygote.poll() is not None:
+                if self._control is not None:
+                    self._control.close()
+                control, remote = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+                with remote:
+                    self._zygote = subprocess.Popen(
+                        [self.python, '-I', ZYGOTE_PATH, str(remote.fileno())],
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.DEVNULL,
+                        pass_fds=[remote.fileno()],
+                    )
+                self._control = control
+            return self._control
+
+
+@lru_cache(maxsize=None)
+def get_warm_pool():
+    """The calling worker process's pool."""
+    return WarmPool()
+
+
+# A forked worker must start its own zygote rather than share its parent's.
+os.register_at_fork(after_in_child=get_warm_pool.cache_clear)
+
+
+def _receive(reply):
+    data = reply.recv(REPLY_SIZE)
+    if not data:
+        raise ZygoteError("Python zygote exited while running a submission")
+    message = json.loads(data)
+    if 'error' in message:
+        raise ZygoteError(f"Python zygote could not fork: {message['error']}")
+    return message
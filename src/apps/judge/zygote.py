@@ -0,0 +1,175 @@
+"""
+Fork server for Python submissions.
+
+``warmpool`` starts this file once per judge worker as
+``python -I zygote.py CONTROL_FD``. It imports the modules submissions
+commonly use and then serves requests on the control socket. A request is a
+JSON header (script, cwd, env, rlimits) sent together with four file
+descriptors: a reply socket and the child's stdin, stdout and stderr.
+
+For each request the zygote forks. The child becomes a session leader,
+applies the rlimits, swaps in the passed descriptors, closes everything else
+and runs the script as ``__main__``, so every test case still gets a fresh
+process, but one that starts from an initialised interpreter. The zygote
+sends the child's pid on the reply socket straight away, and its exit code,
+CPU time and peak RSS from ``wait4`` once it has been reaped.
+
+Children share the zygote's hash seed, so set and dict iteration order
+repeats between runs, as it would with PYTHONHASHSEED fixed. This file is
+run as a script and must only import the standard library.
+"""
+import json
+import os
+import resource
+import runpy
+import selectors
+import signal
+import socket
+import sys
+import traceback
+
+# Imported once in the zygote, so a submission's own imports of them are free.
+PRELOAD = (
+    'array', 'bisect', 'collections', 'copy', 'decimal', 'fractions', 'functools',
+    'heapq', 'itertools', 'math', 'operator', 'random', 're', 'string', 'typing',
+)
+MAX_HEADER = 64 * 1024
+
+
+def main(control_fd):
+    for name in PRELOAD:
+        __import__(name)
+
+    control = socket.socket(fileno=control_fd)
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_read, False)
+    os.set_blocking(wakeup_write, False)
+    # A Python-level handler is needed for SIGCHLD to reach the wakeup fd.
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    signal.set_wakeup_fd(wakeup_write)
+
+    replies = {}
+    selector = selectors.DefaultSelector()
+    selector.register(control, selectors.EVENT_READ)
+    selector.register(wakeup_read, selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is control:
+                header, fds, _, _ = socket.recv_fds(control, MAX_HEADER, 4)
+                if not header:
+                    # The worker went away.
+                    return
+                pid, reply = fork_child(json.loads(header), fds)
+                if pid is not None:
+                    replies[pid] = reply
+            else:
+                while _drain(wakeup_read):
+                    pass
+                reap(replies)
+
+
+def fork_child(request, fds):
+    reply = socket.socket(fileno=fds[0])
+    try:
+        pid = os.fork()
+    except OSError as exc:
+        pid = None
+        _send(reply, {'error': str(exc)})
+    if pid == 0:
+        run_child(request, fds[1:])
+    for fd in fds[1:]:
+        os.close(fd)
+    if pid is None:
+        reply.close()
+        return None, None
+    _send(reply, {'pid': pid})
+    return pid, reply
+
+
+def run_child(request, fds):
+    """Turn the forked zygote into the submission's process; never returns."""
+    code = 1
+    try:
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        os.setsid()
+        for which, soft, hard in request['limits']:
+            resource.setrlimit(which, (soft, hard))
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        _close_inherited_fds()
+        os.chdir(request['cwd'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+        sys.argv = [request['script']]
+        sys.modules['random'].seed()
+        code = 0
+        runpy.run_path(request['script'], run_name='__main__')
+    except SystemExit as exc:
+        code = _exit_code(exc.code)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        os._exit(code)
+
+
+def reap(replies):
+    while True:
+        try:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        reply = replies.pop(pid, None)
+        if reply is not None:
+            _send(reply, {
+                'returncode': os.waitstatus_to_exitcode(status),
+                'cpu_time': usage.ru_utime + usage.ru_stime,
+                'max_rss': usage.ru_maxrss * 1024,
+            })
+            reply.close()
+
+
+def _exit_code(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _close_inherited_fds():
+    for name in os.listdir('/proc/self/fd'):
+        fd = int(name)
+        if fd > 2:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def _drain(fd):
+    try:
+        return os.read(fd, 4096)
+    except BlockingIOError:
+        return b''
+
+
+def _send(reply, message):
+    try:
+        reply.send(json.dumps(message).encode())
+    except OSError:
+        # The client gave up on this run; the child is still reaped.
+        pass
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]))
@@ -0,0 +1,94 @@
+from typing import List
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from ninja import Router
+
+from categories.models import Category
+from leaderboard.board import current_leaderboard
+from leaderboard.fastest import fastest
+from leaderboard.models import CategoryScore, DifficultyScore
+from leaderboard.schemas import (
+    FastestBoardSchema, LeaderboardEntrySchema, LeaderboardPageSchema,
+)
+from leaderboard.scores import ranking
+from questions.models import Difficulty, Question
+
+User = get_user_model()
+router = Router()
+
+MAX_PAGE = 100
+
+
+@router.get("/", response=LeaderboardPageSchema)
+def top(request, offset: int = 0, limit: int = 50):
+    """The global ranking from position ``offset``, best first."""
+    board = current_leaderboard()
+    return {'total': len(board), 'entries': entries(board.page(max(offset, 0), min(max(limit, 1), MAX_PAGE)))}
+
+
+@router.get("/users/{user_id}", response=LeaderboardEntrySchema)
+def user_rank(request, user_id: int):
+    ranked = current_leaderboard().rank(user_id)
+    if ranked is None:
+        raise Http404("User is not ranked")
+    rank, points, solved = ranked
+    return entries([(rank, user_id, points, solved)])[0]
+
+
+@router.get("/users/{user_id}/around", response=List[LeaderboardEntrySchema])
+def around_user(request, user_id: int, radius: int = 5):
+    """The users ranked just above and below ``user_id``."""
+    page = current_leaderboard().around(user_id, min(max(radius, 0), MAX_PAGE // 2))
+    if page is None:
+        raise Http404("User is not ranked")
+    return entries(page)
+
+
+@router.get("/categories/{category_id}", response=LeaderboardPageSchema)
+def category_board(request, category_id: int, offset: int = 0, limit: int = 50):
+    """Points earned from questions in one category, best first."""
+    get_object_or_404(Category, pk=category_id)
+    return board_page(ranking(CategoryScore, category_id), offset, limit)
+
+
+@router.get("/difficulties/{difficulty_id}", response=LeaderboardPageSchema)
+def difficulty_board(request, difficulty_id: int, offset: int = 0, limit: int = 50):
+    """Points earned from questions of one difficulty, best first."""
+    get_object_or_404(Difficulty, pk=difficulty_id)
+    return board_page(ranking(DifficultyScore, difficulty_id), offset, limit)
+
+
+@router.get("/questions/{question_id}/fastest", response=List[FastestBoardSchema])
+def fastest_solutions(request, question_id: int, language: str = None):
+    """The fastest accepted submissions to a question, per language."""
+    get_object_or_404(Question, pk=question_id)
+    boards = fastest(question_id, language)
+    user_ids = {entry[3] for entries in boards.values() for entry in entries}
+    usernames = dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'username'))
+    return [
+        {'language': language, 'entries': [
+            {'rank': rank, 'submission_id': submission_id, 'user_id': user_id,
+             'username': usernames.get(user_id, ''), 'execution_time': time, 'memory_used': memory}
+            for rank, (time, memory, submission_id, user_id) in enumerate(entries, 1)
+        ]}
+        for language, entries in boards.items()
+    ]
+
+
+def board_page(scores, offset, limit):
+    offset, limit = max(offset, 0), min(max(limit, 1), MAX_PAGE)
+    rows = scores.values_list('user_id', 'points', 'solved')[offset:offset + limit]
+    page = [(offset + i + 1, user_id, points, solved) for i, (user_id, points, solved) in enumerate(rows)]
+    return {'total': scores.count(), 'entries': entries(page)}
+
+
+def entries(page):
+    """Attach usernames to ``(rank, user_id, points, solved)`` rows with one query."""
+    usernames = dict(User.objects.filter(pk__in=[row[1] for row in page]).values_list('pk', 'username'))
+    return [
+        {'rank': rank, 'user_id': user_id, 'username': usernames.get(user_id, ''), 'total_points': points,
+         'problems_solved': solved}
+        for rank, user_id, points, solved in page
+    ]
@@ -0,0 +1,126 @@
+"""
+In-memory global leaderboard.
+
+Users are ordered by ``total_points``, then ``problems_solved``, then who
+reached their score first (``User.points_updated_at``), in an
+``IndexableSkipList``, so the rank of a user and the page at any rank cost
+O(log n) rather than a COUNT over the users table.
+
+Each process builds its board from the database on first use. Before
+answering, it re-reads the users whose ``points_updated_at`` moved since its
+last read, at most every ``LEADERBOARD_SYNC_INTERVAL`` seconds. It rebuilds
+from scratch every ``LEADERBOARD_REBUILD_INTERVAL`` seconds, which also
+drops deleted and deactivated users.
+"""
+import math
+import os
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .skiplist import IndexableSkipList
+
+User = get_user_model()
+FIELDS = ('pk', 'total_points', 'problems_solved', 'points_updated_at')
+
+
+def ranking_key(user_id, points, solved, updated_at):
+    return (-points, -solved, updated_at.timestamp() if updated_at else math.inf, user_id)
+
+
+class Leaderboard:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._list = IndexableSkipList()
+        self._built_at = self._synced_at = None
+        self._watermark = None
+
+    def rebuild(self):
+        started = timezone.now()
+        keys = {row[0]: ranking_key(*row) for row in User.objects.filter(is_active=True).values_list(*FIELDS)}
+        ranking = IndexableSkipList(keys.values())
+        with self._lock:
+            self._keys, self._list = keys, ranking
+            self._built_at = self._synced_at = time.monotonic()
+            self._watermark = started
+
+    def sync(self):
+        """Fold in users whose points changed since the last sync, or rebuild when due."""
+        now = time.monotonic()
+        if self._built_at is None or now - self._built_at > settings.LEADERBOARD_REBUILD_INTERVAL:
+            self.rebuild()
+            return
+        if now - self._synced_at < settings.LEADERBOARD_SYNC_INTERVAL:
+            return
+        started = timezone.now()
+        since = self._watermark - timedelta(seconds=settings.LEADERBOARD_SYNC_OVERLAP)
+        rows = list(User.objects.filter(points_updated_at__gte=since, is_active=True).values_list(*FIELDS))
+        with self._lock:
+            for row in rows:
+                self._place(row[0], ranking_key(*row))
+            self._synced_at, self._watermark = now, started
+
+    def update(self, user_id, points, solved, updated_at):
+        with self._lock:
+            self._place(user_id, ranking_key(user_id, points, solved, updated_at))
+
+    def discard(self, user_id):
+        with self._lock:
+            key = self._keys.pop(user_id, None)
+            if key is not None:
+                self._list.remove(key)
+
+    def __len__(self):
+        return len(self._list)
+
+    def rank(self, user_id):
+        """``(rank, points, solved)`` with rank 1-based, or None for unranked users."""
+        with self._lock:
+            key = self._keys.get(user_id)
+            if key is None:
+                return None
+            return self._list.rank(key) + 1, -key[0], -key[1]
+
+    def page(self, start, count):
+        """``(rank, user_id, points, solved)`` for ``count`` users from 0-based position ``start``."""
+        with self._lock:
+            keys = self._list.slice(start, count)
+        return [(start + i + 1, key[3], -key[0], -key[1]) for i, key in enumerate(keys)]
+
+    def around(self, user_id, radius):
+        """The page of up to ``radius`` users either side of ``user_id``, or None if unranked."""
+        ranked = self.rank(user_id)
+        if ranked is None:
+            return None
+        start = max(ranked[0] - 1 - radius, 0)
+        return self.page(start, ranked[0] - start + radius)
+
+    def _place(self, user_id, key):
+        old = self._keys.get(user_id)
+        if old == key:
+            return
+        if old is not None:
+            self._list.remove(old)
+        self._list.insert(key)
+        self._keys[user_id] = key
+
+
+@lru_cache(maxsize=None)
+def get_leaderboard():
+    """The calling process's board, synced with the database."""
+    return Leaderboard()
+
+
+def current_leaderboard():
+    board = get_leaderboard()
+    board.sync()
+    return board
+
+
+os.register_at_fork(after_in_child=get_leaderboard.cache_clear)
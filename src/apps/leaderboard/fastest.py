@@ -0,0 +1,133 @@
+"""
+Per-question boards of the fastest accepted submissions in each language.
+
+A ``FastestSolutions`` row holds, for one (question, language), the best
+``FASTEST_SOLUTIONS_SIZE`` accepted submissions (one per user) as packed
+little-endian entries: CPU seconds (float32), peak MB (int32, -1 unknown),
+submission id and user id. That is 24 bytes per entry, sorted by time, then
+memory, then submission id. Recording a batch of verdicts reads and rewrites
+only the boards they touch. Reading a board decodes K entries and never
+scans submissions.
+
+A rejudge that takes away an acceptance does not remove the entry; run
+``rebuild_fastest`` afterwards.
+"""
+import heapq
+import struct
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from submissions.models import ArchivedSubmission, Submission
+
+from .models import FastestSolutions
+
+ENTRY = struct.Struct('<fiqq')
+
+
+def pack(entries):
+    return b''.join(
+        ENTRY.pack(time, -1 if memory is None else memory, submission_id, user_id)
+        for time, memory, submission_id, user_id in entries
+    )
+
+
+def unpack(data):
+    """``(execution_time, memory_used, submission_id, user_id)`` entries, fastest first."""
+    return [
+        (round(time, 4), None if memory < 0 else memory, submission_id, user_id)
+        for time, memory, submission_id, user_id in ENTRY.iter_unpack(bytes(data))
+    ]
+
+
+def rank_key(entry):
+    time, memory, submission_id, _ = entry
+    return (time, memory if memory is not None else float('inf'), submission_id)
+
+
+def merge(entries, candidates, size):
+    """The best ``size`` of both, keeping each user's fastest only."""
+    best = {}
+    for entry in sorted([*entries, *candidates], key=rank_key):
+        best.setdefault(entry[3], entry)
+    return sorted(best.values(), key=rank_key)[:size]
+
+
+def record_accepted(submissions):
+    """Offer freshly accepted submissions to their boards; call inside the verdict transaction."""
+    size = settings.FASTEST_SOLUTIONS_SIZE
+    candidates = defaultdict(list)
+    for submission in submissions:
+        if submission.status == 'accepted' and not submission.is_run and submission.execution_time is not None:
+            candidates[submission.question_id, submission.language].append(
+                (submission.execution_time, submission.memory_used, submission.pk, submission.user_id),
+            )
+    if not candidates:
+        return
+    boards = {
+        (board.question_id, board.language): board
+        for board in FastestSolutions.objects.select_for_update().filter(
+            question_id__in={question_id for question_id, _ in candidates},
+            language__in={language for _, language in candidates},
+        )
+    }
+    changed = []
+    for (question_id, language), offered in candidates.items():
+        board = boards.get((question_id, language))
+        # A rejudged submission replaces its old entry rather than competing with it.
+        rejudged = {entry[2] for entry in offered}
+        current = [entry for entry in unpack(board.entries) if entry[2] not in rejudged] if board else []
+        entries = pack(merge(current, offered, size))
+        if board is None or entries != bytes(board.entries):
+            changed.append(FastestSolutions(question_id=question_id, language=language, entries=entries))
+    FastestSolutions.objects.bulk_create(
+        changed, update_conflicts=True, unique_fields=['question', 'language'], update_fields=['entries'],
+    )
+
+
+def fastest(question_id, language=None):
+    """``{language: entries}`` for a question, in language order."""
+    boards = FastestSolutions.objects.filter(question_id=question_id).order_by('language')
+    if language is not None:
+        boards = boards.filter(language=language)
+    return {board.language: unpack(board.entries) for board in boards}
+
+
+def rebuild_fastest(question_ids=None, batch_size=1000):
+    """
+    Recompute boards from accepted submissions, live and archived, in one
+    ordered pass; returns the number of boards.
+    """
+    size = settings.FASTEST_SOLUTIONS_SIZE
+    streams = []
+    for model, id_field in ((Submission, 'id'), (ArchivedSubmission, 'submission_id')):
+        accepted = model.objects.filter(status='accepted', is_run=False, execution_time__isnull=False)
+        if question_ids is not None:
+            accepted = accepted.filter(question_id__in=question_ids)
+        streams.append(
+            accepted.order_by(
+                'question_id', 'language', 'execution_time', F('memory_used').asc(nulls_last=True), id_field,
+            )
+            .values_list('question_id', 'language', 'execution_time', 'memory_used', id_field, 'user_id')
+            .iterator(chunk_size=batch_size)
+        )
+    boards, current, key = [], None, None
+    rows = heapq.merge(*streams, key=lambda row: (row[0], row[1], *rank_key(row[2:])))
+    for question_id, language, *entry in rows:
+        if (question_id, language) != key:
+            key, current = (question_id, language), {}
+            boards.append((key, current))
+        if len(current) < size:
+            current.setdefault(entry[3], tuple(entry))
+    with transaction.atomic():
+        stale = FastestSolutions.objects.all()
+        if question_ids is not None:
+            stale = stale.filter(question_id__in=question_ids)
+        stale.delete()
+        FastestSolutions.objects.bulk_create([
+            FastestSolutions(question_id=question_id, language=language, entries=pack(entries.values()))
+            for (question_id, language), entries in boards
+        ], batch_size=batch_size)
+    return len(boards)
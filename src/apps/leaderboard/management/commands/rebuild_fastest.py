@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from leaderboard.fastest import rebuild_fastest
+
+
+class Command(BaseCommand):
+    help = "Recompute every question's fastest-solutions boards from accepted submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--question', type=int, action='append', dest='questions')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_fastest(options['questions'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} fastest-solutions boards"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from leaderboard.scores import rebuild_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-category and per-difficulty leaderboards from solved UserProgress"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} scoreboard rows"))
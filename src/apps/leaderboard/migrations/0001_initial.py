@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('questions', '0005_question_test_case_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('solved', models.IntegerField(default=0)),
+                ('achieved_at', models.DateTimeField(blank=True, null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='categories.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', '-points', '-solved', 'achieved_at'], name='category_score_rank_idx')],
+                'unique_together': {('category', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DifficultyScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('solved', models.IntegerField(default=0)),
+                ('achieved_at', models.DateTimeField(blank=True, null=True)),
+                ('difficulty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='questions.difficulty')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['difficulty', '-points', '-solved', 'achieved_at'], name='difficulty_score_rank_idx')],
+                'unique_together': {('difficulty', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0001_initial'),
+        ('questions', '0005_question_test_case_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FastestSolutions',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=20)),
+                ('entries', models.BinaryField(default=bytes)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fastest_solutions', to='questions.question')),
+            ],
+            options={
+                'unique_together': {('question', 'language')},
+            },
+        ),
+    ]
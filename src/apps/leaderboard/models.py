@@ -0,0 +1,56 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class Score(models.Model):
+    """A user's standing within one group of questions, kept up to date as problems are solved"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    points = models.IntegerField(default=0)
+    solved = models.IntegerField(default=0)
+    achieved_at = models.DateTimeField(null=True, blank=True)  # last solve; earlier wins a tie
+
+    class Meta:
+        abstract = True
+
+
+class CategoryScore(Score):
+    category = models.ForeignKey('categories.Category', on_delete=models.CASCADE, related_name='scores')
+
+    class Meta:
+        unique_together = ['category', 'user']
+        indexes = [
+            models.Index(fields=['category', '-points', '-solved', 'achieved_at'], name='category_score_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.category_id}: {self.points}"
+
+
+class DifficultyScore(Score):
+    difficulty = models.ForeignKey('questions.Difficulty', on_delete=models.CASCADE, related_name='scores')
+
+    class Meta:
+        unique_together = ['difficulty', 'user']
+        indexes = [
+            models.Index(
+                fields=['difficulty', '-points', '-solved', 'achieved_at'], name='difficulty_score_rank_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.difficulty_id}: {self.points}"
+
+
+class FastestSolutions(models.Model):
+    """The fastest accepted submissions to a question in one language (see leaderboard.fastest)"""
+    question = models.ForeignKey('questions.Question', on_delete=models.CASCADE, related_name='fastest_solutions')
+    language = models.CharField(max_length=20)
+    entries = models.BinaryField(default=bytes, editable=False)
+
+    class Meta:
+        unique_together = ['question', 'language']
+
+    def __str__(self):
+        return f"Fastest {self.language} solutions to {self.question_id}"
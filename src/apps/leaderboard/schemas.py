@@ -0,0 +1,29 @@
+from ninja import Schema
+from typing import Optional, List
+
+
+class LeaderboardEntrySchema(Schema):
+    rank: int
+    user_id: int
+    username: str
+    total_points: int
+    problems_solved: int
+
+
+class LeaderboardPageSchema(Schema):
+    total: int
+    entries: List[LeaderboardEntrySchema]
+
+
+class FastestSolutionSchema(Schema):
+    rank: int
+    submission_id: int
+    user_id: int
+    username: str
+    execution_time: float
+    memory_used: Optional[int] = None
+
+
+class FastestBoardSchema(Schema):
+    language: str
+    entries: List[FastestSolutionSchema]
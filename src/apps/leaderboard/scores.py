@@ -0,0 +1,84 @@
+"""
+Per-category and per-difficulty standings.
+
+``CategoryScore`` and ``DifficultyScore`` hold each user's points and solved
+count within one category or difficulty. They change only when a user solves
+a question for the first time (``progress.signals.problems_solved``). Each
+batch of solves costs one insert of any missing rows and one ``F()`` UPDATE
+per distinct increment, so concurrent judge engines add up rather than
+overwrite each other. ``achieved_at`` is the latest ``first_solved_at`` among
+the user's solves in the group, as ``rebuild_scores`` computes it. A page of a ranking is a range scan of the
+``(group, -points, -solved, achieved_at)`` index.
+
+Standings are not lowered when a rejudge takes a solve away; run
+``rebuild_scoreboards`` afterwards, as for any backfill.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from progress.models import UserProgress
+
+from .models import CategoryScore, DifficultyScore
+
+BOARDS = (
+    (CategoryScore, 'category_id', 'question__category_id'),
+    (DifficultyScore, 'difficulty_id', 'question__difficulty_id'),
+)
+
+
+def record_solves(solves):
+    """Add ``(user_id, question, points, first_solved_at)`` first solves to every board."""
+    for model, group_field, _ in BOARDS:
+        deltas = defaultdict(lambda: [0, 0, None])
+        for user_id, question, points, solved_at in solves:
+            delta = deltas[getattr(question, group_field), user_id]
+            delta[0] += points
+            delta[1] += 1
+            delta[2] = solved_at if delta[2] is None else max(delta[2], solved_at)
+        model.objects.bulk_create(
+            [model(user_id=user_id, **{group_field: group_id}) for group_id, user_id in deltas],
+            ignore_conflicts=True,
+        )
+        by_delta = defaultdict(list)
+        for (group_id, user_id), (points, solved, solved_at) in deltas.items():
+            by_delta[group_id, points, solved, solved_at].append(user_id)
+        for (group_id, points, solved, solved_at), user_ids in by_delta.items():
+            model.objects.filter(user_id__in=user_ids, **{group_field: group_id}).update(
+                points=F('points') + points, solved=F('solved') + solved,
+                # A rejudge can accept a submission older than the user's other solves.
+                achieved_at=Greatest(Coalesce('achieved_at', solved_at), solved_at),
+            )
+
+
+def ranking(model, group_id):
+    """The board of one category or difficulty, best first."""
+    group_field = next(field for board, field, _ in BOARDS if board is model)
+    return model.objects.filter(**{group_field: group_id}).order_by('-points', '-solved', 'achieved_at', 'user_id')
+
+
+def rebuild_scores(batch_size=1000):
+    """Recompute every board from solved UserProgress with one grouped query each; returns rows written."""
+    written = 0
+    for model, group_field, progress_field in BOARDS:
+        rows = (
+            UserProgress.objects.filter(status='solved')
+            .values('user_id', progress_field)
+            .annotate(points=Sum('points_earned'), solved=Count('id'), achieved_at=Max('first_solved_at'))
+            .order_by()
+        )
+        with transaction.atomic():
+            model.objects.all().delete()
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(model(
+                    user_id=row['user_id'], points=row['points'] or 0, solved=row['solved'],
+                    achieved_at=row['achieved_at'], **{group_field: row[progress_field]},
+                ))
+                if len(batch) >= batch_size:
+                    written += len(model.objects.bulk_create(batch))
+                    batch = []
+            written += len(model.objects.bulk_create(batch))
+    return written
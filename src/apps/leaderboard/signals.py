@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from progress.signals import problems_solved
+
+from .board import get_leaderboard
+from .scores import record_solves
+
+
+@receiver(post_delete, sender=get_user_model())
+def drop_deleted_user(sender, instance, **kwargs):
+    """Other processes drop the user at their next full rebuild."""
+    get_leaderboard().discard(instance.pk)
+
+
+@receiver(problems_solved)
+def update_scoreboards(sender, solves, **kwargs):
+    record_solves(solves)
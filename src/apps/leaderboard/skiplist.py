@@ -0,0 +1,131 @@
+"""
+An indexable skip list: a sorted collection of unique keys with O(log n)
+insert, remove, rank-of-key and key-at-rank.
+
+Every forward link records how many bottom-level nodes it skips, so walking
+towards a key sums the ranks passed and walking towards a rank follows the
+widths. Node levels are drawn with probability 1/2 per level.
+"""
+import random
+
+MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level
+
+
+class IndexableSkipList:
+    def __init__(self, keys=(), seed=None):
+        self._random = random.Random(seed)
+        self._head = _Node(None, MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+        for key in sorted(keys):
+            self.insert(key)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    def _random_level(self):
+        level = 1
+        while level < MAX_LEVEL and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def _path(self, key):
+        """The last node before ``key`` on every level, and its rank (1-based; the head is 0)."""
+        update, ranks = [None] * MAX_LEVEL, [0] * MAX_LEVEL
+        node, rank = self._head, 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key < key:
+                rank += node.width[level]
+                node = node.next[level]
+            update[level], ranks[level] = node, rank
+        return update, ranks
+
+    def insert(self, key):
+        update, ranks = self._path(key)
+        following = update[0].next[0]
+        if following is not None and following.key == key:
+            raise KeyError(f"{key!r} is already in the skip list")
+        level = self._random_level()
+        for i in range(self._level, level):
+            update[i], ranks[i] = self._head, 0
+            self._head.width[i] = self._size + 1
+        self._level = max(self._level, level)
+
+        node = _Node(key, level)
+        rank = ranks[0] + 1
+        for i in range(level):
+            before = update[i]
+            node.next[i], before.next[i] = before.next[i], node
+            skipped = rank - ranks[i]
+            node.width[i] = before.width[i] - skipped + 1
+            before.width[i] = skipped
+        for i in range(level, self._level):
+            update[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        update, _ = self._path(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for i in range(self._level):
+            if update[i].next[i] is node:
+                update[i].width[i] += node.width[i] - 1
+                update[i].next[i] = node.next[i]
+            else:
+                update[i].width[i] -= 1
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+
+    def rank(self, key):
+        """0-based position of ``key``."""
+        update, ranks = self._path(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        return ranks[0]
+
+    def __getitem__(self, index):
+        """The key at 0-based position ``index``."""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        node, remaining = self._head, index + 1
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node.key
+
+    def slice(self, start, count):
+        """Up to ``count`` keys from position ``start``: O(log n + count)."""
+        if count <= 0 or start >= self._size:
+            return []
+        start = max(start, 0)
+        node, remaining = self._head, start + 1
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
@@ -0,0 +1,187 @@
+import bisect
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from categories.models import Category
+from common.testing import QuestionTestData, make_user
+from leaderboard.board import get_leaderboard
+from leaderboard.fastest import fastest, record_accepted
+from leaderboard.models import CategoryScore, DifficultyScore
+from leaderboard.skiplist import IndexableSkipList
+from progress.services import apply_verdicts
+from questions.models import Difficulty
+from submissions.models import Submission
+
+User = get_user_model()
+
+
+class SkipListTests(SimpleTestCase):
+    def test_matches_a_sorted_list(self):
+        rng = random.Random(7)
+        skiplist, reference = IndexableSkipList(seed=7), []
+        for _ in range(3000):
+            if reference and rng.random() < 0.4:
+                key = reference.pop(rng.randrange(len(reference)))
+                skiplist.remove(key)
+            else:
+                key = rng.randrange(10000)
+                if key in reference:
+                    continue
+                bisect.insort(reference, key)
+                skiplist.insert(key)
+        self.assertEqual(list(skiplist), reference)
+        for index in range(0, len(reference), 37):
+            self.assertEqual(skiplist[index], reference[index])
+            self.assertEqual(skiplist.rank(reference[index]), index)
+            self.assertEqual(skiplist.slice(index, 4), reference[index:index + 4])
+        with self.assertRaises(KeyError):
+            skiplist.insert(reference[0])
+
+
+@override_settings(LEADERBOARD_SYNC_INTERVAL=0)
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.users = [
+            make_user(
+                name, total_points=points, problems_solved=solved,
+                points_updated_at=now - timedelta(minutes=minutes_ago),
+            )
+            for name, points, solved, minutes_ago in [
+                ('ada', 100, 5, 10), ('bob', 100, 5, 20), ('cy', 100, 7, 5), ('dee', 40, 2, 1), ('eve', 0, 0, 1),
+            ]
+        ]
+
+    def setUp(self):
+        get_leaderboard.cache_clear()
+        self.addCleanup(get_leaderboard.cache_clear)
+
+    def test_ties_break_on_solved_then_earliest(self):
+        response = self.client.get('/api/leaderboard/', {'limit': 3}).json()
+        self.assertEqual(response['total'], 5)
+        self.assertEqual([entry['username'] for entry in response['entries']], ['cy', 'bob', 'ada'])
+        self.assertEqual([entry['rank'] for entry in response['entries']], [1, 2, 3])
+
+    def test_rank_and_neighbours(self):
+        ada = self.users[0]
+        self.assertEqual(self.client.get(f'/api/leaderboard/users/{ada.pk}').json()['rank'], 3)
+        around = self.client.get(f'/api/leaderboard/users/{ada.pk}/around', {'radius': 1}).json()
+        self.assertEqual([entry['username'] for entry in around], ['bob', 'ada', 'dee'])
+        self.assertEqual(self.client.get('/api/leaderboard/users/999999').status_code, 404)
+
+    def test_picks_up_point_changes(self):
+        self.client.get('/api/leaderboard/')
+        dee = self.users[3]
+        User.objects.filter(pk=dee.pk).update(total_points=500, points_updated_at=timezone.now())
+        self.assertEqual(self.client.get(f'/api/leaderboard/users/{dee.pk}').json()['rank'], 1)
+        with self.assertNumQueries(0):
+            get_leaderboard().rank(dee.pk)
+
+
+class ScoreboardTests(QuestionTestData):
+    username = 'ada'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.ada, cls.bob = cls.user, make_user('bob')
+        cls.math, cls.easy = cls.category, cls.difficulty
+        cls.graphs = Category.objects.create(name='Graphs', slug='graphs')
+        cls.hard = Difficulty.objects.create(name='Hard', level=3, points=30)
+        cls.questions = [
+            cls.question, cls.make_question('gcd', difficulty=cls.hard), cls.make_question('bfs', category=cls.graphs),
+        ]
+
+    def solve(self, user, question, created_at=None):
+        submission = Submission.objects.create(
+            user=user, question=question, code='', language='python', status='accepted',
+            points_earned=question.difficulty.points, passed_test_cases=1,
+        )
+        if created_at is not None:
+            Submission.objects.filter(pk=submission.pk).update(created_at=created_at)
+            submission.refresh_from_db()
+        apply_verdicts([(submission, True)])
+
+    def board(self, url):
+        return [(entry['username'], entry['total_points']) for entry in self.client.get(url).json()['entries']]
+
+    def test_solves_update_category_and_difficulty_boards(self):
+        sum_, gcd, bfs = self.questions
+        self.solve(self.ada, sum_)
+        self.solve(self.bob, gcd)
+        self.solve(self.bob, bfs)
+        self.solve(self.ada, sum_)  # solving again earns nothing more
+        # A rejudge accepting an old submission must not pull the board's last solve back.
+        self.solve(self.ada, bfs, created_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(self.board(f'/api/leaderboard/categories/{self.math.pk}'), [('bob', 30), ('ada', 10)])
+        self.assertEqual(self.board(f'/api/leaderboard/categories/{self.graphs.pk}'), [('ada', 10), ('bob', 10)])
+        self.assertEqual(self.board(f'/api/leaderboard/difficulties/{self.easy.pk}'), [('ada', 20), ('bob', 10)])
+        self.assertEqual(self.client.get('/api/leaderboard/categories/999999').status_code, 404)
+
+        before = {
+            model: sorted(model.objects.values_list('user_id', 'points', 'solved', 'achieved_at'))
+            for model in (CategoryScore, DifficultyScore)
+        }
+        call_command('rebuild_scoreboards', stdout=io.StringIO())
+        for model, rows in before.items():
+            self.assertEqual(sorted(model.objects.values_list('user_id', 'points', 'solved', 'achieved_at')), rows)
+
+
+@override_settings(FASTEST_SOLUTIONS_SIZE=3)
+class FastestSolutionsTests(QuestionTestData):
+    username = 'ada'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.users = [cls.user] + [make_user(name) for name in ('bob', 'cy', 'di')]
+
+    def accept(self, user, time, memory, language='python'):
+        submission = Submission.objects.create(
+            user=user, question=self.question, code='', language=language, status='accepted',
+            execution_time=time, memory_used=memory,
+        )
+        record_accepted([submission])
+        return submission
+
+    def board(self, language='python'):
+        return [(user_id, time, memory) for time, memory, _, user_id in fastest(self.question.pk)[language]]
+
+    def test_keeps_each_users_fastest_up_to_the_limit(self):
+        ada, bob, cy, di = self.users
+        self.accept(ada, 0.5, 10)
+        self.accept(bob, 0.25, 12)
+        self.accept(cy, 0.25, 8)  # ties on time break on memory
+        self.accept(ada, 0.125, 10)  # replaces ada's slower entry
+        self.accept(di, 0.75, 4)  # does not make the board
+        self.accept(di, 0.0625, 4, language='cpp')
+        self.assertEqual(
+            self.board(), [(ada.pk, 0.125, 10), (cy.pk, 0.25, 8), (bob.pk, 0.25, 12)],
+        )
+        self.assertEqual(self.board('cpp'), [(di.pk, 0.0625, 4)])
+
+        before = fastest(self.question.pk)
+        call_command('rebuild_fastest', stdout=io.StringIO())
+        self.assertEqual(fastest(self.question.pk), before)
+
+        response = self.client.get(f'/api/leaderboard/questions/{self.question.pk}/fastest?language=python')
+        self.assertEqual(
+            [(entry['rank'], entry['username']) for entry in response.json()[0]['entries']],
+            [(1, 'ada'), (2, 'cy'), (3, 'bob')],
+        )
+
+    def test_rejudged_submission_replaces_its_entry(self):
+        ada, bob = self.users[:2]
+        submission = self.accept(ada, 0.125, 10)
+        self.accept(bob, 0.25, 10)
+        submission.execution_time = 0.5
+        record_accepted([submission])
+        self.assertEqual(self.board(), [(bob.pk, 0.25, 10), (ada.pk, 0.5, 10)])
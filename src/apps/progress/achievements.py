@@ -0,0 +1,196 @@
+"""
+Award achievements from the counters that cross their thresholds.
+
+Every achievement criterion is a threshold on one per-user metric:
+
+- ``'problems_solved'`` and ``'points'``: ``User.problems_solved`` and
+  ``total_points``;
+- ``'streak'``: the user's current daily streak;
+- ``('category', id)``: problems solved in a category. An achievement with
+  ``required_category`` counts ``required_problems_solved`` (default 1) in
+  that category instead of overall.
+
+``AchievementIndex`` keeps, per metric, the thresholds of every achievement
+that uses it in sorted order. When a user's metric moves from ``old`` to
+``new``, two bisections find exactly the achievements whose threshold lies in
+``(old, new]``; those whose other criteria also hold are awarded with one
+bulk insert. Achievements without criteria are only ever awarded by hand.
+"""
+import time
+from datetime import timedelta
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .activity import current_streak
+from .models import Achievement, UserAchievement, UserActivity, UserProgress
+
+User = get_user_model()
+
+
+def criteria(achievement):
+    """``{metric: threshold}`` for an achievement; empty if it has no criteria."""
+    thresholds = {}
+    if achievement.required_category_id:
+        thresholds['category', achievement.required_category_id] = achievement.required_problems_solved or 1
+    elif achievement.required_problems_solved:
+        thresholds['problems_solved'] = achievement.required_problems_solved
+    if achievement.required_points:
+        thresholds['points'] = achievement.required_points
+    if achievement.required_streak:
+        thresholds['streak'] = achievement.required_streak
+    return thresholds
+
+
+class AchievementIndex:
+    def __init__(self, achievements):
+        self.criteria = {achievement.pk: criteria(achievement) for achievement in achievements}
+        entries = defaultdict(list)
+        for achievement_id, thresholds in self.criteria.items():
+            for metric, threshold in thresholds.items():
+                entries[metric].append((threshold, achievement_id))
+        self._thresholds, self._achievements = {}, {}
+        for metric, pairs in entries.items():
+            pairs.sort()
+            self._thresholds[metric] = [threshold for threshold, _ in pairs]
+            self._achievements[metric] = [achievement_id for _, achievement_id in pairs]
+
+    def metrics(self):
+        return self._thresholds.keys()
+
+    def crossed(self, metric, old, new):
+        """Ids of the achievements with a threshold on ``metric`` in ``(old, new]``."""
+        thresholds = self._thresholds.get(metric)
+        if not thresholds or new <= old:
+            return []
+        return self._achievements[metric][bisect_right(thresholds, old):bisect_right(thresholds, new)]
+
+    def satisfied(self, achievement_id, stats):
+        return all(stats.get(metric, 0) >= threshold for metric, threshold in self.criteria[achievement_id].items())
+
+
+_index = (0.0, None)
+
+
+def get_index():
+    """The achievement index, rebuilt when achievements change or after ``ACHIEVEMENT_INDEX_TTL`` seconds."""
+    global _index
+    built_at, index = _index
+    if index is None or time.monotonic() - built_at > settings.ACHIEVEMENT_INDEX_TTL:
+        index = AchievementIndex(Achievement.objects.only(
+            'required_problems_solved', 'required_points', 'required_streak', 'required_category',
+        ))
+        _index = (time.monotonic(), index)
+    return index
+
+
+def invalidate_index():
+    global _index
+    _index = (0.0, None)
+
+
+def load_stats(user_ids, metrics):
+    """``{user_id: {metric: value}}`` for the given metrics, in at most three queries."""
+    stats = defaultdict(dict)
+    if {'problems_solved', 'points'} & set(metrics):
+        for user_id, solved, points in User.objects.filter(pk__in=user_ids).values_list(
+            'pk', 'problems_solved', 'total_points',
+        ):
+            stats[user_id].update(problems_solved=solved, points=points)
+    categories = [metric[1] for metric in metrics if isinstance(metric, tuple)]
+    if categories:
+        rows = (
+            UserProgress.objects.filter(user_id__in=user_ids, status='solved', question__category_id__in=categories)
+            .values('user_id', 'question__category_id')
+            .annotate(solved=Count('id'))
+        )
+        for row in rows:
+            stats[row['user_id']]['category', row['question__category_id']] = row['solved']
+    if 'streak' in metrics:
+        for activity in UserActivity.objects.filter(user_id__in=user_ids).only(
+            'user_id', 'last_active_day', 'current_streak',
+        ):
+            stats[activity.user_id]['streak'] = current_streak(activity)
+    return stats
+
+
+def award(changes):
+    """
+    Award what ``{user_id: {metric: (old, new)}}`` changes earned.
+
+    Only achievements with a threshold crossed by a change are checked; their
+    other criteria are checked against the users' current counters. Returns
+    the number of ``(user, achievement)`` pairs considered for insertion.
+    """
+    index = get_index()
+    candidates = {}
+    for user_id, moved in changes.items():
+        crossed = {
+            achievement_id
+            for metric, (old, new) in moved.items()
+            for achievement_id in index.crossed(metric, old, new)
+        }
+        if crossed:
+            candidates[user_id] = crossed
+    if not candidates:
+        return 0
+    needed = {
+        metric
+        for ids in candidates.values()
+        for achievement_id in ids
+        for metric in index.criteria[achievement_id]
+    }
+    stats = load_stats(list(candidates), needed)
+    earned = [
+        UserAchievement(user_id=user_id, achievement_id=achievement_id)
+        for user_id, ids in candidates.items()
+        for achievement_id in sorted(ids)
+        if index.satisfied(achievement_id, stats[user_id])
+    ]
+    UserAchievement.objects.bulk_create(earned, ignore_conflicts=True)
+    return len(earned)
+
+
+def backfill(achievement, batch_size=1000):
+    """Award ``achievement`` to every user who already meets it, set-based; returns the number awarded."""
+    thresholds = criteria(achievement)
+    if not thresholds:
+        return 0
+    users = User.objects.exclude(achievements__achievement=achievement)
+    for metric, threshold in thresholds.items():
+        if metric == 'problems_solved':
+            users = users.filter(problems_solved__gte=threshold)
+        elif metric == 'points':
+            users = users.filter(total_points__gte=threshold)
+        elif metric == 'streak':
+            users = users.filter(pk__in=streak_at_least(threshold))
+        else:
+            users = users.annotate(
+                category_solved=Count(
+                    'progress', filter=Q(progress__status='solved', progress__question__category_id=metric[1]),
+                ),
+            ).filter(category_solved__gte=threshold)
+
+    awarded, batch = 0, []
+    for user_id in users.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size):
+        batch.append(UserAchievement(user_id=user_id, achievement=achievement))
+        if len(batch) >= batch_size:
+            awarded += _insert(batch)
+    return awarded + _insert(batch)
+
+
+def streak_at_least(days):
+    """Ids of users whose current streak is at least ``days``."""
+    yesterday = timezone.localdate() - timedelta(days=1)
+    return UserActivity.objects.filter(current_streak__gte=days, last_active_day__gte=yesterday).values('user_id')
+
+
+def _insert(batch):
+    UserAchievement.objects.bulk_create(batch, ignore_conflicts=True)
+    count = len(batch)
+    batch.clear()
+    return count
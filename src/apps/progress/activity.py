@@ -0,0 +1,165 @@
+"""
+Per-user daily activity as a bitset, for streaks and heatmaps.
+
+``UserActivity.days`` has one bit per calendar day from ``start_day``
+onwards (bit ``i`` of byte ``i // 8``, least significant first), set when
+the user had a submission accepted that day. A year of history is 46 bytes.
+The current and longest streaks and the last active day are kept next to
+it and updated in constant time as days are added in order. A day before
+the last active one, such as from a rejudge, recomputes both streaks from
+the bitset instead. Nothing here reads the submissions tables except
+``rebuild_activity``.
+"""
+import heapq
+from datetime import timedelta
+
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from submissions.models import ArchivedSubmission, Submission
+
+from .models import UserActivity
+
+ACTIVITY_FIELDS = ['start_day', 'days', 'last_active_day', 'current_streak', 'longest_streak', 'updated_at']
+
+
+def has_day(activity, day):
+    offset = (day - activity.start_day).days
+    return 0 <= offset < len(activity.days) * 8 and bool(activity.days[offset // 8] & (1 << offset % 8))
+
+
+def add_day(activity, day):
+    """Mark ``day`` active; returns False if it already was."""
+    if activity.start_day is None:
+        activity.start_day, activity.days = day, b''
+    if has_day(activity, day):
+        return False
+    if day < activity.start_day:
+        # Grow to the front a whole byte at a time so existing bits keep their positions.
+        pad = -(-(activity.start_day - day).days // 8)
+        activity.start_day -= timedelta(days=pad * 8)
+        activity.days = bytes(pad) + bytes(activity.days)
+    offset = (day - activity.start_day).days
+    days = bytearray(activity.days)
+    if offset // 8 >= len(days):
+        days.extend(bytes(offset // 8 + 1 - len(days)))
+    days[offset // 8] |= 1 << offset % 8
+    activity.days = bytes(days)
+
+    last = activity.last_active_day
+    if last is None or day == last + timedelta(days=1):
+        activity.current_streak += 1
+        activity.last_active_day = day
+    elif day > last:
+        activity.current_streak = 1
+        activity.last_active_day = day
+    else:
+        activity.current_streak, activity.longest_streak = _streaks(activity)
+    activity.longest_streak = max(activity.longest_streak, activity.current_streak)
+    return True
+
+
+def current_streak(activity, today=None):
+    """Consecutive active days ending today, or yesterday if today has no activity yet."""
+    today = today or timezone.localdate()
+    if activity.last_active_day is None or (today - activity.last_active_day).days > 1:
+        return 0
+    return activity.current_streak
+
+
+def active_days(activity, start, end):
+    """The active days in ``[start, end]``, in order, for a calendar heatmap."""
+    if activity.start_day is None:
+        return []
+    first = max((start - activity.start_day).days, 0)
+    last = min((end - activity.start_day).days, len(activity.days) * 8 - 1)
+    return [
+        activity.start_day + timedelta(days=offset)
+        for offset in range(first, last + 1)
+        if activity.days[offset // 8] & (1 << offset % 8)
+    ]
+
+
+def record_days(user_days):
+    """
+    Add ``(user_id, day)`` pairs to the users' activity in two queries.
+
+    Returns ``{user_id: (old_streak, new_streak)}`` for users whose streak
+    went up, the old one as of the first day added.
+    """
+    user_days = sorted(set(user_days))
+    if not user_days:
+        return {}
+    activities = {
+        activity.user_id: activity
+        for activity in UserActivity.objects.filter(user_id__in={user_id for user_id, _ in user_days})
+    }
+    before, changed = {}, {}
+    for user_id, day in user_days:
+        activity = activities.get(user_id)
+        if activity is None:
+            activity = activities[user_id] = UserActivity(user_id=user_id)
+        before.setdefault(user_id, current_streak(activity, day))
+        if add_day(activity, day):
+            changed[user_id] = activity
+    _write(list(changed.values()))
+    return {
+        user_id: (before[user_id], activity.current_streak)
+        for user_id, activity in changed.items()
+        if activity.current_streak > before[user_id]
+    }
+
+
+def rebuild_activity(user_ids=None, batch_size=1000):
+    """
+    Recompute every user's activity from their accepted submissions, live
+    and archived; returns the number of users.
+    """
+    streams = []
+    for model, submitted_at in ((Submission, 'created_at'), (ArchivedSubmission, 'submitted_at')):
+        accepted = model.objects.filter(status='accepted', is_run=False)
+        if user_ids is not None:
+            accepted = accepted.filter(user_id__in=user_ids)
+        streams.append(
+            accepted.annotate(day=TruncDate(submitted_at))
+            .values_list('user_id', 'day')
+            .distinct()
+            .order_by('user_id', 'day')
+            .iterator(chunk_size=batch_size)
+        )
+    batch, current, written = [], None, 0
+    # add_day ignores a day both tables have.
+    for user_id, day in heapq.merge(*streams):
+        if current is None or current.user_id != user_id:
+            if len(batch) >= batch_size:
+                written += _write(batch)
+                batch = []
+            current = UserActivity(user_id=user_id)
+            batch.append(current)
+        add_day(current, day)
+    return written + _write(batch)
+
+
+def _streaks(activity):
+    """``(current, longest)`` streaks from the bitset, current ending on the last active day."""
+    longest = run = 0
+    for offset in range(len(activity.days) * 8):
+        if activity.days[offset // 8] & (1 << offset % 8):
+            run += 1
+            longest = max(longest, run)
+        else:
+            run = 0
+    last = (activity.last_active_day - activity.start_day).days
+    current = 0
+    while last - current >= 0 and activity.days[(last - current) // 8] & (1 << (last - current) % 8):
+        current += 1
+    return current, longest
+
+
+def _write(activities):
+    if not activities:
+        return 0
+    UserActivity.objects.bulk_create(
+        activities, update_conflicts=True, unique_fields=['user'], update_fields=ACTIVITY_FIELDS,
+    )
+    return len(activities)
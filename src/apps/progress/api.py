@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from ninja import Router
+
+from progress.activity import active_days, current_streak
+from progress.models import UserActivity
+from progress.schemas import ActivitySchema
+
+User = get_user_model()
+router = Router()
+
+
+@router.get("/{user_id}/activity", response=ActivitySchema)
+def user_activity(request, user_id: int, start: Optional[date] = None, end: Optional[date] = None):
+    """
+    A user's streaks and the days they had a submission accepted between
+    ``start`` and ``end`` (default: the last year), for a calendar heatmap.
+    """
+    get_object_or_404(User, pk=user_id)
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=364)
+    activity = UserActivity.objects.filter(user_id=user_id).first() or UserActivity(user_id=user_id)
+    return {
+        'user_id': user_id,
+        'current_streak': current_streak(activity),
+        'longest_streak': activity.longest_streak,
+        'last_active_day': activity.last_active_day,
+        'active_days': active_days(activity, start, end),
+    }
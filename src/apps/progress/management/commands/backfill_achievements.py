@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from progress.achievements import backfill
+from progress.models import Achievement
+
+
+class Command(BaseCommand):
+    help = "Award achievements to every user who already meets their criteria, e.g. after adding one"
+
+    def add_arguments(self, parser):
+        parser.add_argument('achievement_ids', nargs='*', type=int, help="Defaults to every achievement")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        achievements = Achievement.objects.order_by('pk')
+        if options['achievement_ids']:
+            achievements = achievements.filter(pk__in=options['achievement_ids'])
+        for achievement in achievements:
+            awarded = backfill(achievement, batch_size=options['batch_size'])
+            self.stdout.write(f"{achievement}: awarded to {awarded} users")
+        self.stdout.write(self.style.SUCCESS("Done"))
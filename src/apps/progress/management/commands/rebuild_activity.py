@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from progress.activity import rebuild_activity
+
+
+class Command(BaseCommand):
+    help = "Recompute users' daily activity bitsets and streaks from their accepted submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', metavar='USER_ID',
+                            help="Only rebuild this user; repeatable")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_activity(user_ids=options['user_ids'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the activity of {written} users"))
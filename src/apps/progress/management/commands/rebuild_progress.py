@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from progress.services import rebuild_progress
+
+
+class Command(BaseCommand):
+    help = "Recompute UserProgress and user totals from submissions with set-based queries, for backfills"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--question', type=int, action='append', dest='question_ids', metavar='QUESTION_ID',
+                            help="Only rebuild this question; repeatable")
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', metavar='USER_ID',
+                            help="Only rebuild this user; repeatable")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        written = rebuild_progress(
+            question_ids=options['question_ids'], user_ids=options['user_ids'], batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} progress rows"))
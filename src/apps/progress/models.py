@@ -1,7 +1,7 @@
 
 from django.db import models
 from django.contrib.auth import get_user_model
-from apps.common.models import TimestampedModel
+from common.models import TimestampedModel
 
 User = get_user_model()
 
@@ -70,3 +70,16 @@ class UserAchievement(TimestampedModel):
 
     def __str__(self):
         return f"{self.user.username} - {self.achievement.name}"
+
+
+class UserActivity(TimestampedModel):
+    """Days a user had a submission accepted, as a bitset (see progress.activity)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='activity')
+    start_day = models.DateField(null=True, blank=True)  # the day of bit 0
+    days = models.BinaryField(default=bytes, editable=False)
+    last_active_day = models.DateField(null=True, blank=True)
+    current_streak = models.IntegerField(default=0)  # ending on last_active_day
+    longest_streak = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.current_streak} day streak"
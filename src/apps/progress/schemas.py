@@ -0,0 +1,11 @@
+from ninja import Schema
+from datetime import date
+from typing import Optional, List
+
+
+class ActivitySchema(Schema):
+    user_id: int
+    current_streak: int
+    longest_streak: int
+    last_active_day: Optional[date] = None
+    active_days: List[date]
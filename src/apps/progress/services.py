@@ -0,0 +1,299 @@
+"""Keep UserProgress and the per-user totals derived from it in step with submissions."""
+import heapq
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from submissions.models import ArchivedSubmission, Submission
+
+from . import achievements, signals
+from .activity import record_days
+from .models import UserProgress
+
+User = get_user_model()
+
+PROGRESS_FIELDS = ['status', 'attempts', 'best_submission', 'points_earned', 'first_solved_at', 'updated_at']
+# A verdict can only move progress up this order; rejudges that lower it rebuild instead.
+STATUS_RANK = {'not_started': 0, 'in_progress': 1, 'partially_solved': 2, 'solved': 3}
+
+
+def progress_status(solved, partial):
+    if solved:
+        return 'solved'
+    if partial:
+        return 'partially_solved'
+    return 'in_progress'
+
+
+def apply_verdicts(verdicts):
+    """
+    Fold freshly judged submissions into UserProgress and the user totals.
+
+    ``verdicts`` are ``(submission, first)`` pairs, ``first`` being False
+    for a rejudge, which does not count as another attempt. Missing
+    progress rows are inserted first, so that every affected row exists to
+    be locked; the rows are then read ``FOR UPDATE`` in one query, updated in
+    memory in submission order and written back with one bulk upsert. A
+    concurrent batch touching the same rows waits for this transaction
+    rather than folding into a stale copy of them. Each user's
+    ``total_points`` and ``problems_solved`` then move by the difference,
+    with ``F()`` updates grouped by delta, ``problems_solved`` is sent for
+    the questions newly solved, accepted submissions mark their day in the
+    users' activity and any achievements earned are awarded.
+    Call it inside the transaction that records the verdicts.
+    """
+    if not verdicts:
+        return
+    pairs = {(submission.user_id, submission.question_id) for submission, _ in verdicts}
+    UserProgress.objects.bulk_create(
+        [UserProgress(user_id=user_id, question_id=question_id) for user_id, question_id in sorted(pairs)],
+        ignore_conflicts=True,
+    )
+    current = {
+        (row['user_id'], row['question_id']): row
+        for row in UserProgress.objects.select_for_update(of=('self',)).filter(
+            user_id__in={user_id for user_id, _ in pairs}, question_id__in={question_id for _, question_id in pairs},
+        ).order_by('pk').values(
+            'user_id', 'question_id', *PROGRESS_FIELDS[:-1],
+            best_points=F('best_submission__points_earned'),
+            best_passed=F('best_submission__passed_test_cases'),
+            best_created_at=F('best_submission__created_at'),
+        )
+        if (row['user_id'], row['question_id']) in pairs
+    }
+
+    progress, before, questions = {}, {}, {}
+    for submission, first in sorted(verdicts, key=lambda verdict: verdict[0].pk):
+        key = (submission.user_id, submission.question_id)
+        questions[key] = submission.question
+        row = progress.get(key)
+        if row is None:
+            row = progress[key] = current[key]
+            before[key] = (row['points_earned'], row['status'] == 'solved')
+        _fold(row, submission, first)
+
+    _upsert([
+        UserProgress(
+            user_id=user_id, question_id=question_id, status=row['status'], attempts=row['attempts'],
+            best_submission_id=row['best_submission'], points_earned=row['points_earned'],
+            first_solved_at=row['first_solved_at'],
+        )
+        for (user_id, question_id), row in progress.items()
+    ])
+
+    # Per user, how far each achievement metric moved.
+    deltas = defaultdict(lambda: defaultdict(int))
+    solves = []
+    for key, row in progress.items():
+        points, solved = before[key]
+        newly_solved = (row['status'] == 'solved') - solved
+        deltas[key[0]]['points'] += row['points_earned'] - points
+        deltas[key[0]]['problems_solved'] += newly_solved
+        deltas[key[0]]['category', questions[key].category_id] += newly_solved
+        if newly_solved > 0:
+            solves.append((key[0], questions[key], row['points_earned'] - points, row['first_solved_at']))
+    by_delta = defaultdict(list)
+    for user_id, moved in deltas.items():
+        if moved['points'] or moved['problems_solved']:
+            by_delta[moved['points'], moved['problems_solved']].append(user_id)
+    now = timezone.now()
+    for (points, solved), user_ids in by_delta.items():
+        User.objects.filter(pk__in=user_ids).update(
+            total_points=F('total_points') + points, problems_solved=F('problems_solved') + solved,
+            points_updated_at=now,
+        )
+    if solves:
+        signals.problems_solved.send(sender=UserProgress, solves=solves)
+    streaks = record_days(
+        (submission.user_id, timezone.localdate(submission.created_at))
+        for submission, _ in verdicts if submission.status == 'accepted'
+    )
+    for user_id, (old, new) in streaks.items():
+        deltas[user_id]['streak'] += new - old
+    award_achievements(deltas)
+
+
+def award_achievements(deltas):
+    """Award achievements for ``{user_id: {metric: delta}}``; only indexed metrics that went up are read."""
+    index = achievements.get_index()
+    moved = {
+        user_id: {metric: delta for metric, delta in user_deltas.items() if delta > 0 and metric in index.metrics()}
+        for user_id, user_deltas in deltas.items()
+    }
+    moved = {user_id: user_deltas for user_id, user_deltas in moved.items() if user_deltas}
+    if not moved:
+        return 0
+    stats = achievements.load_stats(list(moved), {metric for user_deltas in moved.values() for metric in user_deltas})
+    return achievements.award({
+        user_id: {
+            metric: (stats[user_id].get(metric, 0) - delta, stats[user_id].get(metric, 0))
+            for metric, delta in user_deltas.items()
+        }
+        for user_id, user_deltas in moved.items()
+    })
+
+
+def _fold(row, submission, first):
+    if first:
+        row['attempts'] += 1
+    status = progress_status(submission.status == 'accepted', submission.passed_test_cases > 0)
+    if STATUS_RANK[status] > STATUS_RANK[row['status']]:
+        row['status'] = status
+    row['points_earned'] = max(row['points_earned'], submission.points_earned)
+    if submission.status == 'accepted' and (
+        row['first_solved_at'] is None or submission.created_at < row['first_solved_at']
+    ):
+        row['first_solved_at'] = submission.created_at
+    # Same order as rebuild_progress: most points, most cases passed, earliest.
+    rank = (-submission.points_earned, -submission.passed_test_cases, submission.created_at, submission.pk)
+    if row['best_submission'] is None or rank < (
+        -row['best_points'], -row['best_passed'], row['best_created_at'], row['best_submission'],
+    ):
+        row['best_submission'] = submission.pk
+        row['best_points'], row['best_passed'] = submission.points_earned, submission.passed_test_cases
+        row['best_created_at'] = submission.created_at
+
+
+def rebuild_progress(question_ids=None, user_ids=None, batch_size=500):
+    """
+    Recompute UserProgress from Submission and ArchivedSubmission with
+    grouped queries.
+
+    One aggregate query per table, both ordered by (user, question), is
+    merged and streamed in batches and written back with a bulk upsert; the
+    affected users' ``total_points`` and ``problems_solved`` are then
+    recomputed with correlated subqueries, ``batch_size`` users per UPDATE.
+    Archived submissions count as attempts and solves; the best submission
+    is never archived. Returns the number of progress rows.
+    """
+    submissions = Submission.objects.filter(is_run=False)
+    archived = ArchivedSubmission.objects.filter(is_run=False)
+    if question_ids is not None:
+        submissions = submissions.filter(question_id__in=question_ids)
+        archived = archived.filter(question_id__in=question_ids)
+    if user_ids is not None:
+        submissions = submissions.filter(user_id__in=user_ids)
+        archived = archived.filter(user_id__in=user_ids)
+
+    best = (
+        Submission.objects.filter(user_id=OuterRef('user_id'), question_id=OuterRef('question_id'), is_run=False)
+        .order_by('-points_earned', '-passed_test_cases', 'created_at', 'id')
+        .values('id')[:1]
+    )
+    rows = (
+        submissions.values('user_id', 'question_id')
+        .annotate(
+            attempts=Count('id'),
+            solved=Count('id', filter=Q(status='accepted')),
+            partial=Count('id', filter=Q(passed_test_cases__gt=0)),
+            points=Max('points_earned'),
+            first_solved_at=Min('created_at', filter=Q(status='accepted')),
+            best_submission_id=Subquery(best),
+        )
+        .order_by('user_id', 'question_id')
+    )
+    archived_rows = (
+        archived.values('user_id', 'question_id')
+        .annotate(
+            attempts=Count('id'),
+            solved=Count('id', filter=Q(status='accepted')),
+            partial=Count('id', filter=Q(passed_test_cases__gt=0)),
+            points=Max('points_earned'),
+            first_solved_at=Min('submitted_at', filter=Q(status='accepted')),
+        )
+        .order_by('user_id', 'question_id')
+    )
+    merged = groupby(
+        heapq.merge(
+            rows.iterator(chunk_size=batch_size), archived_rows.iterator(chunk_size=batch_size),
+            key=itemgetter('user_id', 'question_id'),
+        ),
+        key=itemgetter('user_id', 'question_id'),
+    )
+
+    batch, users, written = [], set(), 0
+    for _, group in merged:
+        row = _combine(group)
+        batch.append(UserProgress(
+            user_id=row['user_id'],
+            question_id=row['question_id'],
+            status=progress_status(row['solved'], row['partial']),
+            attempts=row['attempts'],
+            best_submission_id=row['best_submission_id'],
+            points_earned=row['points'] or 0,
+            first_solved_at=row['first_solved_at'],
+        ))
+        users.add(row['user_id'])
+        if len(batch) >= batch_size:
+            written += _upsert(batch)
+    written += _upsert(batch)
+
+    refresh_user_totals(sorted(users), batch_size=batch_size)
+    return written
+
+
+def _combine(rows):
+    """One (user, question) aggregate from its live and archived parts."""
+    row = {'best_submission_id': None}
+    for part in rows:
+        if not row.get('attempts'):
+            row.update(part)
+            continue
+        row['attempts'] += part['attempts']
+        row['solved'] += part['solved']
+        row['partial'] += part['partial']
+        row['points'] = max(row['points'] or 0, part['points'] or 0)
+        solved_at = [when for when in (row['first_solved_at'], part['first_solved_at']) if when is not None]
+        row['first_solved_at'] = min(solved_at, default=None)
+        row['best_submission_id'] = row['best_submission_id'] or part.get('best_submission_id')
+    return row
+
+
+def refresh_user_totals(user_ids, batch_size=500):
+    """
+    Set total_points/problems_solved from UserProgress for the given users.
+
+    ``points_updated_at`` is stamped only on users whose totals changed,
+    so leaderboards pick them up while everyone else keeps their place
+    among ties.
+    """
+    progress = UserProgress.objects.filter(user_id=OuterRef('pk')).order_by().values('user_id')
+    total_points = Coalesce(
+        Subquery(progress.annotate(total=Sum('points_earned')).values('total'), output_field=IntegerField()),
+        Value(0),
+    )
+    solved = Coalesce(
+        Subquery(progress.filter(status='solved').annotate(total=Count('id')).values('total'),
+                 output_field=IntegerField()),
+        Value(0),
+    )
+    now = timezone.now()
+    for start in range(0, len(user_ids), batch_size):
+        # SET expressions all see the row as it was, so the stamp compares old totals with new.
+        User.objects.filter(pk__in=user_ids[start:start + batch_size]).update(
+            total_points=total_points,
+            problems_solved=solved,
+            points_updated_at=Case(
+                When(Q(total_points=total_points) & Q(problems_solved=solved), then=F('points_updated_at')),
+                default=Value(now),
+            ),
+        )
+
+
+def _upsert(batch):
+    if not batch:
+        return 0
+    UserProgress.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['user', 'question'],
+        update_fields=PROGRESS_FIELDS,
+    )
+    count = len(batch)
+    batch.clear()
+    return count
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .achievements import invalidate_index
+from .models import Achievement
+
+# Sent by apply_verdicts inside the verdict transaction with
+# ``solves=[(user_id, question, points, first_solved_at), ...]`` for
+# questions users solved for the first time.
+problems_solved = Signal()
+
+
+@receiver([post_save, post_delete], sender=Achievement)
+def rebuild_achievement_index(sender, instance, **kwargs):
+    """Other processes pick the change up within ACHIEVEMENT_INDEX_TTL seconds."""
+    invalidate_index()
@@ -1,3 +1,258 @@
-from django.test import TestCase
+import io
+import threading
+import time
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from categories.models import Category
+from common.testing import QuestionTestData, make_question, make_user
+from progress import achievements
+from progress.activity import active_days, add_day, current_streak
+from progress.models import Achievement, UserAchievement, UserActivity, UserProgress
+from progress import services
+from progress.services import apply_verdicts, rebuild_progress
+from questions.models import Difficulty
+from submissions.models import Submission
+
+
+class ProgressTestData(QuestionTestData):
+    def submit(self, question, status, **fields):
+        return Submission.objects.create(
+            user=self.user, question=question, code='', language='python', status=status,
+            points_earned=10 if status == 'accepted' else 0, **fields,
+        )
+
+
+class RebuildProgressTests(ProgressTestData):
+    def test_rebuild_from_submissions(self):
+        self.submit(self.question, 'wrong_answer', passed_test_cases=1)
+        accepted = self.submit(self.question, 'accepted', passed_test_cases=2)
+        other = self.make_question('product')
+        self.submit(other, 'wrong_answer')
+
+        self.assertEqual(rebuild_progress(), 2)
+
+        solved = UserProgress.objects.get(user=self.user, question=self.question)
+        self.assertEqual((solved.status, solved.attempts, solved.points_earned), ('solved', 2, 10))
+        self.assertEqual(solved.best_submission, accepted)
+        self.assertEqual(solved.first_solved_at, accepted.created_at)
+        self.assertEqual(UserProgress.objects.get(question=other).status, 'in_progress')
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.total_points, self.user.problems_solved), (10, 1))
+
+    def test_rebuild_updates_existing_rows(self):
+        accepted = self.submit(self.question, 'accepted')
+        rebuild_progress()
+        Submission.objects.filter(pk=accepted.pk).update(status='wrong_answer', points_earned=0)
+
+        rebuild_progress(question_ids=[self.question.pk])
+        self.assertEqual(UserProgress.objects.get(question=self.question).status, 'in_progress')
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.total_points, self.user.problems_solved), (0, 0))
+
+    def test_rebuild_stamps_only_users_whose_totals_changed(self):
+        self.submit(self.question, 'accepted')
+        rebuild_progress()
+        self.user.refresh_from_db()
+        stamped = self.user.points_updated_at
+        self.assertIsNotNone(stamped)
+
+        rebuild_progress(question_ids=[self.question.pk])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points_updated_at, stamped)
+
+
+class ApplyVerdictsTests(ProgressTestData):
+    def setUp(self):
+        achievements.invalidate_index()
+        self.addCleanup(achievements.invalidate_index)
+
+    def test_matches_a_rebuild(self):
+        other = self.make_question('product')
+        verdicts = [
+            (self.submit(self.question, 'wrong_answer', passed_test_cases=1), True),
+            (self.submit(self.question, 'accepted', passed_test_cases=2), True),
+            (self.submit(self.question, 'accepted', passed_test_cases=2), True),
+            (self.submit(other, 'wrong_answer'), True),
+        ]
+        achievements.get_index()
+        # Progress, totals, scoreboards and activity: a fixed count whatever the batch size.
+        with self.assertNumQueries(10):
+            apply_verdicts(verdicts[:2])
+        apply_verdicts(verdicts[2:])
+        incremental = list(UserProgress.objects.order_by('question_id').values(
+            'question_id', 'status', 'attempts', 'best_submission', 'points_earned', 'first_solved_at',
+        ))
+        self.user.refresh_from_db()
+        totals = (self.user.total_points, self.user.problems_solved)
+
+        UserProgress.objects.all().delete()
+        call_command('rebuild_progress', stdout=io.StringIO())
+        self.assertEqual(incremental, list(UserProgress.objects.order_by('question_id').values(
+            'question_id', 'status', 'attempts', 'best_submission', 'points_earned', 'first_solved_at',
+        )))
+        self.assertEqual(incremental[0]['best_submission'], verdicts[1][0].pk)
+        self.user.refresh_from_db()
+        self.assertEqual(totals, (self.user.total_points, self.user.problems_solved))
+        self.assertEqual(totals, (10, 1))
+
+    def test_rejudge_is_not_another_attempt(self):
+        submission = self.submit(self.question, 'wrong_answer')
+        apply_verdicts([(submission, True)])
+        Submission.objects.filter(pk=submission.pk).update(status='accepted', points_earned=10)
+        submission.refresh_from_db()
+        apply_verdicts([(submission, False)])
+
+        progress = UserProgress.objects.get(user=self.user, question=self.question)
+        self.assertEqual((progress.status, progress.attempts, progress.points_earned), ('solved', 1, 10))
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.total_points, self.user.problems_solved), (10, 1))
+
+
+class ConcurrentVerdictsTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("separate connections cannot share an in-memory test database")
+        self.user = make_user('solver')
+        self.question = make_question(
+            'sum', category=Category.objects.create(name='Math', slug='math'),
+            difficulty=Difficulty.objects.create(name='Easy', level=1), created_by=self.user,
+        )
+
+    def submit(self, status):
+        return Submission.objects.create(
+            user=self.user, question=self.question, code='', language='python', status=status,
+            points_earned=10 if status == 'accepted' else 0, passed_test_cases=int(status == 'accepted'),
+        )
+
+    def test_interleaved_batches_both_count(self):
+        first, second = [(self.submit(status), True) for status in ('wrong_answer', 'accepted')]
+        folding, fold = threading.Event(), services._fold
+        errors = []
+
+        def slow_fold(row, submission, is_first):
+            # The first batch has read its rows: start the second, and give it
+            # time to read them too, before this one writes them back.
+            if submission.pk == first[0].pk:
+                folding.set()
+                time.sleep(0.5)
+            fold(row, submission, is_first)
+
+        def apply(batch, wait=None):
+            try:
+                if wait:
+                    wait.wait()
+                with transaction.atomic():
+                    apply_verdicts([batch])
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=apply, args=(first,)), threading.Thread(target=apply, args=(second, folding)),
+        ]
+        with mock.patch.object(services, '_fold', slow_fold):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        progress = UserProgress.objects.get(user=self.user, question=self.question)
+        self.assertEqual((progress.status, progress.attempts, progress.points_earned), ('solved', 2, 10))
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.total_points, self.user.problems_solved), (10, 1))
+
+class AchievementTests(ProgressTestData):
+    def setUp(self):
+        achievements.invalidate_index()
+        self.addCleanup(achievements.invalidate_index)
+
+    def achieve(self, name, **criteria):
+        return Achievement.objects.create(name=name, description='', icon='star', **criteria)
+
+    def earned(self):
+        return set(UserAchievement.objects.filter(user=self.user).values_list('achievement__name', flat=True))
+
+    def test_index_finds_only_crossed_thresholds(self):
+        first = self.achieve('first', required_problems_solved=1)
+        five = self.achieve('five', required_problems_solved=5)
+        points = self.achieve('points', required_points=100)
+        index = achievements.AchievementIndex([first, five, points])
+        self.assertEqual(index.crossed('problems_solved', 0, 1), [first.pk])
+        self.assertEqual(index.crossed('problems_solved', 1, 4), [])
+        self.assertEqual(index.crossed('problems_solved', 0, 9), [first.pk, five.pk])
+        self.assertEqual(index.crossed('points', 50, 100), [points.pk])
+
+    def test_verdicts_award_achievements_they_earn(self):
+        self.achieve('first', required_problems_solved=1)
+        self.achieve('five', required_problems_solved=5)
+        self.achieve('math', required_category=self.category)
+        self.achieve('rich', required_points=10, required_problems_solved=2)
+        other = self.make_question('product')
+
+        apply_verdicts([(self.submit(self.question, 'accepted'), True)])
+        self.assertEqual(self.earned(), {'first', 'math'})
+        apply_verdicts([(self.submit(other, 'accepted'), True)])
+        self.assertEqual(self.earned(), {'first', 'math', 'rich'})
+
+    def test_backfill_awards_users_who_already_qualify(self):
+        self.submit(self.question, 'accepted')
+        rebuild_progress()
+        self.achieve('first', required_problems_solved=1)
+        self.achieve('math', required_category=self.category, required_problems_solved=2)
+        out = io.StringIO()
+        call_command('backfill_achievements', stdout=out)
+        self.assertIn('first: awarded to 1 users', out.getvalue())
+        self.assertEqual(self.earned(), {'first'})
+
+
+class ActivityTests(ProgressTestData):
+    def setUp(self):
+        achievements.invalidate_index()
+        self.addCleanup(achievements.invalidate_index)
+
+    def test_streaks_from_the_bitset(self):
+        start = date(2026, 3, 1)
+        activity = UserActivity(user=self.user)
+        for offset in (0, 1, 2, 5):
+            add_day(activity, start + timedelta(days=offset))
+        self.assertEqual((activity.current_streak, activity.longest_streak), (1, 3))
+        self.assertFalse(add_day(activity, start + timedelta(days=5)))
+
+        # A day filled in behind the last active one.
+        add_day(activity, start + timedelta(days=4))
+        self.assertEqual((activity.current_streak, activity.longest_streak), (2, 3))
+        add_day(activity, start - timedelta(days=10))
+        self.assertEqual(
+            active_days(activity, start - timedelta(days=30), start + timedelta(days=1)),
+            [start - timedelta(days=10), start, start + timedelta(days=1)],
+        )
+        self.assertEqual(current_streak(activity, today=start + timedelta(days=6)), 2)
+        self.assertEqual(current_streak(activity, today=start + timedelta(days=7)), 0)
+        self.assertLessEqual(len(activity.days), 3)
+
+    def test_accepted_verdicts_extend_the_streak_and_award_it(self):
+        Achievement.objects.create(name='daily', description='', icon='fire', required_streak=1)
+        apply_verdicts([(self.submit(self.question, 'wrong_answer'), True)])
+        self.assertFalse(UserActivity.objects.exists())
+        apply_verdicts([(self.submit(self.question, 'accepted'), True)])
+
+        response = self.client.get(f'/api/progress/{self.user.pk}/activity').json()
+        self.assertEqual((response['current_streak'], response['longest_streak']), (1, 1))
+        self.assertEqual(response['active_days'], [timezone.localdate().isoformat()])
+        self.assertTrue(UserAchievement.objects.filter(user=self.user, achievement__name='daily').exists())
+
+    def test_rebuild_from_submissions(self):
+        for days_ago in (0, 1, 3):
+            submission = self.submit(self.question, 'accepted')
+            Submission.objects.filter(pk=submission.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        call_command('rebuild_activity', stdout=io.StringIO())
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertEqual((current_streak(activity), activity.longest_streak), (2, 2))
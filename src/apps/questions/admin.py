@@ -1,7 +1,36 @@
 from django.contrib import admin
 from .models import Difficulty, Question, TestCase, QuestionExample
 
+
+@admin.action(description="Rejudge all submissions")
+def rejudge_submissions(modeladmin, request, queryset):
+    from judge.rejudge import start_rejudge
+
+    runs = [start_rejudge(question) for question in queryset]
+    modeladmin.message_user(
+        request,
+        f"Started {len(runs)} rejudge run(s) covering {sum(run.total for run in runs)} submissions; "
+        "judge workers will queue and process them in the background.",
+    )
+
+
+@admin.register(Question)
+class QuestionAdmin(admin.ModelAdmin):
+    actions = [rejudge_submissions]
+
+
+@admin.register(TestCase)
+class TestCaseAdmin(admin.ModelAdmin):
+    readonly_fields = ['input_blob', 'expected_output_blob']
+    fieldsets = [
+        (None, {'fields': ['question', 'is_sample', 'is_hidden', 'points', 'explanation']}),
+        ('Data', {
+            'fields': ['input_data', 'input_blob', 'expected_output', 'expected_output_blob'],
+            'description': "Data over TEST_CASE_INLINE_MAX_BYTES is kept in the blob store under the digest shown, "
+                           "with the text left empty. Enter new text to replace it.",
+        }),
+    ]
+
+
 admin.site.register(Difficulty)
-admin.site.register(Question)
-admin.site.register(TestCase)
-admin.site.register(QuestionExample)
\ No newline at end of file
+admin.site.register(QuestionExample)
@@ -0,0 +1,120 @@
+from typing import List, Optional
+
+from django.db.models import Prefetch, Q
+from ninja import Query, Router
+
+from categories.models import Tag
+from common.pagination import decode_cursor, encode_cursor
+from questions.models import Question
+from questions.schemas import QuestionPageSchema, QuestionSearchSchema
+from questions.search import search
+from questions.tagindex import get_tag_index
+
+router = Router()
+
+MAX_PAGE = 100
+LIST_FIELDS = (
+    'id', 'title', 'slug', 'is_premium', 'is_active', 'total_submissions', 'successful_submissions', 'created_at',
+    'category__id', 'category__name', 'difficulty__id', 'difficulty__name', 'difficulty__points',
+)
+
+
+@router.get("/", response=QuestionPageSchema)
+def list_questions(
+    request,
+    category: Optional[int] = None,
+    difficulty: Optional[int] = None,
+    tags: List[int] = Query(None),
+    any_tags: List[int] = Query(None),
+    exclude_tags: List[int] = Query(None),
+    is_premium: Optional[bool] = None,
+    is_active: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+):
+    """
+    The question catalog, newest first.
+
+    A question must have all of ``tags``, at least one of ``any_tags`` and
+    none of ``exclude_tags``; tag filters are answered from the in-memory
+    tag index. Pages are keyed on ``(created_at, id)``: pass the previous
+    page's ``next_cursor`` to get the next one. Every page costs the same two
+    queries, however deep it is.
+    """
+    limit = max(1, min(limit, MAX_PAGE))
+    before = decode_cursor(cursor) if cursor else None
+    if tags or any_tags or exclude_tags:
+        index = get_tag_index()
+        ids = index.page(
+            index.select(tags or (), any_tags or (), exclude_tags or (), category, difficulty, is_premium, is_active),
+            before, limit + 1,
+        )
+        found = list_columns(Question.objects.all()).in_bulk(ids)
+        page = [found[pk] for pk in ids if pk in found]
+    else:
+        page = list(list_columns(catalog(category, difficulty, is_premium, is_active, before))[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1].created_at, page[limit - 1].pk) if len(page) > limit else None
+    return {'results': [summary(question) for question in page[:limit]], 'next_cursor': next_cursor}
+
+
+def catalog(category, difficulty, is_premium, is_active, before):
+    questions = Question.objects.filter(is_active=is_active)
+    if category is not None:
+        questions = questions.filter(category_id=category)
+    if difficulty is not None:
+        questions = questions.filter(difficulty_id=difficulty)
+    if is_premium is not None:
+        questions = questions.filter(is_premium=is_premium)
+    if before is not None:
+        created_at, pk = before
+        questions = questions.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    return questions.order_by('-created_at', '-id')
+
+
+@router.get("/search", response=QuestionSearchSchema)
+def search_questions(
+    request, q: str, category: Optional[int] = None, difficulty: Optional[int] = None, offset: int = 0,
+    limit: int = 20,
+):
+    """
+    Active questions whose title, description or problem statement contain
+    every word of ``q`` (the last may be a prefix), most relevant first, with
+    matches wrapped in ``<mark>``.
+    """
+    total, hits = search(q, category, difficulty, max(offset, 0), max(1, min(limit, MAX_PAGE)))
+    questions = list_columns(Question.objects.all()).in_bulk([pk for pk, *_ in hits])
+    return {
+        'total': total,
+        'results': [
+            {**summary(questions[pk]), 'score': score, 'title_highlight': title, 'snippet': snippet}
+            for pk, score, title, snippet in hits
+            if pk in questions
+        ],
+    }
+
+
+def list_columns(questions):
+    return (
+        questions.select_related('category', 'difficulty')
+        .only(*LIST_FIELDS)
+        .prefetch_related(Prefetch('tags', queryset=Tag.objects.only('slug').order_by('slug')))
+    )
+
+
+def summary(question):
+    return {
+        'id': question.pk,
+        'title': question.title,
+        'slug': question.slug,
+        'category_id': question.category_id,
+        'category': question.category.name,
+        'difficulty_id': question.difficulty_id,
+        'difficulty': question.difficulty.name,
+        'points': question.difficulty.points,
+        'tags': [tag.slug for tag in question.tags.all()],
+        'is_premium': question.is_premium,
+        'is_active': question.is_active,
+        'total_submissions': question.total_submissions,
+        'successful_submissions': question.successful_submissions,
+        'created_at': question.created_at,
+    }
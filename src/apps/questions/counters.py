@@ -0,0 +1,103 @@
+"""
+Write-behind counters for ``Question.total_submissions`` and
+``successful_submissions``.
+
+Bumping the counters on every verdict would make a popular question's row a
+hot spot that every judge worker updates, and on SQLite serialize them all.
+Instead each process adds its increments to a ``QuestionCounters`` in memory
+and flushes them every ``QUESTION_COUNTER_FLUSH_INTERVAL`` seconds, with one
+``F()`` UPDATE per distinct increment (usually one per question), so flushes
+from different processes add up rather than overwrite each other.
+
+Counts lag the truth by at most one flush interval per process, and
+increments not yet flushed are lost if a process dies. The
+``reconcile_question_counters`` command recomputes both counts from
+``Submission``.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import Question
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionCounters:
+    def __init__(self, interval=None):
+        self.interval = settings.QUESTION_COUNTER_FLUSH_INTERVAL if interval is None else interval
+        self._deltas = defaultdict(lambda: [0, 0])
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        self.pid = os.getpid()
+
+    def add(self, question_id, total=0, successful=0):
+        """Count a change to a question's submissions; written at the next flush."""
+        if not total and not successful:
+            return
+        with self._lock:
+            delta = self._deltas[question_id]
+            delta[0] += total
+            delta[1] += successful
+
+    def pending(self, question_id):
+        """``(total, successful)`` this process has counted but not flushed yet."""
+        with self._lock:
+            delta = self._deltas.get(question_id)
+            return tuple(delta) if delta else (0, 0)
+
+    def maybe_flush(self):
+        """Flush if the interval has passed since the last flush."""
+        if time.monotonic() - self._flushed_at >= self.interval:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """Write the pending increments; returns the number of questions updated."""
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(lambda: [0, 0])
+            self._flushed_at = time.monotonic()
+        by_delta = defaultdict(list)
+        for question_id, (total, successful) in deltas.items():
+            if total or successful:
+                by_delta[total, successful].append(question_id)
+        try:
+            for (total, successful), question_ids in by_delta.items():
+                Question.objects.filter(pk__in=question_ids).update(
+                    total_submissions=F('total_submissions') + total,
+                    successful_submissions=F('successful_submissions') + successful,
+                )
+        except Exception:
+            # Keep the increments for the next flush rather than dropping them.
+            for question_id, (total, successful) in deltas.items():
+                self.add(question_id, total, successful)
+            raise
+        return sum(len(question_ids) for question_ids in by_delta.values())
+
+
+@lru_cache(maxsize=None)
+def get_counters():
+    """The calling process's counters, flushed once more when it exits."""
+    counters = QuestionCounters()
+    atexit.register(_flush_at_exit, counters)
+    return counters
+
+
+def _flush_at_exit(counters):
+    if counters.pid != os.getpid():
+        return
+    try:
+        counters.flush()
+    except Exception:
+        logger.exception("Flushing question counters at exit failed")
+
+
+# A forked child must not flush increments its parent also holds.
+os.register_at_fork(after_in_child=get_counters.cache_clear)
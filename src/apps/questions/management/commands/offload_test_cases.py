@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from questions.models import TestCase
+
+
+class Command(BaseCommand):
+    help = "Move test case data larger than TEST_CASE_INLINE_MAX_BYTES into the blob store"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Only rows that could possibly exceed the limit once encoded.
+        threshold = settings.TEST_CASE_INLINE_MAX_BYTES // 4
+        candidates = (
+            TestCase.objects
+            .annotate(input_length=Length('input_data'), output_length=Length('expected_output'))
+            .filter(Q(input_length__gt=threshold) | Q(output_length__gt=threshold))
+            .order_by('id')
+        )
+
+        batch, moved = [], 0
+        for case in candidates.iterator(chunk_size=batch_size):
+            if case.offload_large_fields():
+                batch.append(case)
+            if len(batch) >= batch_size:
+                moved += self._flush(batch)
+        moved += self._flush(batch)
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} test cases into the blob store"))
+
+    def _flush(self, batch):
+        fields = [name for pair in TestCase.BLOB_FIELDS for name in pair]
+        TestCase.objects.bulk_update(batch, fields)
+        count = len(batch)
+        batch.clear()
+        return count
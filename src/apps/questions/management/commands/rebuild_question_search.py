@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from questions.search import check_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over question titles, descriptions and problem statements"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--optimize', action='store_true', help="Merge the index into a single b-tree afterwards")
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only check that the index and its triggers are intact; fail if they are not",
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            problems = check_index()
+            if problems is None:
+                raise CommandError("Full-text search needs SQLite's FTS5; this database has no search index")
+            if problems:
+                raise CommandError('\n'.join(problems))
+            self.stdout.write(self.style.SUCCESS("The question search index is intact"))
+            return
+        if not rebuild_index(optimize=options['optimize']):
+            raise CommandError("Full-text search needs SQLite's FTS5; this database has no search index")
+        self.stdout.write(self.style.SUCCESS("Rebuilt the question search index"))
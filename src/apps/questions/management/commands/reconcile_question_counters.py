@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from questions.models import Question
+from submissions.models import ArchivedSubmission, Submission
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Question.total_submissions and successful_submissions from judged submissions. "
+        "Increments judge engines have not flushed yet are applied on top, so run it while they are idle."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        counts = defaultdict(lambda: (0, 0))
+        # Archived submissions were judged long ago and still count.
+        for model in (Submission, ArchivedSubmission):
+            rows = (
+                model.objects.filter(is_run=False)
+                .exclude(status__in=('pending', 'running'))
+                .values('question_id')
+                .annotate(total=Count('id'), successful=Count('id', filter=Q(status='accepted')))
+                .order_by()
+            )
+            for row in rows:
+                total, successful = counts[row['question_id']]
+                counts[row['question_id']] = (total + row['total'], successful + row['successful'])
+
+        batch, fixed = [], 0
+        questions = Question.objects.only('total_submissions', 'successful_submissions').order_by('id')
+        for question in questions.iterator(chunk_size=options['batch_size']):
+            total, successful = counts[question.pk]
+            if (question.total_submissions, question.successful_submissions) != (total, successful):
+                question.total_submissions, question.successful_submissions = total, successful
+                batch.append(question)
+            if len(batch) >= options['batch_size']:
+                fixed += self._flush(batch)
+        fixed += self._flush(batch)
+        self.stdout.write(self.style.SUCCESS(f"Corrected the counters of {fixed} questions"))
+
+    def _flush(self, batch):
+        Question.objects.bulk_update(batch, ['total_submissions', 'successful_submissions'])
+        count = len(batch)
+        batch.clear()
+        return count
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='judge_policy',
+            field=models.CharField(blank=True, choices=[('', 'Default'), ('full', 'Run all test cases'), ('first_failure', 'Stop at first failing test case')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0002_question_judge_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testcase',
+            name='expected_output_blob',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='input_blob',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='testcase',
+            name='expected_output',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='testcase',
+            name='input_data',
+            field=models.TextField(blank=True),
+        ),
+    ]
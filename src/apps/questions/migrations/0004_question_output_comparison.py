@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0003_testcase_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='output_comparison',
+            field=models.CharField(choices=[('exact', 'Exact match'), ('whitespace', 'Ignore whitespace'), ('float', 'Numeric tolerance')], default='whitespace', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_question_output_comparison'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='test_case_version',
+            field=models.IntegerField(default=1),
+        ),
+    ]
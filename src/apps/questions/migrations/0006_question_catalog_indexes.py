@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('questions', '0005_question_test_case_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['is_active', '-created_at', '-id'], name='question_catalog_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['category', 'is_active', '-created_at', '-id'], name='question_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['difficulty', 'is_active', '-created_at', '-id'], name='question_difficulty_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+# SQLite cannot alter most columns in place, so a later migration that changes
+# questions_question there copies it into a new table and drops the old one,
+# and these triggers go with it, silently: the index then stops following
+# edits. Such a migration must run CREATE's trigger statements again; the
+# search tests and ``manage.py rebuild_question_search --check`` fail until it
+# does.
+CREATE = [
+    # External content: the index stores only tokens and reads text back from questions_question.
+    """
+    CREATE VIRTUAL TABLE questions_question_fts USING fts5(
+        title, description, problem_statement,
+        content='questions_question', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER questions_question_fts_insert AFTER INSERT ON questions_question BEGIN
+        INSERT INTO questions_question_fts(rowid, title, description, problem_statement)
+        VALUES (new.id, new.title, new.description, new.problem_statement);
+    END
+    """,
+    """
+    CREATE TRIGGER questions_question_fts_delete AFTER DELETE ON questions_question BEGIN
+        INSERT INTO questions_question_fts(questions_question_fts, rowid, title, description, problem_statement)
+        VALUES ('delete', old.id, old.title, old.description, old.problem_statement);
+    END
+    """,
+    # Only text edits touch the index, not counter flushes or status changes.
+    """
+    CREATE TRIGGER questions_question_fts_update
+    AFTER UPDATE OF title, description, problem_statement ON questions_question BEGIN
+        INSERT INTO questions_question_fts(questions_question_fts, rowid, title, description, problem_statement)
+        VALUES ('delete', old.id, old.title, old.description, old.problem_statement);
+        INSERT INTO questions_question_fts(rowid, title, description, problem_statement)
+        VALUES (new.id, new.title, new.description, new.problem_statement);
+    END
+    """,
+    "INSERT INTO questions_question_fts(questions_question_fts) VALUES ('rebuild')",
+]
+DROP = [
+    "DROP TRIGGER IF EXISTS questions_question_fts_update",
+    "DROP TRIGGER IF EXISTS questions_question_fts_delete",
+    "DROP TRIGGER IF EXISTS questions_question_fts_insert",
+    "DROP TABLE IF EXISTS questions_question_fts",
+]
+
+
+def create_index(apps, schema_editor):
+    # FTS5 is SQLite's; other backends search with a plain scan (see questions/search.py).
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0006_question_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
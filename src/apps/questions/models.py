@@ -1,7 +1,9 @@
 
 from django.db import models
 from django.contrib.auth import get_user_model
-from apps.common.models import TimestampedModel
+from django.conf import settings
+from common.models import TimestampedModel
+from .blobstore import get_blob_store
 
 User = get_user_model()
 
@@ -23,6 +25,17 @@ class Difficulty(models.Model):
 
 class Question(TimestampedModel):
     """Main question model"""
+    JUDGE_POLICY_CHOICES = [
+        ('', 'Default'),
+        ('full', 'Run all test cases'),
+        ('first_failure', 'Stop at first failing test case'),
+    ]
+    OUTPUT_COMPARISON_CHOICES = [
+        ('exact', 'Exact match'),
+        ('whitespace', 'Ignore whitespace'),
+        ('float', 'Numeric tolerance'),
+    ]
+
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     description = models.TextField()
@@ -47,36 +60,101 @@ class Question(TimestampedModel):
     hints = models.JSONField(default=list, blank=True)  # List of hints
     time_limit = models.IntegerField(default=5)  # seconds
     memory_limit = models.IntegerField(default=256)  # MB
+    judge_policy = models.CharField(max_length=20, choices=JUDGE_POLICY_CHOICES, blank=True)  # '' uses JUDGE_POLICY
+    test_case_version = models.IntegerField(default=1)  # bumped whenever a TestCase changes
+    output_comparison = models.CharField(max_length=20, choices=OUTPUT_COMPARISON_CHOICES, default='whitespace')
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the catalog walks (created_at, id) newest first.
+            models.Index(fields=['is_active', '-created_at', '-id'], name='question_catalog_idx'),
+            models.Index(fields=['category', 'is_active', '-created_at', '-id'], name='question_category_idx'),
+            models.Index(fields=['difficulty', 'is_active', '-created_at', '-id'], name='question_difficulty_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
     def success_rate(self):
-        if self.total_submissions == 0:
+        # Include this process's counts that have not been flushed yet.
+        from .counters import get_counters
+        pending_total, pending_successful = get_counters().pending(self.pk)
+        total = self.total_submissions + pending_total
+        if total == 0:
             return 0
-        return (self.successful_submissions / self.total_submissions) * 100
+        return ((self.successful_submissions + pending_successful) / total) * 100
 
 
 class TestCase(TimestampedModel):
     """Test cases for questions"""
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='test_cases')
-    input_data = models.TextField()
-    expected_output = models.TextField()
+    # Empty when the data lives in the blob store instead.
+    input_data = models.TextField(blank=True)
+    expected_output = models.TextField(blank=True)
     is_sample = models.BooleanField(default=False)  # Sample test cases shown to users
     is_hidden = models.BooleanField(default=True)  # Hidden test cases for evaluation
     points = models.IntegerField(default=1)
     explanation = models.TextField(blank=True)
 
+    # Large data lives in the blob store instead; the text field is then empty.
+    input_blob = models.CharField(max_length=64, blank=True, editable=False)  # SHA-256 digest
+    expected_output_blob = models.CharField(max_length=64, blank=True, editable=False)
+
+    BLOB_FIELDS = [('input_data', 'input_blob'), ('expected_output', 'expected_output_blob')]
+
     class Meta:
         ordering = ['is_sample', 'id']
 
     def __str__(self):
         return f"{self.question.title} - Test Case {self.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        case = super().from_db(db, field_names, values)
+        # What the text fields held when loaded, to tell edits from offloaded data.
+        case._loaded_text = {
+            field: getattr(case, field) for field, _ in cls.BLOB_FIELDS if field in case.__dict__
+        }
+        return case
+
+    def save(self, *args, **kwargs):
+        self.offload_large_fields()
+        super().save(*args, **kwargs)
+
+    def offload_large_fields(self):
+        """
+        Move text over TEST_CASE_INLINE_MAX_BYTES into the blob store, and
+        drop the blob of a field whose text was edited to fit inline.
+        """
+        changed = []
+        loaded = getattr(self, '_loaded_text', {})
+        for text_field, blob_field in self.BLOB_FIELDS:
+            value = getattr(self, text_field)
+            # A str never encodes to fewer bytes than it has characters.
+            if len(value) > settings.TEST_CASE_INLINE_MAX_BYTES // 4:
+                data = value.encode('utf-8')
+                if len(data) > settings.TEST_CASE_INLINE_MAX_BYTES:
+                    setattr(self, blob_field, get_blob_store().put(data))
+                    setattr(self, text_field, '')
+                    changed += [text_field, blob_field]
+                    continue
+            # A blob-backed field loads with empty text; that is not an edit.
+            edited = value != loaded[text_field] if text_field in loaded else bool(value)
+            if getattr(self, blob_field) and edited:
+                setattr(self, blob_field, '')
+                changed.append(blob_field)
+        return changed
+
+    @property
+    def input_path(self):
+        return get_blob_store().path(self.input_blob) if self.input_blob else None
+
+    @property
+    def expected_output_path(self):
+        return get_blob_store().path(self.expected_output_blob) if self.expected_output_blob else None
+
 
 class QuestionExample(TimestampedModel):
     """Examples to help users understand the question"""
@@ -0,0 +1,36 @@
+from ninja import Schema
+from datetime import datetime
+from typing import Optional, List
+
+
+class QuestionSummarySchema(Schema):
+    id: int
+    title: str
+    slug: str
+    category_id: int
+    category: str
+    difficulty_id: int
+    difficulty: str
+    points: int
+    tags: List[str]
+    is_premium: bool
+    is_active: bool
+    total_submissions: int
+    successful_submissions: int
+    created_at: datetime
+
+
+class QuestionPageSchema(Schema):
+    results: List[QuestionSummarySchema]
+    next_cursor: Optional[str] = None
+
+
+class QuestionSearchResultSchema(QuestionSummarySchema):
+    score: float
+    title_highlight: str
+    snippet: str
+
+
+class QuestionSearchSchema(Schema):
+    total: int
+    results: List[QuestionSearchResultSchema]
@@ -0,0 +1,121 @@
+"""
+Full-text search over question titles, descriptions and problem statements.
+
+On SQLite the ``questions_question_fts`` FTS5 table (created in migration
+0007) indexes the three columns and is kept in step with
+``questions_question`` by triggers, so saves, bulk updates and raw SQL all
+reach it. Matches are ranked by bm25 with title hits weighted highest, and
+come back with the title and the best matching passage highlighted.
+
+The triggers are lost whenever a migration remakes ``questions_question``;
+``check_index`` reports missing triggers and an index out of step.
+
+Other backends have no such index and fall back to a case-insensitive scan
+ordered by recency, without highlighting.
+"""
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+
+from .models import Question
+
+TABLE = 'questions_question_fts'
+TRIGGERS = ('questions_question_fts_insert', 'questions_question_fts_delete', 'questions_question_fts_update')
+# bm25 weights for title, description and problem_statement.
+WEIGHTS = (10.0, 2.0, 1.0)
+MARK = ('<mark>', '</mark>')
+SNIPPET_TOKENS = 16
+WORD = re.compile(r'\w+')
+
+
+def match_expression(text):
+    """An FTS5 query matching every word of ``text``, the last as a prefix; '' if there are none."""
+    words = WORD.findall(text)
+    if not words:
+        return ''
+    # Quoting each word keeps user input from being parsed as FTS5 syntax.
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search(text, category=None, difficulty=None, offset=0, limit=20):
+    """
+    Active questions matching ``text``, best first.
+
+    Returns ``(total, [(question_id, score, title, snippet)])``. On backends
+    without FTS5 the score is 0 and the title and snippet are not highlighted.
+    """
+    expression = match_expression(text)
+    if not expression:
+        return 0, []
+    if connection.vendor != 'sqlite':
+        return _scan(WORD.findall(text), category, difficulty, offset, limit)
+
+    where, params = [f'{TABLE} MATCH %s', 'q.is_active'], [expression]
+    if category is not None:
+        where.append('q.category_id = %s')
+        params.append(category)
+    if difficulty is not None:
+        where.append('q.difficulty_id = %s')
+        params.append(difficulty)
+    source = f"FROM {TABLE} JOIN questions_question q ON q.id = {TABLE}.rowid WHERE {' AND '.join(where)}"
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) {source}", params)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT q.id, bm25({TABLE}, %s, %s, %s) AS score, "
+            f"highlight({TABLE}, 0, %s, %s), snippet({TABLE}, -1, %s, %s, '…', %s) "
+            f"{source} ORDER BY score, q.id LIMIT %s OFFSET %s",
+            [*WEIGHTS, *MARK, *MARK, SNIPPET_TOKENS, *params, limit, offset],
+        )
+        # bm25 is lower for better matches; flip it so higher scores rank first.
+        return total, [(pk, -score, title, snippet) for pk, score, title, snippet in cursor.fetchall()]
+
+
+def rebuild_index(optimize=False):
+    """Re-tokenize every question into the FTS5 table; returns False where there is none."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+    return True
+
+
+def check_index():
+    """
+    What is wrong with the FTS5 table, one message per problem; None where there is none.
+
+    Checks that every trigger is still on ``questions_question`` and that the
+    index holds exactly the tokens of the questions' current text.
+    """
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'questions_question'")
+        present = {name for name, in cursor.fetchall()}
+        problems = [f"Trigger {name} is missing" for name in TRIGGERS if name not in present]
+        try:
+            with transaction.atomic():
+                # rank 1 also compares the index with the content table.
+                cursor.execute(f"INSERT INTO {TABLE}({TABLE}, rank) VALUES ('integrity-check', 1)")
+        except DatabaseError:
+            problems.append(f"{TABLE} is missing or out of step with questions_question")
+    return problems
+
+
+def _scan(words, category, difficulty, offset, limit):
+    questions = Question.objects.filter(is_active=True)
+    for word in words:
+        questions = questions.filter(
+            Q(title__icontains=word) | Q(description__icontains=word) | Q(problem_statement__icontains=word),
+        )
+    if category is not None:
+        questions = questions.filter(category_id=category)
+    if difficulty is not None:
+        questions = questions.filter(difficulty_id=difficulty)
+    page = questions.order_by('-created_at', '-id').values_list('id', 'title', 'description')[offset:offset + limit]
+    return questions.count(), [(pk, 0.0, title, description[:200]) for pk, title, description in page]
@@ -0,0 +1,24 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Question, TestCase
+from .tagindex import invalidate_tag_index
+
+
+@receiver([post_save, post_delete], sender=TestCase)
+def bump_test_case_version(sender, instance, **kwargs):
+    """Any change to a question's test cases invalidates verdicts judged against them."""
+    Question.objects.filter(pk=instance.question_id).update(test_case_version=F('test_case_version') + 1)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def rebuild_tag_index(sender, instance, **kwargs):
+    """Other processes pick the change up within QUESTION_TAG_INDEX_TTL seconds."""
+    invalidate_tag_index()
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def rebuild_tag_index_for_tags(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_tag_index()
@@ -0,0 +1,115 @@
+"""
+An in-memory inverted index for filtering the catalog by tags.
+
+Questions are numbered by their catalog position, oldest first by
+``(created_at, id)``. Every tag, category and difficulty, plus the premium
+and active flags, maps to a bitmap of positions held as a Python int, whose
+``&``, ``|`` and ``~`` run word by word in C. Any combination of "all of",
+"any of" and "none of" tags with the catalog's other filters is then a few
+bitwise operations. A page is read off the top of the result below the
+cursor's position, so only the page's ids are fetched from the database.
+
+The index is built on first use with two queries. It is rebuilt after
+``QUESTION_TAG_INDEX_TTL`` seconds, or as soon as this process changes a
+question or its tags (see ``questions.signals``).
+"""
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Question
+
+
+def bitmap(positions, size):
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position // 8] |= 1 << position % 8
+    return int.from_bytes(bits, 'little')
+
+
+class TagIndex:
+    def __init__(self, questions, question_tags):
+        """``questions`` are ``(id, created_at, category_id, difficulty_id, is_premium, is_active)`` oldest first."""
+        self.keys, self.ids = [], []
+        positions = {
+            'category': defaultdict(list), 'difficulty': defaultdict(list), 'premium': [], 'active': [],
+        }
+        for position, (pk, created_at, category_id, difficulty_id, is_premium, is_active) in enumerate(questions):
+            self.keys.append((created_at, pk))
+            self.ids.append(pk)
+            positions['category'][category_id].append(position)
+            positions['difficulty'][difficulty_id].append(position)
+            if is_premium:
+                positions['premium'].append(position)
+            if is_active:
+                positions['active'].append(position)
+        by_id = {pk: position for position, pk in enumerate(self.ids)}
+        tagged = defaultdict(list)
+        for question_id, tag_id in question_tags:
+            if question_id in by_id:
+                tagged[tag_id].append(by_id[question_id])
+
+        size = len(self.ids)
+        self.everything = (1 << size) - 1
+        self.tags = {tag_id: bitmap(found, size) for tag_id, found in tagged.items()}
+        self.categories = {pk: bitmap(found, size) for pk, found in positions['category'].items()}
+        self.difficulties = {pk: bitmap(found, size) for pk, found in positions['difficulty'].items()}
+        self.premium = bitmap(positions['premium'], size)
+        self.active = bitmap(positions['active'], size)
+
+    def select(self, all_of=(), any_of=(), none_of=(), category=None, difficulty=None, is_premium=None,
+               is_active=True):
+        """The bitmap of questions passing every filter."""
+        bits = self.active if is_active else self.everything & ~self.active
+        for tag_id in all_of:
+            bits &= self.tags.get(tag_id, 0)
+        if any_of:
+            either = 0
+            for tag_id in any_of:
+                either |= self.tags.get(tag_id, 0)
+            bits &= either
+        for tag_id in none_of:
+            bits &= ~self.tags.get(tag_id, 0)
+        if category is not None:
+            bits &= self.categories.get(category, 0)
+        if difficulty is not None:
+            bits &= self.difficulties.get(difficulty, 0)
+        if is_premium is not None:
+            bits &= self.premium if is_premium else ~self.premium
+        return bits
+
+    def page(self, bits, before=None, limit=20):
+        """Ids of up to ``limit`` questions in ``bits``, newest first, older than ``(created_at, id)`` ``before``."""
+        if before is not None:
+            bits &= (1 << bisect_left(self.keys, before)) - 1
+        ids = []
+        while bits and len(ids) < limit:
+            position = bits.bit_length() - 1
+            ids.append(self.ids[position])
+            bits ^= 1 << position
+        return ids
+
+
+_index = (0.0, None)
+
+
+def get_tag_index():
+    """This process's tag index, rebuilt after ``QUESTION_TAG_INDEX_TTL`` seconds or when invalidated."""
+    global _index
+    built_at, index = _index
+    if index is None or time.monotonic() - built_at > settings.QUESTION_TAG_INDEX_TTL:
+        index = TagIndex(
+            Question.objects.order_by('created_at', 'id').values_list(
+                'id', 'created_at', 'category_id', 'difficulty_id', 'is_premium', 'is_active',
+            ),
+            Question.tags.through.objects.values_list('question_id', 'tag_id'),
+        )
+        _index = (time.monotonic(), index)
+    return index
+
+
+def invalidate_tag_index():
+    global _index
+    _index = (0.0, None)
@@ -1,3 +1,233 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils import timezone
+from django.test import TestCase, override_settings
+
+from categories.models import Category, Tag
+from common.testing import QuestionTestData, make_question, make_user
+from judge.engine import case_payload
+from questions.blobstore import get_blob_store
+from questions.counters import QuestionCounters, get_counters
+from questions.models import Difficulty, Question, TestCase as QuestionTestCase
+from questions.search import check_index
+from questions.tagindex import get_tag_index, invalidate_tag_index
+from submissions.models import Submission
+
+
+class BlobTestCaseTests(QuestionTestData):
+    def setUp(self):
+        self.blob_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.blob_root.cleanup)
+        get_blob_store.cache_clear()
+        self.addCleanup(get_blob_store.cache_clear)
+        settings_override = override_settings(TEST_CASE_BLOB_ROOT=self.blob_root.name, TEST_CASE_INLINE_MAX_BYTES=16)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_large_data_moves_to_blob_store(self):
+        case = QuestionTestCase.objects.create(question=self.question, input_data='x' * 100, expected_output='ok')
+        case.refresh_from_db()
+        self.assertEqual(case.input_data, '')
+        self.assertEqual(case.expected_output, 'ok')
+        with open(case.input_path, 'rb') as blob:
+            self.assertEqual(blob.read(), b'x' * 100)
+
+    def test_editing_down_to_inline_data_drops_the_blob(self):
+        case = QuestionTestCase.objects.create(question=self.question, input_data='x' * 100, expected_output='ok')
+        case = QuestionTestCase.objects.get(pk=case.pk)
+        case.points = 2
+        case.save()  # an untouched blob-backed field stays in the blob store
+        case = QuestionTestCase.objects.get(pk=case.pk)
+        self.assertTrue(case.input_blob)
+
+        case.input_data = 'small'
+        case.save()
+        case = QuestionTestCase.objects.get(pk=case.pk)
+        self.assertEqual((case.input_data, case.input_blob), ('small', ''))
+        self.assertEqual(sorted(case_payload(case)), ['expected', 'id', 'input'])
+
+    def test_identical_data_is_stored_once(self):
+        first = QuestionTestCase.objects.create(question=self.question, input_data='y' * 100, expected_output='')
+        second = QuestionTestCase.objects.create(question=self.question, input_data='y' * 100, expected_output='')
+        self.assertEqual(first.input_blob, second.input_blob)
+        self.assertTrue(os.path.exists(first.input_path))
+
+
+class QuestionCounterTests(QuestionTestData):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.questions = [cls.question, cls.make_question('product'), cls.make_question('gcd')]
+
+    def test_flush_applies_increments_in_one_update_per_delta(self):
+        counters = QuestionCounters(interval=60)
+        first, second, third = self.questions
+        for question in (first, second):
+            counters.add(question.pk, total=1, successful=1)
+        counters.add(third.pk, total=2)
+        self.assertEqual(counters.maybe_flush(), 0)
+        with self.assertNumQueries(2):
+            self.assertEqual(counters.flush(), 3)
+        first.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual((first.total_submissions, first.successful_submissions), (1, 1))
+        self.assertEqual((third.total_submissions, third.successful_submissions), (2, 0))
+        self.assertEqual(counters.pending(first.pk), (0, 0))
+
+    def test_success_rate_includes_unflushed_counts(self):
+        question = self.questions[0]
+        self.addCleanup(get_counters().flush)
+        get_counters().add(question.pk, total=4, successful=1)
+        self.assertEqual(question.success_rate, 25)
+
+    def test_reconcile_recomputes_counts_from_submissions(self):
+        first, second, _ = self.questions
+        Question.objects.filter(pk=first.pk).update(total_submissions=50, successful_submissions=40)
+        for status in ('accepted', 'wrong_answer', 'pending'):
+            Submission.objects.create(user=self.user, question=first, code='', language='python', status=status)
+        Submission.objects.create(
+            user=self.user, question=second, code='', language='python', status='accepted', is_run=True,
+        )
+
+        out = io.StringIO()
+        call_command('reconcile_question_counters', stdout=out)
+        self.assertIn('Corrected the counters of 1 questions', out.getvalue())
+        first.refresh_from_db()
+        self.assertEqual((first.total_submissions, first.successful_submissions), (2, 1))
+
+
+class CatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = make_user('author')
+        cls.math = Category.objects.create(name='Math', slug='math')
+        cls.graphs = Category.objects.create(name='Graphs', slug='graphs')
+        cls.easy = Difficulty.objects.create(name='Easy', level=1)
+        cls.hard = Difficulty.objects.create(name='Hard', level=3, points=30)
+        cls.dp = Tag.objects.create(name='DP', slug='dp')
+        cls.greedy = Tag.objects.create(name='Greedy', slug='greedy')
+        cls.questions = []
+        for i in range(25):
+            question = make_question(
+                f'q{i}', category=cls.math if i % 2 else cls.graphs, difficulty=cls.hard if i % 5 == 0 else cls.easy,
+                is_premium=i % 3 == 0, is_active=i != 24, created_by=user,
+            )
+            if i % 4 == 0:
+                question.tags.add(cls.dp)
+            if i % 3 == 0:
+                question.tags.add(cls.greedy)
+            cls.questions.append(question)
+        # Pairs of questions share a timestamp, so pages must break ties on id.
+        now = timezone.now()
+        for i, question in enumerate(cls.questions):
+            Question.objects.filter(pk=question.pk).update(created_at=now - timezone.timedelta(minutes=i // 2))
+
+    def setUp(self):
+        invalidate_tag_index()
+        get_tag_index()
+
+    def walk(self, query='', limit=7):
+        slugs, cursor = [], None
+        while True:
+            url = f'/api/questions/?limit={limit}{query}' + (f'&cursor={cursor}' if cursor else '')
+            with self.assertNumQueries(2):
+                page = self.client.get(url).json()
+            slugs += [question['slug'] for question in page['results']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                return slugs
+
+    def test_cursor_pages_cover_the_catalog_in_order(self):
+        expected = [
+            f'q{i}' for i in sorted(range(24), key=lambda i: (i // 2, -self.questions[i].pk))
+        ]
+        self.assertEqual(self.walk(), expected)
+        self.assertEqual(self.walk(limit=100), expected)
+
+    def test_filters(self):
+        self.assertEqual(self.walk(f'&category={self.math.pk}&difficulty={self.hard.pk}'), ['q5', 'q15'])
+        self.assertEqual(self.walk(f'&tags={self.dp.pk}&is_premium=true'), ['q0', 'q12'])
+        self.assertEqual(self.walk('&is_active=false'), ['q24'])
+        q1, q0 = self.client.get('/api/questions/?limit=2').json()['results']
+        self.assertEqual((q0['category'], q0['points'], q0['tags']), ('Graphs', 30, ['dp', 'greedy']))
+        self.assertEqual((q1['category'], q1['points'], q1['tags']), ('Math', 10, []))
+        self.assertEqual(self.client.get('/api/questions/?cursor=nope').status_code, 400)
+
+    def test_tag_queries_combine_all_any_and_none(self):
+        dp, greedy = self.dp.pk, self.greedy.pk
+
+        def expected(keep):
+            return [f'q{i}' for i in sorted(range(24), key=lambda i: (i // 2, -self.questions[i].pk)) if keep(i)]
+
+        self.assertEqual(self.walk(f'&tags={dp}&tags={greedy}', limit=1), expected(lambda i: i % 12 == 0))
+        self.assertEqual(
+            self.walk(f'&any_tags={dp}&any_tags={greedy}', limit=3), expected(lambda i: i % 4 == 0 or i % 3 == 0),
+        )
+        self.assertEqual(
+            self.walk(f'&any_tags={greedy}&exclude_tags={dp}&category={self.math.pk}'),
+            expected(lambda i: i % 3 == 0 and i % 4 and i % 2),
+        )
+
+    def test_tag_index_follows_tag_changes(self):
+        url = f'/api/questions/?tags={self.greedy.pk}&tags={self.dp.pk}&is_premium=false'
+        self.assertEqual(self.client.get(url).json()['results'], [])
+        self.questions[4].tags.add(self.greedy)
+        get_tag_index()
+        self.assertEqual(self.walk(f'&tags={self.greedy.pk}&tags={self.dp.pk}&is_premium=false'), ['q4'])
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = make_user('author')
+        cls.math = Category.objects.create(name='Math', slug='math')
+        cls.graphs = Category.objects.create(name='Graphs', slug='graphs')
+        easy = Difficulty.objects.create(name='Easy', level=1)
+        cls.paths = make_question(
+            'paths', title='Shortest paths', description='Find the shortest route between cities.',
+            problem_statement='Given a weighted graph, print the distance.', category=cls.graphs,
+            difficulty=easy, created_by=user,
+        )
+        cls.primes = make_question(
+            'primes', title='Count primes', description='Count the primes below n.',
+            problem_statement='Print how many primes are smaller than n. Graphs are not involved.',
+            category=cls.math, difficulty=easy, created_by=user,
+        )
+
+    def search(self, query):
+        return self.client.get(f'/api/questions/search?q={query}').json()
+
+    def test_ranks_title_matches_first_and_highlights(self):
+        results = self.search('graph')['results']
+        self.assertEqual([result['slug'] for result in results], ['paths', 'primes'])
+        self.assertIn('<mark>graph</mark>', results[0]['snippet'])
+        self.assertEqual(self.search('prim')['results'][0]['title_highlight'], 'Count <mark>primes</mark>')
+        self.assertEqual(self.search('"route" OR')['total'], 0)  # user input is never FTS syntax
+        self.assertEqual(
+            self.client.get(f'/api/questions/search?q=print&category={self.math.pk}').json()['total'], 1,
+        )
+
+    def test_index_follows_edits_and_deletes(self):
+        Question.objects.filter(pk=self.primes.pk).update(title='Sieve of Eratosthenes')
+        self.assertEqual([result['slug'] for result in self.search('sieve')['results']], ['primes'])
+        self.paths.delete()
+        self.assertEqual(self.search('route')['total'], 0)
+        call_command('rebuild_question_search', stdout=io.StringIO())
+        self.assertEqual(self.search('eratosthenes')['total'], 1)
+
+    def test_check_finds_dropped_triggers_and_drift(self):
+        call_command('rebuild_question_search', '--check', stdout=io.StringIO())
+        # What a migration that remakes questions_question on SQLite leaves behind.
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER questions_question_fts_update')
+        Question.objects.filter(pk=self.primes.pk).update(title='Sieve of Eratosthenes')
+        with self.assertRaisesMessage(CommandError, 'questions_question_fts_update is missing'):
+            call_command('rebuild_question_search', '--check', stdout=io.StringIO())
+        self.assertEqual(check_index(), [
+            'Trigger questions_question_fts_update is missing',
+            'questions_question_fts is missing or out of step with questions_question',
+        ])
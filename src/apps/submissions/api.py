@@ -0,0 +1,98 @@
+import asyncio
+import heapq
+import json
+from operator import itemgetter
+from typing import Optional
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.db.models import F, Q
+from django.shortcuts import get_object_or_404
+from ninja import Router
+
+from common.pagination import decode_cursor, encode_cursor
+
+from submissions.archive import load, record_results
+from submissions.live import FINAL_EVENTS, get_hub
+from submissions.models import ArchivedSubmission, Submission
+from submissions.schemas import ArchivedSubmissionSchema, SubmissionHistoryPageSchema
+
+router = Router()
+
+
+@router.get("/{submission_id}/events")
+async def submission_events(request, submission_id: int):
+    """
+    Stream a submission's judging progress and verdict as server-sent events.
+
+    Needs an ASGI server; under WSGI the response is only sent once the
+    verdict is in.
+    """
+    if not await Submission.objects.filter(pk=submission_id).aexists():
+        raise Http404("Submission not found")
+    return StreamingHttpResponse(
+        event_stream(submission_id),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def event_stream(submission_id):
+    async with get_hub().subscribe(submission_id) as events:
+        while True:
+            try:
+                event, data = await asyncio.wait_for(events.get(), settings.SUBMISSION_EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                # Comment lines keep proxies from closing an idle stream.
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            if event in FINAL_EVENTS:
+                return
+
+
+@router.get("/history", response=SubmissionHistoryPageSchema)
+def submission_history(
+    request, user_id: int, question_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 50,
+):
+    """
+    A user's submissions, newest first, whether still live or archived.
+
+    Archived entries come from the archive index alone; fetch one from
+    ``/archived/{submission_id}`` for its code and results. Pages are keyed on
+    ``(submitted_at, id)``: pass the previous page's ``next_cursor`` to get
+    the next one.
+    """
+    limit = max(1, min(limit, 200))
+    live = Submission.objects.filter(user_id=user_id)
+    archived = ArchivedSubmission.objects.filter(user_id=user_id)
+    if question_id is not None:
+        live = live.filter(question_id=question_id)
+        archived = archived.filter(question_id=question_id)
+    if cursor:
+        before, before_id = decode_cursor(cursor)
+        live = live.filter(Q(created_at__lt=before) | Q(created_at=before, pk__lt=before_id))
+        archived = archived.filter(Q(submitted_at__lt=before) | Q(submitted_at=before, submission_id__lt=before_id))
+    live = [
+        {**row, 'archived': False}
+        for row in live.order_by('-created_at', '-id').values(
+            'id', 'question_id', 'language', 'status', 'points_earned', submitted_at=F('created_at'),
+        )[:limit + 1]
+    ]
+    archived = [
+        {'id': row.pop('submission_id'), **row, 'archived': True}
+        for row in archived.order_by('-submitted_at', '-submission_id').values(
+            'submission_id', 'question_id', 'language', 'status', 'points_earned', 'submitted_at',
+        )[:limit + 1]
+    ]
+    page = list(heapq.merge(live, archived, key=itemgetter('submitted_at', 'id'), reverse=True))[:limit + 1]
+    last = page[limit - 1] if len(page) > limit else None
+    next_cursor = encode_cursor(last['submitted_at'], last['id']) if last else None
+    return {'results': page[:limit], 'next_cursor': next_cursor}
+
+
+@router.get("/archived/{submission_id}", response=ArchivedSubmissionSchema)
+def archived_submission(request, submission_id: int):
+    """An archived submission with its code and results, read from its segment."""
+    record = load(get_object_or_404(ArchivedSubmission, submission_id=submission_id))
+    return {**record, 'submitted_at': record['created_at'], 'results': record_results(record)}
@@ -0,0 +1,174 @@
+"""
+Cold storage for old submissions.
+
+``archive_submissions`` moves judged submissions older than a cutoff out of
+the ``Submission`` and ``SubmissionResult`` tables into append-only segment
+files under ``SUBMISSION_ARCHIVE_ROOT``. A segment is a run of records, each
+a four-byte little-endian length followed by the zlib-compressed JSON of one
+submission with its packed and stored results. A segment is closed once it
+reaches ``SUBMISSION_ARCHIVE_SEGMENT_BYTES`` and is never rewritten.
+
+Every archived submission keeps a small ``ArchivedSubmission`` row, indexed
+by user and question, with its metadata and the position of its record, so
+history listings never touch the segments and a single submission is read
+back with one seek. The row also carries what the progress, counter,
+activity and fastest-solution rebuilds aggregate, so they count archived
+submissions without reading segments.
+
+Records are written and synced before the index rows are committed, so a
+crash in between leaves an unreferenced record behind and the submission
+still in the hot tables, to be archived again by the next run.
+"""
+import base64
+import fcntl
+import json
+import os
+import struct
+import uuid
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from judge.models import JudgeJob
+from judge.queue import ACTIVE_STATUSES
+from progress.models import UserProgress
+
+from .models import ArchivedSubmission, Submission
+from .packing import unpack_results
+
+LENGTH = struct.Struct('<I')
+SUFFIX = '.seg'
+LEVEL = 9
+ARCHIVED_FIELDS = (
+    'user_id', 'question_id', 'code', 'language', 'status', 'execution_time', 'memory_used', 'points_earned',
+    'passed_test_cases', 'total_test_cases', 'error_message', 'code_fingerprint', 'test_case_version', 'is_run',
+)
+RESULT_FIELDS = (
+    'test_case_id', 'status', 'execution_time', 'wall_time', 'memory_used', 'output', 'error_message',
+)
+
+
+class SegmentStore:
+    def __init__(self, root, max_bytes):
+        self.root = os.fspath(root)
+        self.max_bytes = max_bytes
+
+    def append(self, records):
+        """Append encoded records to the open segment; returns ``(segment, offset, length)`` for each."""
+        os.makedirs(self.root, exist_ok=True)
+        name = self._open_segment()
+        placed = []
+        with open(os.path.join(self.root, name), 'ab') as f:
+            # Concurrent archivers take turns on the same segment.
+            fcntl.flock(f, fcntl.LOCK_EX)
+            offset = f.seek(0, os.SEEK_END)
+            for record in records:
+                f.write(LENGTH.pack(len(record)))
+                f.write(record)
+                placed.append((name, offset + LENGTH.size, len(record)))
+                offset += LENGTH.size + len(record)
+            f.flush()
+            os.fsync(f.fileno())
+        return placed
+
+    def read(self, segment, offset, length):
+        with open(os.path.join(self.root, os.path.basename(segment)), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        if len(data) != length:
+            raise ValueError(f"Archive segment {segment} is truncated at offset {offset}")
+        return data
+
+    def _open_segment(self):
+        segments = sorted(name for name in os.listdir(self.root) if name.endswith(SUFFIX))
+        if segments and os.path.getsize(os.path.join(self.root, segments[-1])) < self.max_bytes:
+            return segments[-1]
+        # Names sort by creation time, so the newest segment is always last.
+        return f"{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}{SUFFIX}"
+
+
+@lru_cache(maxsize=1)
+def get_segment_store():
+    return SegmentStore(settings.SUBMISSION_ARCHIVE_ROOT, settings.SUBMISSION_ARCHIVE_SEGMENT_BYTES)
+
+
+def encode(submission):
+    """A submission and its results as one compressed record."""
+    record = {field: getattr(submission, field) for field in ARCHIVED_FIELDS}
+    record['id'] = submission.pk
+    record['created_at'] = submission.created_at.isoformat()
+    record['updated_at'] = submission.updated_at.isoformat()
+    record['packed_results'] = (
+        base64.b64encode(bytes(submission.packed_results)).decode() if submission.packed_results is not None else None
+    )
+    record['results'] = [
+        {field: getattr(result, field) for field in RESULT_FIELDS} for result in submission.results.all()
+    ]
+    return zlib.compress(json.dumps(record, separators=(',', ':')).encode(), LEVEL)
+
+
+def decode(data):
+    record = json.loads(zlib.decompress(data))
+    if record['packed_results'] is not None:
+        record['packed_results'] = base64.b64decode(record['packed_results'])
+    return record
+
+
+def archivable(cutoff):
+    """Judged submissions created before ``cutoff`` that nothing still needs."""
+    return (
+        Submission.objects.filter(created_at__lt=cutoff)
+        .exclude(status__in=('pending', 'running'))
+        # Each user's best submission per question stays hot.
+        .exclude(pk__in=UserProgress.objects.filter(best_submission__isnull=False).values('best_submission_id'))
+        .exclude(Exists(JudgeJob.objects.filter(submission=OuterRef('pk'), status__in=ACTIVE_STATUSES)))
+    )
+
+
+def archive_batch(submissions):
+    """Move ``submissions`` (with ``results`` prefetched) into the archive; returns the number moved."""
+    if not submissions:
+        return 0
+    placed = get_segment_store().append([encode(submission) for submission in submissions])
+    with transaction.atomic():
+        ArchivedSubmission.objects.bulk_create([
+            ArchivedSubmission(
+                submission_id=submission.pk,
+                user_id=submission.user_id,
+                question_id=submission.question_id,
+                language=submission.language,
+                status=submission.status,
+                points_earned=submission.points_earned,
+                submitted_at=submission.created_at,
+                is_run=submission.is_run,
+                passed_test_cases=submission.passed_test_cases,
+                execution_time=submission.execution_time,
+                memory_used=submission.memory_used,
+                segment=segment,
+                offset=offset,
+                length=length,
+            )
+            for submission, (segment, offset, length) in zip(submissions, placed)
+        ])
+        Submission.objects.filter(pk__in=[submission.pk for submission in submissions]).delete()
+    return len(submissions)
+
+
+def load(entry):
+    """The full archived record an ``ArchivedSubmission`` points at."""
+    return decode(get_segment_store().read(entry.segment, entry.offset, entry.length))
+
+
+def record_results(record):
+    """An archived record's results in case order, preferring stored rows over packed data."""
+    rows = {row['test_case_id']: row for row in record['results']}
+    if record['packed_results'] is None:
+        return list(rows.values())
+    return [
+        rows.get(result['test_case_id']) or {**result, 'output': '', 'error_message': ''}
+        for result in unpack_results(record['packed_results'])
+    ]
@@ -0,0 +1,17 @@
+"""Code fingerprints used to spot byte-identical resubmissions."""
+import hashlib
+
+
+def normalize_code(code):
+    """
+    Canonical form of a submission's source.
+
+    Only CRLF line endings are rewritten: compilers and interpreters read
+    them as plain newlines. Any other whitespace, trailing or not, can be
+    part of a string literal or a line continuation, so it is kept.
+    """
+    return code.replace('\r\n', '\n')
+
+
+def code_fingerprint(code):
+    return hashlib.sha256(normalize_code(code).encode('utf-8')).hexdigest()
@@ -0,0 +1,131 @@
+"""
+Live judging events for streaming clients.
+
+Every open stream subscribes to the ``VerdictHub`` of its event loop. While
+anyone is subscribed, the hub polls the database once per
+``SUBMISSION_EVENTS_POLL_INTERVAL`` for all watched submissions together and
+fans changes out to the subscribers in memory. The database cost therefore
+grows with the number of distinct submissions being watched, not with the
+number of open streams.
+
+Events are ``(name, data)`` pairs:
+
+- ``status``: the submission moved between ``pending`` and ``running``;
+- ``progress``: ``cases_done`` of ``cases_total`` test cases are finished;
+- ``verdict``: the final result, which ends the stream;
+- ``gone``: the submission was deleted, which also ends the stream.
+"""
+import asyncio
+import logging
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from judge.models import JudgeJob
+
+from .models import Submission
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('pending', 'running')
+FINAL_EVENTS = ('verdict', 'gone')
+VERDICT_FIELDS = (
+    'status', 'passed_test_cases', 'total_test_cases', 'execution_time', 'memory_used', 'error_message',
+)
+
+
+def snapshot_many(submission_ids):
+    """Current state of each submission, with progress from its latest judge job, in one query."""
+    latest_job = JudgeJob.objects.filter(submission=OuterRef('pk')).order_by('-id')
+    rows = (
+        Submission.objects.filter(pk__in=submission_ids)
+        .annotate(
+            cases_done=Subquery(latest_job.values('cases_done')[:1]),
+            cases_total=Subquery(latest_job.values('cases_total')[:1]),
+        )
+        .values('id', 'cases_done', 'cases_total', *VERDICT_FIELDS)
+    )
+    return {row.pop('id'): row for row in rows}
+
+
+def events_between(previous, current):
+    """The events that take a subscriber who saw ``previous`` (None: nothing yet) to ``current``."""
+    if current is None:
+        return [('gone', {})]
+    if current['status'] not in ACTIVE_STATUSES:
+        return [('verdict', {field: current[field] for field in VERDICT_FIELDS})]
+    events = []
+    if previous is None or previous['status'] != current['status']:
+        events.append(('status', {'status': current['status']}))
+    progress = (current['cases_done'] or 0, current['cases_total'] or 0)
+    if progress[1] and (previous is None or progress != (previous['cases_done'] or 0, previous['cases_total'] or 0)):
+        events.append(('progress', {'cases_done': progress[0], 'cases_total': progress[1]}))
+    return events
+
+
+class VerdictHub:
+    def __init__(self, interval):
+        self.interval = interval
+        self._subscribers = defaultdict(set)
+        self._state = {}
+        self._poller = None
+
+    @asynccontextmanager
+    async def subscribe(self, submission_id):
+        """Yield an ``asyncio.Queue`` that receives the submission's events."""
+        events = asyncio.Queue()
+        self._subscribers[submission_id].add(events)
+        # Late subscribers catch up from the last poll rather than waiting for the next change.
+        if submission_id in self._state:
+            for event in events_between(None, self._state[submission_id]):
+                events.put_nowait(event)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        try:
+            yield events
+        finally:
+            subscribers = self._subscribers[submission_id]
+            subscribers.discard(events)
+            if not subscribers:
+                del self._subscribers[submission_id]
+                self._state.pop(submission_id, None)
+
+    async def _poll(self):
+        while self._subscribers:
+            watched = list(self._subscribers)
+            try:
+                snapshots = await sync_to_async(snapshot_many)(watched)
+            except Exception:
+                logger.exception("Polling %d watched submissions failed", len(watched))
+            else:
+                self._publish(watched, snapshots)
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, watched, snapshots):
+        for submission_id in watched:
+            if submission_id not in self._subscribers:
+                continue
+            current = snapshots.get(submission_id)
+            previous = self._state.get(submission_id)
+            if submission_id in self._state and current == previous:
+                continue
+            self._state[submission_id] = current
+            for event in events_between(previous, current):
+                for subscriber in self._subscribers.get(submission_id, ()):
+                    subscriber.put_nowait(event)
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    """The hub shared by every stream on the running event loop."""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = VerdictHub(settings.SUBMISSION_EVENTS_POLL_INTERVAL)
+    return hub
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from submissions.archive import archivable, archive_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Move judged submissions older than a cutoff, except each user's best per question, "
+        "into compressed archive segments"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.SUBMISSION_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        candidates = archivable(cutoff).prefetch_related('results').order_by('id')
+        last, moved = 0, 0
+        while True:
+            batch = list(candidates.filter(id__gt=last)[:options['batch_size']])
+            if not batch:
+                break
+            last = batch[-1].pk
+            moved += archive_batch(batch)
+            self.stdout.write(f"Archived {moved} submissions")
+        self.stdout.write(self.style.SUCCESS(f"Done: archived {moved} submissions created before {cutoff:%Y-%m-%d}"))
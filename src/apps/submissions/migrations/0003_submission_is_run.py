@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0002_submission_code_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='is_run',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0003_submission_is_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissionresult',
+            name='wall_time',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:13
+
+import common.fields
+from django.db import migrations
+
+COLUMNS = [
+    ('submissions_submission', 'code'),
+    ('submissions_submissionresult', 'error_message'),
+    ('submissions_submissionresult', 'output'),
+]
+
+
+def text_to_bytea(apps, schema_editor):
+    # PostgreSQL's default text::bytea cast would interpret backslashes in
+    # stored code, so convert the columns by encoding instead. Other backends
+    # keep the old text values as they are; CompressedTextField reads both.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for table, column in COLUMNS:
+        schema_editor.execute(
+            f"ALTER TABLE {quote(table)} ALTER COLUMN {quote(column)} TYPE bytea "
+            f"USING convert_to({quote(column)}, 'UTF8')"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0004_submissionresult_wall_time'),
+    ]
+
+    operations = [
+        # Going back, the reversed AlterFields turn the columns into text again;
+        # values already compressed stay unreadable as text either way.
+        migrations.RunPython(text_to_bytea, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='submission',
+            name='code',
+            field=common.fields.CompressedTextField(dictionary='submission_code'),
+        ),
+        migrations.AlterField(
+            model_name='submissionresult',
+            name='error_message',
+            field=common.fields.CompressedTextField(blank=True, dictionary='submission_error'),
+        ),
+        migrations.AlterField(
+            model_name='submissionresult',
+            name='output',
+            field=common.fields.CompressedTextField(blank=True, dictionary='submission_output'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0005_compressed_text_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='packed_results',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0005_question_test_case_version'),
+        ('submissions', '0006_submission_packed_results'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_id', models.BigIntegerField(unique=True)),
+                ('language', models.CharField(choices=[('python', 'Python'), ('java', 'Java'), ('cpp', 'C++'), ('c', 'C'), ('javascript', 'JavaScript'), ('go', 'Go'), ('rust', 'Rust')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('accepted', 'Accepted'), ('wrong_answer', 'Wrong Answer'), ('time_limit_exceeded', 'Time Limit Exceeded'), ('memory_limit_exceeded', 'Memory Limit Exceeded'), ('runtime_error', 'Runtime Error'), ('compilation_error', 'Compilation Error')], max_length=30)),
+                ('points_earned', models.IntegerField(default=0)),
+                ('is_run', models.BooleanField(default=False)),
+                ('passed_test_cases', models.IntegerField(default=0)),
+                ('execution_time', models.FloatField(blank=True, null=True)),
+                ('memory_used', models.IntegerField(blank=True, null=True)),
+                ('submitted_at', models.DateTimeField()),
+                ('segment', models.CharField(max_length=64)),
+                ('offset', models.BigIntegerField()),
+                ('length', models.IntegerField()),
+            ],
+            options={
+                'ordering': ['-submitted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', 'question', '-created_at'], name='submission_user_question_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedsubmission',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_submissions', to='questions.question'),
+        ),
+        migrations.AddField(
+            model_name='archivedsubmission',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_submissions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsubmission',
+            index=models.Index(fields=['user', 'question', '-submitted_at'], name='archived_user_question_idx'),
+        ),
+    ]
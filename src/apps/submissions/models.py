@@ -1,7 +1,10 @@
 
 from django.db import models
 from django.contrib.auth import get_user_model
-from apps.common.models import TimestampedModel
+from common.fields import CompressedTextField
+from common.models import TimestampedModel
+from .fingerprint import code_fingerprint
+from .packing import CaseResults
 
 User = get_user_model()
 
@@ -31,40 +34,97 @@ class Submission(TimestampedModel):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submissions')
     question = models.ForeignKey('questions.Question', on_delete=models.CASCADE, related_name='submissions')
-    code = models.TextField()
+    code = CompressedTextField(dictionary='submission_code')
     language = models.CharField(max_length=20, choices=LANGUAGE_CHOICES)
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='pending')
+    # A sample run: judged on the sample cases only, never earns points and
+    # never counts towards progress, counters, boards or rejudges.
+    is_run = models.BooleanField(default=False)
 
     # Execution details
-    execution_time = models.FloatField(null=True, blank=True)  # in seconds
-    memory_used = models.IntegerField(null=True, blank=True)  # in MB
+    execution_time = models.FloatField(null=True, blank=True)  # CPU seconds of the slowest test case
+    memory_used = models.IntegerField(null=True, blank=True)  # peak MB of the hungriest test case
     points_earned = models.IntegerField(default=0)
 
     # Results
     passed_test_cases = models.IntegerField(default=0)
     total_test_cases = models.IntegerField(default=0)
     error_message = models.TextField(blank=True)
+    # Every test case's status, time and memory; see submissions.packing.
+    packed_results = models.BinaryField(null=True, blank=True, editable=False)
+
+    # Verdict reuse: identical code judged against the same test case set
+    # (Question.test_case_version) must get the same verdict.
+    code_fingerprint = models.CharField(max_length=64, blank=True)
+    test_case_version = models.IntegerField(null=True, blank=True)  # version this verdict was judged against
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['question', 'language', 'code_fingerprint', 'test_case_version'],
+                name='submission_fingerprint_idx',
+            ),
+            models.Index(fields=['user', 'question', '-created_at'], name='submission_user_question_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.question.title} - {self.status}"
 
+    def save(self, *args, **kwargs):
+        self.code_fingerprint = code_fingerprint(self.code)
+        super().save(*args, **kwargs)
+
     @property
     def is_successful(self):
         return self.status == 'accepted'
 
+    @property
+    def case_results(self):
+        """Per-test-case results in case order, whether packed or stored as rows."""
+        return CaseResults(self)
+
 
 class SubmissionResult(TimestampedModel):
     """Individual test case results for submissions"""
     submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='results')
     test_case = models.ForeignKey('questions.TestCase', on_delete=models.CASCADE)
     status = models.CharField(max_length=30, choices=Submission.STATUS_CHOICES)
+    execution_time = models.FloatField(null=True, blank=True)  # CPU seconds
+    wall_time = models.FloatField(null=True, blank=True)  # seconds
+    memory_used = models.IntegerField(null=True, blank=True)  # peak resident MB
+    output = CompressedTextField(blank=True, dictionary='submission_output')
+    error_message = CompressedTextField(blank=True, dictionary='submission_error')
+
+    def __str__(self):
+        return f"{self.submission} - Test Case {self.test_case.id} - {self.status}"
+
+
+class ArchivedSubmission(models.Model):
+    """Index entry of a submission moved to the archive (see submissions.archive)"""
+    submission_id = models.BigIntegerField(unique=True)  # the id it had in Submission
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_submissions')
+    question = models.ForeignKey('questions.Question', on_delete=models.CASCADE, related_name='archived_submissions')
+    language = models.CharField(max_length=20, choices=Submission.LANGUAGE_CHOICES)
+    status = models.CharField(max_length=30, choices=Submission.STATUS_CHOICES)
+    points_earned = models.IntegerField(default=0)
+    submitted_at = models.DateTimeField()
+    # Copied from the record so rebuilds never have to read the archive.
+    is_run = models.BooleanField(default=False)
+    passed_test_cases = models.IntegerField(default=0)
     execution_time = models.FloatField(null=True, blank=True)
     memory_used = models.IntegerField(null=True, blank=True)
-    output = models.TextField(blank=True)
-    error_message = models.TextField(blank=True)
+
+    # Where the compressed record lives
+    segment = models.CharField(max_length=64)
+    offset = models.BigIntegerField()
+    length = models.IntegerField()
+
+    class Meta:
+        ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['user', 'question', '-submitted_at'], name='archived_user_question_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.submission} - Test Case {self.test_case.id} - {self.status}"
+        return f"Archived submission {self.submission_id} - {self.status}"
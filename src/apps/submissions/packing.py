@@ -0,0 +1,144 @@
+"""
+Compact encoding of a submission's per-test-case results.
+
+``Submission.packed_results`` holds the outcome of every case as parallel
+arrays: test case ids, one status byte, CPU and wall seconds as float32 and
+peak memory in MB, so a 50-case submission packs into about a kilobyte in
+the submission row itself. ``SubmissionResult`` rows, with output and error
+text, are written only for cases that did not pass, unless
+``JUDGE_KEEP_ALL_RESULTS`` asks for all of them. ``CaseResults`` merges the
+two and iterates like ``submission.results.all()``.
+"""
+import math
+import struct
+import sys
+from array import array
+
+VERSION = 1
+HEADER = struct.Struct('<BI')  # version, number of cases
+# Stored as indexes: only ever append.
+STATUSES = (
+    'pending', 'running', 'accepted', 'wrong_answer', 'time_limit_exceeded',
+    'memory_limit_exceeded', 'runtime_error', 'compilation_error',
+)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def pack_results(results):
+    """Pack runner result dicts, in case order, into bytes."""
+    ids = array('q', [r['test_case_id'] for r in results])
+    times = array('f', [_float(r.get('execution_time')) for r in results])
+    walls = array('f', [_float(r.get('wall_time')) for r in results])
+    memory = array('i', [-1 if r.get('memory_used') is None else r['memory_used'] for r in results])
+    statuses = bytes(STATUS_CODES[r['status']] for r in results)
+    return HEADER.pack(VERSION, len(results)) + b''.join(
+        [_little_endian(ids), statuses, _little_endian(times), _little_endian(walls), _little_endian(memory)]
+    )
+
+
+def unpack_results(data):
+    """The packed results as dicts with the ``pack_results`` keys."""
+    data = bytes(data)
+    version, count = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Unknown packed results version {version}")
+    offset = HEADER.size
+    ids, offset = _read(data, offset, 'q', count)
+    statuses = data[offset:offset + count]
+    offset += count
+    times, offset = _read(data, offset, 'f', count)
+    walls, offset = _read(data, offset, 'f', count)
+    memory, offset = _read(data, offset, 'i', count)
+    return [
+        {
+            'test_case_id': ids[i],
+            'status': STATUSES[statuses[i]],
+            'execution_time': None if math.isnan(times[i]) else round(times[i], 4),
+            'wall_time': None if math.isnan(walls[i]) else round(walls[i], 4),
+            'memory_used': None if memory[i] < 0 else memory[i],
+        }
+        for i in range(count)
+    ]
+
+
+class PackedResult:
+    """A case that only has packed data; it has the attributes of a ``SubmissionResult``."""
+    __slots__ = ('submission_id', 'test_case_id', 'status', 'execution_time', 'wall_time', 'memory_used')
+    output = ''
+    error_message = ''
+
+    def __init__(self, submission_id, test_case_id, status, execution_time, wall_time, memory_used):
+        self.submission_id = submission_id
+        self.test_case_id = test_case_id
+        self.status = status
+        self.execution_time = execution_time
+        self.wall_time = wall_time
+        self.memory_used = memory_used
+
+    def __repr__(self):
+        return f"<PackedResult: test case {self.test_case_id} - {self.status}>"
+
+
+class CaseResults:
+    """
+    A submission's results in case order.
+
+    Cases with a stored ``SubmissionResult`` yield that row, the rest a
+    ``PackedResult``. Rows are only queried when some case did not pass, so
+    listing accepted submissions costs no extra queries; prefetch
+    ``results`` to avoid the query altogether. Submissions judged before
+    packing existed fall back to their rows.
+    """
+
+    def __init__(self, submission):
+        self.submission = submission
+        self._items = None
+
+    def _load(self):
+        if self._items is not None:
+            return self._items
+        submission = self.submission
+        if submission.packed_results is None:
+            self._items = list(submission.results.all())
+            return self._items
+        packed = unpack_results(submission.packed_results)
+        rows = {}
+        if any(result['status'] != 'accepted' for result in packed):
+            rows = {row.test_case_id: row for row in submission.results.all()}
+        self._items = [
+            rows.get(result['test_case_id']) or PackedResult(submission.pk, **result)
+            for result in packed
+        ]
+        return self._items
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+    def failed(self):
+        return [result for result in self._load() if result.status != 'accepted']
+
+
+def _float(value):
+    return math.nan if value is None else value
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read(data, offset, typecode, count):
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    values.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
@@ -0,0 +1,45 @@
+from ninja import Schema
+from datetime import datetime
+from typing import Optional, List
+
+
+class SubmissionHistorySchema(Schema):
+    id: int
+    question_id: int
+    language: str
+    status: str
+    points_earned: int
+    submitted_at: datetime
+    archived: bool
+
+
+class SubmissionHistoryPageSchema(Schema):
+    results: List[SubmissionHistorySchema]
+    next_cursor: Optional[str] = None
+
+
+class CaseResultSchema(Schema):
+    test_case_id: int
+    status: str
+    execution_time: Optional[float] = None
+    wall_time: Optional[float] = None
+    memory_used: Optional[int] = None
+    output: str = ''
+    error_message: str = ''
+
+
+class ArchivedSubmissionSchema(Schema):
+    id: int
+    user_id: int
+    question_id: int
+    code: str
+    language: str
+    status: str
+    execution_time: Optional[float] = None
+    memory_used: Optional[int] = None
+    points_earned: int
+    passed_test_cases: int
+    total_test_cases: int
+    error_message: str
+    submitted_at: datetime
+    results: List[CaseResultSchema]
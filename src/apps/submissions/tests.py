@@ -1,3 +1,271 @@
-from django.test import TestCase
+import asyncio
+import io
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from common.compression import dictionary_id, get_dictionary_store, is_compressed
+from common.testing import QuestionTestData
+from judge.models import JudgeJob
+from leaderboard.fastest import fastest, rebuild_fastest
+from progress.activity import active_days, rebuild_activity
+from progress.models import UserActivity, UserProgress
+from progress.services import rebuild_progress
+from questions.models import TestCase as QuestionTestCase
+from submissions.archive import get_segment_store
+from submissions.live import VerdictHub, snapshot_many
+from submissions.models import ArchivedSubmission, Submission, SubmissionResult
+from submissions.packing import pack_results, unpack_results
+
+
+class LiveEventsTests(QuestionTestData):
+    def submit(self, **fields):
+        return Submission.objects.create(user=self.user, question=self.question, code='', language='python', **fields)
+
+    def test_snapshots_all_watched_submissions_in_one_query(self):
+        first, second = self.submit(), self.submit(status='accepted')
+        JudgeJob.objects.create(submission=first, user=self.user, cases_done=1, cases_total=3)
+        with self.assertNumQueries(1):
+            snapshots = snapshot_many([first.pk, second.pk])
+        self.assertEqual((snapshots[first.pk]['cases_done'], snapshots[first.pk]['cases_total']), (1, 3))
+        self.assertEqual(snapshots[second.pk]['status'], 'accepted')
+
+    async def test_hub_fans_out_progress_and_verdict(self):
+        submission = await sync_to_async(self.submit)()
+        job = await JudgeJob.objects.acreate(submission=submission, user=self.user)
+        hub = VerdictHub(interval=0.01)
+
+        async def watch():
+            received = []
+            async with hub.subscribe(submission.pk) as events:
+                while not received or received[-1][0] != 'verdict':
+                    received.append(await events.get())
+            return received
+
+        watchers = [asyncio.create_task(watch()) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        await Submission.objects.filter(pk=submission.pk).aupdate(status='running')
+        await JudgeJob.objects.filter(pk=job.pk).aupdate(cases_done=1, cases_total=2)
+        await asyncio.sleep(0.05)
+        await Submission.objects.filter(pk=submission.pk).aupdate(status='accepted', passed_test_cases=2)
+
+        for received in await asyncio.wait_for(asyncio.gather(*watchers), 5):
+            self.assertEqual([name for name, _ in received], ['status', 'status', 'progress', 'verdict'])
+            self.assertEqual(received[2][1], {'cases_done': 1, 'cases_total': 2})
+            self.assertEqual(received[3][1]['passed_test_cases'], 2)
+
+    @override_settings(SUBMISSION_EVENTS_POLL_INTERVAL=0.01)
+    async def test_event_stream_ends_with_verdict(self):
+        submission = await sync_to_async(self.submit)(status='wrong_answer', passed_test_cases=1)
+        response = await self.async_client.get(f'/api/submissions/{submission.pk}/events')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn('event: verdict', body)
+        self.assertIn('"status": "wrong_answer"', body)
+
+    async def test_unknown_submission_is_404(self):
+        response = await self.async_client.get('/api/submissions/999999/events')
+        self.assertEqual(response.status_code, 404)
+
+
+class CompressedStorageTests(QuestionTestData):
+    def setUp(self):
+        get_dictionary_store.cache_clear()
+        self.addCleanup(get_dictionary_store.cache_clear)
+
+    def raw(self, table, column, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {column} FROM {table} WHERE id = %s", [pk])
+            return cursor.fetchone()[0]
+
+    def submit(self, code):
+        return Submission.objects.create(user=self.user, question=self.question, code=code, language='python')
+
+    def test_orm_reads_and_writes_plain_text(self):
+        code = "print('hello')\n" * 50
+        submission = self.submit(code)
+        case = QuestionTestCase.objects.create(question=self.question, input_data='', expected_output='42')
+        result = SubmissionResult.objects.create(
+            submission=submission, test_case=case, status='accepted', output='42\n' * 100,
+        )
+        self.assertEqual(SubmissionResult.objects.get(pk=result.pk).output, '42\n' * 100)
+        self.assertEqual(SubmissionResult.objects.get(pk=result.pk).error_message, '')
+        self.assertTrue(is_compressed(self.raw('submissions_submission', 'code', submission.pk)))
+        self.assertLess(len(self.raw('submissions_submission', 'code', submission.pk)), len(code))
+        self.assertEqual(Submission.objects.get(pk=submission.pk).code, code)
+        self.assertTrue(Submission.objects.filter(code=code).exists())
+
+    def test_command_converts_legacy_rows_and_trains_dictionaries(self):
+        submissions = [self.submit(f"n = int(input())\nprint(n * {i})\n" * 10) for i in range(5)]
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE submissions_submission SET code = 'legacy ' || id")
+
+        out = io.StringIO()
+        call_command('compress_text_fields', '--chunk-size', '2', stdout=out)
+        self.assertIn('submissions.Submission.code: compressed 5 values', out.getvalue())
+        for submission in submissions:
+            self.assertTrue(is_compressed(self.raw('submissions_submission', 'code', submission.pk)))
+            self.assertEqual(Submission.objects.get(pk=submission.pk).code, f'legacy {submission.pk}')
+
+        code = "n = int(input())\nvalues = list(map(int, input().split()))\nprint(sum(values))\n"
+        Submission.objects.update(code=code)
+        out = io.StringIO()
+        call_command('compress_text_fields', '--train', '--recompress', stdout=out)
+        self.assertIn("Trained 'submission_code' dictionary", out.getvalue())
+        raw = self.raw('submissions_submission', 'code', submissions[0].pk)
+        self.assertIsNotNone(dictionary_id(raw))
+        self.assertEqual(Submission.objects.get(pk=submissions[0].pk).code, code)
+
+
+class PackedResultsTests(QuestionTestData):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cases = [
+            QuestionTestCase.objects.create(question=cls.question, input_data='', expected_output=str(i))
+            for i in range(3)
+        ]
+
+    def submit(self, results):
+        return Submission.objects.create(
+            user=self.user, question=self.question, code='', language='python', packed_results=pack_results(results),
+        )
+
+    def test_round_trip(self):
+        results = [
+            {'test_case_id': 7, 'status': 'accepted', 'execution_time': 0.125, 'wall_time': 0.5, 'memory_used': 12},
+            {'test_case_id': 9, 'status': 'runtime_error', 'execution_time': None, 'wall_time': None,
+             'memory_used': None},
+        ]
+        self.assertEqual(unpack_results(pack_results(results)), results)
+
+    def test_accepted_submission_reads_without_queries(self):
+        submission = self.submit([
+            {'test_case_id': case.pk, 'status': 'accepted', 'execution_time': 0.01, 'memory_used': 8}
+            for case in self.cases
+        ])
+        submission = Submission.objects.get(pk=submission.pk)
+        with self.assertNumQueries(0):
+            results = list(submission.case_results)
+        self.assertEqual([result.test_case_id for result in results], [case.pk for case in self.cases])
+        self.assertEqual(results[0].memory_used, 8)
+
+    def test_failing_cases_come_from_stored_rows(self):
+        statuses = ['accepted', 'wrong_answer', 'accepted']
+        submission = self.submit([
+            {'test_case_id': case.pk, 'status': status} for case, status in zip(self.cases, statuses)
+        ])
+        SubmissionResult.objects.create(
+            submission=submission, test_case=self.cases[1], status='wrong_answer', output='41',
+        )
+        results = Submission.objects.get(pk=submission.pk).case_results
+        self.assertEqual([result.status for result in results], statuses)
+        self.assertEqual(results[1].output, '41')
+        self.assertEqual([result.test_case_id for result in results.failed()], [self.cases[1].pk])
+
+    def test_submissions_judged_before_packing_use_rows(self):
+        submission = Submission.objects.create(user=self.user, question=self.question, code='', language='python')
+        SubmissionResult.objects.create(submission=submission, test_case=self.cases[0], status='accepted')
+        self.assertEqual(len(submission.case_results), 1)
+
+
+class ArchiveTests(QuestionTestData):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.case = QuestionTestCase.objects.create(question=cls.question, input_data='1 2', expected_output='3')
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        patcher = self.settings(SUBMISSION_ARCHIVE_ROOT=root.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        get_segment_store.cache_clear()
+        self.addCleanup(get_segment_store.cache_clear)
+
+    def submit(self, status, days_ago, **fields):
+        submission = Submission.objects.create(
+            user=self.user, question=self.question, code=f'print({days_ago})\n', language='python', status=status,
+            packed_results=pack_results([{'test_case_id': self.case.pk, 'status': status, 'execution_time': 0.5}]),
+            **fields,
+        )
+        Submission.objects.filter(pk=submission.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return submission
+
+    def test_moves_old_submissions_out_of_the_hot_tables(self):
+        failed = self.submit('wrong_answer', 400)
+        SubmissionResult.objects.create(submission=failed, test_case=self.case, status='wrong_answer', output='4')
+        older_accepted = self.submit('accepted', 500)
+        best = self.submit('accepted', 450)
+        recent = self.submit('accepted', 10)
+        UserProgress.objects.create(user=self.user, question=self.question, status='solved', best_submission=best)
+
+        out = io.StringIO()
+        call_command('archive_submissions', '--older-than-days', '365', '--batch-size', '1', stdout=out)
+        self.assertIn('archived 2 submissions', out.getvalue())
+        self.assertEqual(set(Submission.objects.values_list('pk', flat=True)), {best.pk, recent.pk})
+        self.assertFalse(SubmissionResult.objects.exists())
+        self.assertEqual(ArchivedSubmission.objects.count(), 2)
+
+        history = self.client.get('/api/submissions/history', {'user_id': self.user.pk}).json()['results']
+        self.assertEqual([row['id'] for row in history], [recent.pk, failed.pk, best.pk, older_accepted.pk])
+        self.assertEqual([row['archived'] for row in history], [False, True, False, True])
+
+        detail = self.client.get(f'/api/submissions/archived/{failed.pk}').json()
+        self.assertEqual(detail['code'], 'print(400)\n')
+        self.assertEqual(detail['results'][0]['output'], '4')
+        detail = self.client.get(f'/api/submissions/archived/{older_accepted.pk}').json()
+        self.assertEqual(detail['results'][0]['execution_time'], 0.5)
+
+    def test_history_pages_by_submission_time_then_id(self):
+        submissions = [self.submit('accepted', days_ago) for days_ago in (400, 420, 440, 10, 10, 10)]
+        call_command('archive_submissions', stdout=io.StringIO())
+        # Live and archived rows alike can share a timestamp across a page boundary.
+        same_time = timezone.now() - timedelta(days=5)
+        Submission.objects.update(created_at=same_time)
+        ArchivedSubmission.objects.filter(submission_id=submissions[0].pk).update(submitted_at=same_time)
+
+        seen, params = [], {'user_id': self.user.pk, 'limit': 2}
+        while True:
+            page = self.client.get('/api/submissions/history', params).json()
+            seen += [row['id'] for row in page['results']]
+            if page['next_cursor'] is None:
+                break
+            params['cursor'] = page['next_cursor']
+        self.assertEqual(seen, [submissions[i].pk for i in (5, 4, 3, 0, 1, 2)])
+        params['cursor'] = 'nope'
+        self.assertEqual(self.client.get('/api/submissions/history', params).status_code, 400)
+
+    def test_rebuilds_count_archived_submissions(self):
+        self.submit('wrong_answer', 500, passed_test_cases=0)
+        # Solved before the question was worth more; the later solve stays hot as the best.
+        first_solve = self.submit('accepted', 450, points_earned=5, passed_test_cases=1, execution_time=0.25)
+        best = self.submit('accepted', 10, points_earned=10, passed_test_cases=1, execution_time=0.5)
+        rebuild_progress()
+        call_command('archive_submissions', stdout=io.StringIO())
+        self.assertEqual(Submission.objects.count(), 1)
+
+        rebuild_progress()
+        progress = UserProgress.objects.get(user=self.user, question=self.question)
+        self.assertEqual((progress.attempts, progress.best_submission_id), (3, best.pk))
+        self.assertEqual(
+            progress.first_solved_at, ArchivedSubmission.objects.get(submission_id=first_solve.pk).submitted_at,
+        )
+
+        call_command('reconcile_question_counters', stdout=io.StringIO())
+        self.question.refresh_from_db()
+        self.assertEqual((self.question.total_submissions, self.question.successful_submissions), (3, 2))
+
+        rebuild_activity()
+        self.assertEqual(UserActivity.objects.get(user=self.user).longest_streak, 1)
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertEqual(len(active_days(activity, activity.start_day, timezone.localdate())), 2)
+
+        rebuild_fastest()
+        self.assertEqual([entry[2] for entry in fastest(self.question.pk)['python']], [first_solve.pk])
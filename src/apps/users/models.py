@@ -1,6 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from apps.common.models import TimestampedModel
+from common.models import TimestampedModel
 
 
 class User(AbstractUser):
@@ -11,10 +11,19 @@ class User(AbstractUser):
     linkedin_profile = models.URLField(blank=True)
     total_points = models.IntegerField(default=0)
     problems_solved = models.IntegerField(default=0)
+    # When total_points/problems_solved last changed: breaks leaderboard ties
+    # (earliest first) and lets leaderboards pick up changes incrementally.
+    points_updated_at = models.DateTimeField(null=True, blank=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['-total_points', '-problems_solved', 'points_updated_at'], name='user_ranking_idx'),
+            models.Index(fields=['points_updated_at'], name='user_points_updated_idx'),
+        ]
+
 
 class UserProfile(TimestampedModel):
     """Extended profile information for users"""
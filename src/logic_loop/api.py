@@ -2,6 +2,10 @@ from ninja import NinjaAPI
 # from ninja.security import HttpBearer
 # Import your app apis
 from apps.users.api import router as users_router
+from apps.submissions.api import router as submissions_router
+from apps.progress.api import router as progress_router
+from apps.leaderboard.api import router as leaderboard_router
+from apps.questions.api import router as questions_router
 
 
 # Custom authentication
@@ -43,4 +47,8 @@ def health_check(request):
     return {"status": "ok", "message": "API is running"}
 
 # Add routers for each app
-api.add_router("/users", users_router, tags=["users"])
\ No newline at end of file
+api.add_router("/users", users_router, tags=["users"])
+api.add_router("/submissions", submissions_router, tags=["submissions"])
+api.add_router("/progress", progress_router, tags=["progress"])
+api.add_router("/leaderboard", leaderboard_router, tags=["leaderboard"])
+api.add_router("/questions", questions_router, tags=["questions"])
\ No newline at end of file
@@ -56,6 +56,8 @@ INSTALLED_APPS = [
     'questions',
     'submissions',
     'users',
+    'judge',
+    'leaderboard',
 ]
 
 MIDDLEWARE = [
@@ -143,3 +145,63 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Judge
+# Worker processes for `manage.py judge`; None shares the CPUs out, JUDGE_CASE_CONCURRENCY to a worker.
+JUDGE_WORKERS = None
+JUDGE_POLL_INTERVAL = 1.0  # seconds
+JUDGE_LEASE_SECONDS = 300  # a job whose lease lapses is handed to another engine
+JUDGE_MAX_ATTEMPTS = 3  # lapsed leases before a job's submission gets an internal error
+JUDGE_JOB_RETENTION = 24 * 3600  # seconds finished jobs are kept
+JUDGE_MAINTENANCE_INTERVAL = 5  # seconds between orphan sweeps / rejudge steps while busy
+JUDGE_REJUDGE_CHUNK_SIZE = 1000  # submissions queued per rejudge step
+JUDGE_COMPILE_TIME_LIMIT = 30  # seconds
+JUDGE_OUTPUT_LIMIT = 64 * 1024 * 1024  # bytes a program may write
+JUDGE_STORED_OUTPUT_CHARS = 2000  # characters kept on SubmissionResult
+# Results are packed onto Submission; SubmissionResult rows are kept only for failing cases unless this is set.
+JUDGE_KEEP_ALL_RESULTS = False
+# Test cases of one submission run side by side, each in its own sandboxed process.
+JUDGE_CASE_CONCURRENCY = 4
+# Fork Python test case processes from a pre-initialised interpreter per worker.
+JUDGE_PYTHON_WARM_POOL = True
+# Compiled binaries shared by all judge workers on a box; None disables the cache.
+JUDGE_ARTIFACT_CACHE_ROOT = BASE_DIR / 'judge_cache' / 'artifacts'
+JUDGE_ARTIFACT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+JUDGE_POLICY = 'full'  # 'full' or 'first_failure'; Question.judge_policy overrides
+JUDGE_FLOAT_TOLERANCE = 1e-6  # for Question.output_comparison == 'float'
+JUDGE_CASE_COST_TTL = 300  # seconds to cache per-test-case timing averages
+
+# Live submission events (GET /api/submissions/<id>/events)
+SUBMISSION_EVENTS_POLL_INTERVAL = 0.5  # seconds between batched polls of all watched submissions
+SUBMISSION_EVENTS_KEEPALIVE = 15  # seconds of silence before a keepalive comment
+
+# Submissions older than this are moved to compressed segment files by `manage.py archive_submissions`.
+SUBMISSION_ARCHIVE_AFTER_DAYS = 365
+SUBMISSION_ARCHIVE_ROOT = BASE_DIR / 'submission_archive'
+SUBMISSION_ARCHIVE_SEGMENT_BYTES = 64 * 1024 * 1024  # a segment is closed once it reaches this size
+
+# Test case data larger than this is moved out of the database into the blob store.
+TEST_CASE_INLINE_MAX_BYTES = 64 * 1024
+TEST_CASE_BLOB_ROOT = BASE_DIR / 'testcase_blobs'
+
+# Seconds each process buffers Question submission counters before flushing them (see apps/questions/counters.py).
+QUESTION_COUNTER_FLUSH_INTERVAL = 5
+
+# Seconds a process keeps its index of achievement thresholds before reloading it.
+ACHIEVEMENT_INDEX_TTL = 60
+
+# Seconds a process keeps its in-memory question tag index before reloading it (see apps/questions/tagindex.py).
+QUESTION_TAG_INDEX_TTL = 60
+
+# Leaderboards are held in memory per process and rebuilt from the database on first use.
+LEADERBOARD_SYNC_INTERVAL = 2  # seconds between reads of users whose points changed
+LEADERBOARD_SYNC_OVERLAP = 30  # seconds re-read on each sync, to catch transactions that committed late
+LEADERBOARD_REBUILD_INTERVAL = 3600  # seconds between full rebuilds, which drop deleted users
+
+# Accepted submissions kept on each question's fastest-solutions board per language (one per user).
+FASTEST_SOLUTIONS_SIZE = 10
+
+# Preset dictionaries for CompressedTextField live in the database (see apps/common/compression.py);
+# each process rereads which dictionary is active for a field after this many seconds.
+COMPRESSION_DICTIONARY_TTL = 60
@@ -0,0 +1,128 @@
+"""
+Benchmark storing a submission's test case results as rows vs packed.
+
+Writes the same judged submissions twice, once with a ``SubmissionResult``
+row per case and once packed onto ``Submission.packed_results`` with rows
+only for failing cases, then reads every submission's results back. Runs
+inside a transaction that is rolled back, so it leaves the database as it
+found it; run it against a migrated development database.
+
+Usage:
+    python scripts/bench_result_layout.py [--submissions 500] [--cases 50] [--fail-rate 0.05]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'logic_loop.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import transaction  # noqa: E402
+
+from categories.models import Category  # noqa: E402
+from questions.models import Difficulty, Question, TestCase  # noqa: E402
+from submissions.models import Submission, SubmissionResult  # noqa: E402
+from submissions.packing import pack_results  # noqa: E402
+
+
+class Rollback(Exception):
+    pass
+
+
+def verdicts(cases, count, fail_rate):
+    rng = random.Random(0)
+    return [
+        [
+            {
+                'test_case_id': case.pk,
+                'status': 'wrong_answer' if rng.random() < fail_rate else 'accepted',
+                'execution_time': round(rng.uniform(0.001, 0.5), 4),
+                'wall_time': round(rng.uniform(0.001, 0.6), 4),
+                'memory_used': rng.randint(8, 64),
+                'output': '42',
+                'error_message': '',
+            }
+            for case in cases
+        ]
+        for _ in range(count)
+    ]
+
+
+def store(question, user, results_per_submission, packed):
+    submissions = Submission.objects.bulk_create([
+        Submission(
+            user=user, question=question, code='', language='python', status='accepted',
+            packed_results=pack_results(results) if packed else None,
+        )
+        for results in results_per_submission
+    ])
+    SubmissionResult.objects.bulk_create([
+        SubmissionResult(
+            submission=submission, test_case_id=result['test_case_id'], status=result['status'],
+            execution_time=result['execution_time'], wall_time=result['wall_time'],
+            memory_used=result['memory_used'], output=result['output'],
+        )
+        for submission, results in zip(submissions, results_per_submission)
+        for result in results
+        if not packed or result['status'] != 'accepted'
+    ], batch_size=1000)
+    return [submission.pk for submission in submissions]
+
+
+def read(submission_ids):
+    count = 0
+    for submission in Submission.objects.filter(pk__in=submission_ids).prefetch_related('results'):
+        count += sum(1 for _ in submission.case_results)
+    return count
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--submissions', type=int, default=500)
+    parser.add_argument('--cases', type=int, default=50)
+    parser.add_argument('--fail-rate', type=float, default=0.05, help="Share of cases that fail")
+    options = parser.parse_args()
+
+    try:
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(username='bench-result-layout', password='x')
+            question = Question.objects.create(
+                title='Bench', slug='bench-result-layout', description='', problem_statement='',
+                category=Category.objects.create(name='Bench', slug='bench-result-layout'),
+                difficulty=Difficulty.objects.create(name='Bench', level=99), created_by=user,
+            )
+            cases = TestCase.objects.bulk_create([
+                TestCase(question=question, input_data=str(i), expected_output=str(i)) for i in range(options.cases)
+            ])
+            results = verdicts(cases, options.submissions, options.fail_rate)
+            total = options.submissions * options.cases
+
+            for label, packed in (('rows', False), ('packed', True)):
+                ids, write_time = timed(store, question, user, results, packed)
+                read_count, read_time = timed(read, ids)
+                assert read_count == total
+                rows = SubmissionResult.objects.filter(submission_id__in=ids).count()
+                print(
+                    f"{label:<7} write {total / write_time:10.0f} cases/s"
+                    f"   read {total / read_time:10.0f} cases/s   {rows:7d} result rows"
+                )
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
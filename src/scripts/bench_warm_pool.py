@@ -0,0 +1,75 @@
+"""
+Benchmark the per-test-case overhead of Python submissions, cold vs warm.
+
+Runs a trivial program through the judge sandbox many times, once starting
+a fresh interpreter per case and once forking from the warm pool's zygote,
+and prints wall-time statistics for both. Needs no database.
+
+Usage:
+    python scripts/bench_warm_pool.py [--cases 200] [--imports]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'apps'))
+
+from judge.languages import LANGUAGES, format_command  # noqa: E402
+from judge.sandbox import run_process  # noqa: E402
+from judge.warmpool import WarmPool  # noqa: E402
+
+PROGRAM = "a, b = map(int, input().split())\nprint(a + b)\n"
+# What a typical competitive-programming solution pulls in.
+IMPORTS = "import collections, heapq, bisect, itertools, functools, math, re\n"
+
+
+def measure(argv, workdir, cases, spawn=None):
+    env = {'PATH': os.environ.get('PATH', '/usr/bin:/bin'), 'LANG': 'C.UTF-8', 'HOME': workdir}
+    timings = []
+    for _ in range(cases):
+        started = time.perf_counter()
+        result = run_process(argv, stdin=b'1 2\n', cwd=workdir, env=env, spawn=spawn)
+        timings.append(time.perf_counter() - started)
+        if result.stdout.strip() != b'3':
+            raise SystemExit(f"Unexpected output: {result.stdout!r} {result.stderr!r}")
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    print(
+        f"{label:<6} mean {statistics.mean(timings) * 1000:7.2f} ms"
+        f"   p50 {timings[len(timings) // 2] * 1000:7.2f} ms"
+        f"   p95 {timings[int(len(timings) * 0.95)] * 1000:7.2f} ms"
+    )
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cases', type=int, default=200)
+    parser.add_argument('--imports', action='store_true', help="Have the program import common modules")
+    options = parser.parse_args()
+
+    python = LANGUAGES['python']
+    pool = WarmPool()
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        source = os.path.join(workdir, python.source_name)
+        with open(source, 'w') as f:
+            f.write((IMPORTS if options.imports else '') + PROGRAM)
+        argv = format_command(python.run, src=source, exe='', dir=workdir, memory_mb=256)
+
+        # Warm up the page cache and start the zygote before timing.
+        measure(argv, workdir, 3)
+        measure(argv, workdir, 3, spawn=pool.spawn)
+        cold = report('cold', measure(argv, workdir, options.cases))
+        warm = report('warm', measure(argv, workdir, options.cases, spawn=pool.spawn))
+    pool.close()
+    print(f"warm pool saves {(cold - warm) * 1000:.2f} ms per case ({1 - warm / cold:.0%})")
+
+
+if __name__ == '__main__':
+    main()